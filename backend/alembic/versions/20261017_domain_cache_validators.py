@@ -0,0 +1,22 @@
+"""add source page validators to domain_contact_cache"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_domain_cache_validators"
+down_revision = "20261017_extraction_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("domain_contact_cache", sa.Column("source_url", sa.String(), nullable=True))
+    op.add_column("domain_contact_cache", sa.Column("etag", sa.String(), nullable=True))
+    op.add_column("domain_contact_cache", sa.Column("last_modified", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("domain_contact_cache", "last_modified")
+    op.drop_column("domain_contact_cache", "etag")
+    op.drop_column("domain_contact_cache", "source_url")
@@ -0,0 +1,43 @@
+"""create domain_contact_cache table
+
+Also merges the three open heads so ``alembic upgrade head`` resolves again.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_domain_contact_cache"
+down_revision = (
+    "20250927_ensure_usage_tables",
+    "20250928_add_nicho_to_lead_historial",
+    "add_plan_suspendido_usuarios",
+)
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "domain_contact_cache",
+        sa.Column("dominio", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("telefono", sa.String(), nullable=True),
+        sa.Column("http_status", sa.Integer(), nullable=True),
+        sa.Column(
+            "fetched_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_domain_contact_cache_fetched_at",
+        "domain_contact_cache",
+        ["fetched_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_domain_contact_cache_fetched_at", table_name="domain_contact_cache")
+    op.drop_table("domain_contact_cache")
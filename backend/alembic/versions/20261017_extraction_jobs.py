@@ -0,0 +1,58 @@
+"""create extraction_jobs queue table"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261017_extraction_jobs"
+down_revision = "20261017_search_query_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "extraction_jobs",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("usuarios.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("user_email_lower", sa.String(), nullable=False),
+        sa.Column("plan", sa.String(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("status", sa.String(16), nullable=False, server_default="queued"),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("result", postgresql.JSONB(), nullable=True),
+        sa.Column("error", postgresql.JSONB(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("worker_id", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_extraction_jobs_user_id", "extraction_jobs", ["user_id"])
+    op.create_index(
+        "ix_extraction_jobs_user_email_lower", "extraction_jobs", ["user_email_lower"]
+    )
+    op.create_index(
+        "ix_extraction_jobs_claim",
+        "extraction_jobs",
+        ["status", sa.text("priority DESC"), "created_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_extraction_jobs_claim", table_name="extraction_jobs")
+    op.drop_index("ix_extraction_jobs_user_email_lower", table_name="extraction_jobs")
+    op.drop_index("ix_extraction_jobs_user_id", table_name="extraction_jobs")
+    op.drop_table("extraction_jobs")
@@ -0,0 +1,47 @@
+"""create llm_usage table"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_llm_usage"
+down_revision = "20261017_search_variant_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_usage",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("user_email_lower", sa.String(), nullable=False),
+        sa.Column("period_yyyymmdd", sa.String(8), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("requests", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("errors", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("coalesced", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("prompt_tokens", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("completion_tokens", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("latency_ms", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.UniqueConstraint(
+            "user_email_lower", "period_yyyymmdd", "model", name="llm_usage_user_period_model_uk"
+        ),
+    )
+    op.create_index("idx_llm_usage_user", "llm_usage", ["user_email_lower"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_llm_usage_user", table_name="llm_usage")
+    op.drop_table("llm_usage")
@@ -0,0 +1,38 @@
+"""create search_query_cache table"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261017_search_query_cache"
+down_revision = "20261017_domain_contact_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_query_cache",
+        sa.Column("cache_key", sa.String(), primary_key=True),
+        sa.Column("query", sa.Text(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("page", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("urls", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "fetched_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_search_query_cache_fetched_at",
+        "search_query_cache",
+        ["fetched_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_query_cache_fetched_at", table_name="search_query_cache")
+    op.drop_table("search_query_cache")
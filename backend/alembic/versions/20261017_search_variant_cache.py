@@ -0,0 +1,35 @@
+"""create search_variant_cache table"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261017_search_variant_cache"
+down_revision = "20261017_domain_cache_validators"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_variant_cache",
+        sa.Column("cache_key", sa.String(), primary_key=True),
+        sa.Column("variantes", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "fetched_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_search_variant_cache_fetched_at",
+        "search_variant_cache",
+        ["fetched_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_variant_cache_fetched_at", table_name="search_variant_cache")
+    op.drop_table("search_variant_cache")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+
+# (keyword, score): matched against the link path and its anchor text.
+CONTACT_HINTS: tuple[tuple[str, int], ...] = (
+    ("contact", 3),
+    ("contacta", 3),
+    ("aviso-legal", 2),
+    ("aviso legal", 2),
+    ("impressum", 2),
+    ("legal", 1),
+    ("privacidad", 1),
+    ("privacy", 1),
+    ("quienes-somos", 1),
+    ("about", 1),
+)
+
+ANCHOR_RE = re.compile(
+    r"<a\s[^>]*?href\s*=\s*[\"']([^\"'#>]+)[\"'][^>]*>(.{0,200}?)</a>",
+    re.IGNORECASE | re.DOTALL,
+)
+TAG_RE = re.compile(r"<[^>]+>")
+LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+SKIP_SCHEMES = ("mailto:", "tel:", "javascript:", "whatsapp:")
+
+
+def _host(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _score(url: str, text: str = "") -> int:
+    haystack = f"{urlparse(url).path.lower()} {text.lower()}"
+    return max((score for hint, score in CONTACT_HINTS if hint in haystack), default=0)
+
+
+def _rank(candidates: list[tuple[str, str]], base_url: str, limit: int) -> list[str]:
+    base_host = _host(base_url)
+    scored: dict[str, int] = {}
+    for href, text in candidates:
+        href = href.strip()
+        if not href or href.lower().startswith(SKIP_SCHEMES):
+            continue
+        url = urljoin(base_url + "/", href)
+        if _host(url) != base_host or urlparse(url).path in ("", "/"):
+            continue
+        score = _score(url, text)
+        if score and score > scored.get(url, 0):
+            scored[url] = score
+    # sorted() is stable, so equal scores keep document order.
+    return sorted(scored, key=lambda u: -scored[u])[: max(0, limit)]
+
+
+def discover_contact_links(html: str, base_url: str, limit: int = 3) -> list[str]:
+    """Same-site links from ``html`` that look like contact or legal pages, best first."""
+    anchors = [
+        (href, TAG_RE.sub(" ", text)) for href, text in ANCHOR_RE.findall(html or "")
+    ]
+    return _rank(anchors, base_url, limit)
+
+
+def discover_sitemap_links(xml: str, base_url: str, limit: int = 3) -> list[str]:
+    """Contact-like ``<loc>`` entries of a ``sitemap.xml`` body."""
+    return _rank([(loc, "") for loc in LOC_RE.findall(xml or "")], base_url, limit)
+
+
+def _normalize_key(domain: str) -> str:
+    key = (domain or "").strip().lower()
+    return key[4:] if key.startswith("www.") else key
+
+
+class ContactPageCache:
+    """Per-domain memory of the pages where contacts were found (TTL + LRU)."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 7 * 24 * 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ContactPageCache":
+        try:
+            ttl_hours = float(os.getenv("CONTACT_PAGE_CACHE_TTL_HOURS", "168"))
+        except ValueError:
+            ttl_hours = 168.0
+        try:
+            max_entries = int(os.getenv("CONTACT_PAGE_CACHE_MAX_ENTRIES", "10000"))
+        except ValueError:
+            max_entries = 10000
+        return cls(max_entries=max_entries, ttl_seconds=ttl_hours * 3600)
+
+    def get(self, domain: str) -> Optional[list[str]]:
+        key = _normalize_key(domain)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            if entry is not None:
+                self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, domain: str, urls: list[str]) -> None:
+        key = _normalize_key(domain)
+        if not key or not urls:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), list(urls))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": int(self.ttl_seconds),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
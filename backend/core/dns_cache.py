@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional
+
+import httpcore
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class NXDomainError(Exception):
+    """The name does not exist (as opposed to a timeout or server failure)."""
+
+
+# A resolver returns (addresses, ttl_seconds) or raises NXDomainError.
+Resolver = Callable[[str], Awaitable[tuple[list[str], float]]]
+
+
+async def getaddrinfo_resolver(host: str, default_ttl: float = 300.0) -> tuple[list[str], float]:
+    """Stdlib fallback without TTL information. EAI_NONAME is what a broken
+    local resolver returns too, so it is never taken as NXDOMAIN: the error
+    propagates and the host is treated as unknown."""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos)), default_ttl
+
+
+def dnspython_resolver() -> Optional[Resolver]:
+    """Async resolver with real TTLs and an authoritative NXDOMAIN, when dnspython is installed."""
+    try:
+        import dns.asyncresolver
+        import dns.resolver
+    except ImportError:
+        return None
+    resolver = dns.asyncresolver.Resolver()
+
+    async def resolve(host: str) -> tuple[list[str], float]:
+        addresses: list[str] = []
+        ttl: Optional[float] = None
+        for rdtype in ("A", "AAAA"):
+            try:
+                answer = await resolver.resolve(host, rdtype)
+            except dns.resolver.NXDOMAIN as exc:
+                raise NXDomainError(host) from exc
+            except dns.resolver.NoAnswer:
+                continue
+            addresses.extend(r.to_text() for r in answer)
+            ttl = answer.rrset.ttl if ttl is None else min(ttl, answer.rrset.ttl)
+        # The name exists even without addresses; the HTTP attempt decides.
+        return addresses, float(ttl if ttl is not None else 0)
+
+    return resolve
+
+
+@dataclass
+class DnsAnswer:
+    host: str
+    addresses: tuple[str, ...] = ()
+    nxdomain: bool = False
+    error: Optional[str] = None
+    expires_at: float = 0.0
+
+
+class DnsCache:
+    """Concurrent pre-resolution of scrape batches with a TTL-bounded cache.
+
+    Positive answers are kept for their TTL clamped to ``[min_ttl, max_ttl]``;
+    NXDOMAIN for ``negative_ttl``. Timeouts and server failures are not
+    cached and do not mark the host as dead, so the HTTP attempt decides.
+    ``addresses`` hands the cached answer to ``CachedDnsBackend`` so the
+    scrape connects without resolving the name again.
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[Resolver] = None,
+        max_entries: int = 20000,
+        min_ttl: float = 30.0,
+        max_ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        concurrency: int = 50,
+        timeout: float = 3.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.resolver = resolver or dnspython_resolver() or getaddrinfo_resolver
+        self.max_entries = max(1, max_entries)
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.clock = clock
+        self._entries: OrderedDict[str, DnsAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.lookups = 0
+        self.nxdomain = 0
+        self.errors = 0
+        self.pinned = 0
+
+    @classmethod
+    def from_env(cls) -> "DnsCache":
+        return cls(
+            min_ttl=_env_float("DNS_CACHE_MIN_TTL", 30.0),
+            max_ttl=_env_float("DNS_CACHE_MAX_TTL", 3600.0),
+            negative_ttl=_env_float("DNS_CACHE_NEGATIVE_TTL", 300.0),
+            concurrency=int(_env_float("DNS_CONCURRENCY", 50)),
+            timeout=_env_float("DNS_TIMEOUT", 3.0),
+        )
+
+    # ------------------------------------------------------------------
+    def _cached(self, host: str) -> Optional[DnsAnswer]:
+        with self._lock:
+            answer = self._entries.get(host)
+            if answer is None:
+                return None
+            if answer.expires_at <= self.clock():
+                self._entries.pop(host, None)
+                return None
+            self._entries.move_to_end(host)
+            self.hits += 1
+            return answer
+
+    def _store(self, answer: DnsAnswer) -> None:
+        with self._lock:
+            self._entries[answer.host] = answer
+            self._entries.move_to_end(answer.host)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def addresses(self, host: str) -> tuple[str, ...]:
+        """Cached addresses of ``host`` (empty if unknown or expired); no lookup."""
+        with self._lock:
+            answer = self._entries.get(host.lower().rstrip("."))
+            if answer is None or answer.expires_at <= self.clock():
+                return ()
+            return answer.addresses
+
+    async def resolve(self, host: str) -> DnsAnswer:
+        host = (host or "").strip().lower().rstrip(".")
+        cached = self._cached(host)
+        if cached is not None:
+            return cached
+        self.lookups += 1
+        try:
+            addresses, ttl = await asyncio.wait_for(self.resolver(host), timeout=self.timeout)
+        except NXDomainError:
+            self.nxdomain += 1
+            answer = DnsAnswer(host, nxdomain=True, expires_at=self.clock() + self.negative_ttl)
+            self._store(answer)
+            return answer
+        except Exception as exc:
+            self.errors += 1
+            logger.debug("dns lookup failed host=%s err=%s", host, exc)
+            return DnsAnswer(host, error=type(exc).__name__ or "error")
+        ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        answer = DnsAnswer(host, tuple(addresses), expires_at=self.clock() + ttl)
+        self._store(answer)
+        return answer
+
+    async def resolve_many(self, hosts: Iterable[str]) -> dict[str, DnsAnswer]:
+        gate = asyncio.Semaphore(self.concurrency)
+        unique = list(dict.fromkeys(hosts))
+
+        async def _one(host: str) -> DnsAnswer:
+            async with gate:
+                return await self.resolve(host)
+
+        answers = await asyncio.gather(*(_one(h) for h in unique))
+        return dict(zip(unique, answers))
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "lookups": self.lookups,
+            "nxdomain": self.nxdomain,
+            "errors": self.errors,
+            "pinned_connections": self.pinned,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CachedDnsBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend that connects to the addresses in ``cache``.
+
+    Only the TCP target changes: TLS SNI and the ``Host`` header still use
+    the name. Hosts without a cached answer (redirect targets, a disabled
+    pre-resolution) are resolved by ``backend`` as usual.
+    """
+
+    def __init__(self, cache: DnsCache, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.cache = cache
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = self.cache.addresses(host)
+        if not addresses:
+            return await self.backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        self.cache.pinned += 1
+        for address in addresses[:-1]:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                logger.debug("connect failed host=%s address=%s err=%s", host, address, exc)
+        return await self.backend.connect_tcp(addresses[-1], port, timeout, local_address, socket_options)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
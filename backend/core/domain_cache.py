@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.core.ttl_cache import PersistentTTLCache, timestamp
+
+CACHE_FIELDS = (
+    "email",
+    "telefono",
+    "http_status",
+    "fetched_at",
+    "source_url",
+    "etag",
+    "last_modified",
+)
+
+
+def has_validators(entry: Optional[dict]) -> bool:
+    """True if the page the contact came from can be revalidated conditionally."""
+    return bool(entry and entry.get("source_url") and (entry.get("etag") or entry.get("last_modified")))
+
+
+def _normalize_key(domain: str) -> str:
+    key = (domain or "").strip().lower()
+    if key.startswith("www."):
+        key = key[4:]
+    return key
+
+
+class DomainContactCache(PersistentTTLCache):
+    """Cross-tenant cache of scraped contacts keyed by normalized domain.
+
+    An in-process LRU sits in front of the ``domain_contact_cache`` table.
+    Entries older than the TTL count as misses so callers re-scrape them;
+    those that recorded the ``ETag``/``Last-Modified`` of their source page
+    stay available through ``revalidation_candidates`` so the re-scrape can
+    be a conditional request. Writes go straight to the table. Database
+    errors never propagate: the cache degrades to memory only.
+    """
+
+    ENV_PREFIX = "DOMAIN_CACHE"
+    DEFAULT_TTL_HOURS = 72.0
+    DEFAULT_PERSIST = True
+    KEY_COLUMN = "dominio"
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 72 * 3600, persist: bool = True):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds, persist=persist)
+        self._stale: OrderedDict[str, dict] = OrderedDict()
+        self.stale = 0
+        self.revalidations = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _model():
+        from backend.models import DomainContact
+
+        return DomainContact
+
+    def _row(self, key: str, entry: dict, stored_at: float) -> dict:
+        return {"dominio": key, **entry}
+
+    def _entry(self, row) -> tuple[str, dict, float]:
+        entry = {field: getattr(row, field) for field in CACHE_FIELDS}
+        return row.dominio, entry, timestamp(row.fetched_at)
+
+    # ------------------------------------------------------------------
+    def _set(self, key: str, entry: dict, stored_at: float) -> None:
+        self._stale.pop(key, None)
+        super()._set(key, entry, stored_at)
+
+    def _expired(self, key: str, entry: dict) -> None:
+        self.stale += 1
+        if has_validators(entry):
+            self._stale[key] = entry
+            self._stale.move_to_end(key)
+            while len(self._stale) > self.max_entries:
+                self._stale.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    def get_many(
+        self,
+        db: Optional[Session],
+        domains: Iterable[str],
+        now: Optional[datetime] = None,
+    ) -> dict[str, dict]:
+        """Return fresh entries for ``domains``; missing or stale ones are omitted."""
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        found: dict[str, dict] = {}
+        pending: list[str] = []
+        with self._lock:
+            for domain in domains:
+                key = _normalize_key(domain)
+                if not key or key in found:
+                    continue
+                entry = self._lookup(key, now_ts)
+                if entry is not None:
+                    found[key] = dict(entry)
+                else:
+                    pending.append(key)
+
+        if pending and db is not None and self.persist:
+            loaded = [self._entry(row) for row in self._read(db, pending)]
+            with self._lock:
+                for key, entry, stored_at in loaded:
+                    self._set(key, entry, stored_at)
+                    found[key] = dict(entry)
+                    self.db_hits += 1
+
+        self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    def revalidation_candidates(
+        self, db: Optional[Session], domains: Iterable[str]
+    ) -> dict[str, dict]:
+        """Expired entries of ``domains`` whose source page has validators."""
+        found: dict[str, dict] = {}
+        pending: list[str] = []
+        with self._lock:
+            for domain in domains:
+                key = _normalize_key(domain)
+                if not key or key in found:
+                    continue
+                entry = self._stale.get(key)
+                if entry is not None:
+                    found[key] = dict(entry)
+                else:
+                    pending.append(key)
+        if pending and db is not None and self.persist:
+            model = self._model()
+            for row in self._read(db, pending, model.source_url.isnot(None), fresh=False):
+                key, entry, _ = self._entry(row)
+                if has_validators(entry):
+                    found[key] = entry
+        self.revalidations += len(found)
+        return found
+
+    def put_many(self, db: Optional[Session], entries: dict[str, dict]) -> None:
+        """Store scraped contacts (``{domain: {email, telefono, http_status, ...}}``).
+
+        Entries flagged ``revalidated`` (their source page answered 304) carry
+        the previous values back and are counted as ``not_modified``.
+        """
+        if not entries:
+            return
+        now = datetime.now(timezone.utc)
+        rows: dict[str, dict] = {}
+        with self._lock:
+            for domain, data in entries.items():
+                key = _normalize_key(domain)
+                if not key:
+                    continue
+                if data.get("revalidated"):
+                    self.not_modified += 1
+                entry = {field: data.get(field) for field in CACHE_FIELDS}
+                entry["fetched_at"] = entry.get("fetched_at") or now
+                stored_at = timestamp(entry["fetched_at"])
+                self._set(key, entry, stored_at)
+                rows[key] = self._row(key, entry, stored_at)
+        if rows and db is not None and self.persist:
+            self._write(db, list(rows.values()))
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["memory_hits"] = stats.pop("hits")
+        stats.update(stale=self.stale, revalidations=self.revalidations, not_modified=self.not_modified)
+        return stats
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self._stale.clear()
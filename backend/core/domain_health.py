@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import ssl
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+import httpx
+
+from backend.core.dns_cache import NXDomainError
+
+# Failures that are not worth retrying soon: the breaker opens on the first one.
+HARD_FAILURES = {"dns"}
+# getaddrinfo EAI_NONAME messages (glibc, BSD/macOS) when only the text survives.
+_NONAME_MESSAGES = ("name or service not known", "nodename nor servname provided")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalize_key(domain: str) -> str:
+    key = (domain or "").strip().lower()
+    if key.startswith("www."):
+        key = key[4:]
+    return key
+
+
+def _chain(exc: BaseException) -> Iterable[BaseException]:
+    seen: set[int] = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def _gaierror_kind(code: Optional[int]) -> str:
+    # Only "no such name" is terminal; a temporary resolver failure
+    # (EAI_AGAIN) or any other resolver error may well succeed next time.
+    if code == socket.EAI_NONAME:
+        return "dns"
+    return "timeout"
+
+
+def classify_failure(exc: Optional[BaseException] = None, status: Optional[int] = None) -> Optional[str]:
+    """Map an exception or HTTP status to a failure kind, or None if it is not a failure."""
+    if exc is None:
+        if status in (403, 429):
+            return "blocked"
+        if status is not None and status >= 500:
+            return "server"
+        return None
+    for err in _chain(exc):
+        if isinstance(err, NXDomainError):
+            return "dns"
+        if isinstance(err, socket.gaierror):
+            return _gaierror_kind(err.errno)
+        if isinstance(err, ssl.SSLError):
+            return "tls"
+    message = str(exc).lower()
+    if any(text in message for text in _NONAME_MESSAGES):
+        return "dns"
+    if "temporary failure in name resolution" in message or "getaddrinfo" in message:
+        return "timeout"
+    if "ssl" in message or "certificate" in message:
+        return "tls"
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(exc, httpx.ConnectError):
+        return "connect"
+    return "error"
+
+
+@dataclass
+class HostHealth:
+    failures: int = 0
+    kind: Optional[str] = None
+    last_failure: float = 0.0
+    open_until: float = 0.0
+
+
+class DomainHealth:
+    """Negative cache of recent scrape failures with a per-host circuit breaker.
+
+    Every failure is remembered with its kind and time. A host that failed
+    within ``backoff`` seconds is tried after healthy ones; once it reaches
+    ``failure_threshold`` consecutive failures (or one hard failure such as
+    DNS) the breaker opens and the host is skipped until the backoff, which
+    doubles on each further failure up to ``max_backoff``, expires. The next
+    attempt after that is a trial: success closes the breaker, failure
+    re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        backoff: float = 600.0,
+        max_backoff: float = 6 * 3600.0,
+        max_entries: int = 20000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.max_entries = max(1, max_entries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self._hosts: dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.opened = 0
+
+    @classmethod
+    def from_env(cls) -> "DomainHealth":
+        return cls(
+            failure_threshold=int(_env_float("DOMAIN_HEALTH_FAILURE_THRESHOLD", 3)),
+            backoff=_env_float("DOMAIN_HEALTH_BACKOFF_SECONDS", 600.0),
+            max_backoff=_env_float("DOMAIN_HEALTH_MAX_BACKOFF_SECONDS", 6 * 3600.0),
+        )
+
+    # ------------------------------------------------------------------
+    def record_failure(self, domain: str, kind: str) -> None:
+        key = _normalize_key(domain)
+        if not key:
+            return
+        now = self.clock()
+        with self._lock:
+            health = self._hosts.setdefault(key, HostHealth())
+            health.failures += 1
+            health.kind = kind
+            health.last_failure = now
+            if kind in HARD_FAILURES:
+                health.failures = max(health.failures, self.failure_threshold)
+            if health.failures >= self.failure_threshold:
+                extra = health.failures - self.failure_threshold
+                health.open_until = now + min(self.backoff * (2 ** extra), self.max_backoff)
+                self.opened += 1
+            if len(self._hosts) > self.max_entries:
+                oldest = min(self._hosts, key=lambda k: self._hosts[k].last_failure)
+                self._hosts.pop(oldest, None)
+
+    def record_success(self, domain: str) -> None:
+        with self._lock:
+            self._hosts.pop(_normalize_key(domain), None)
+
+    def state(self, domain: str) -> str:
+        """``closed``, ``degraded`` (recent failure), ``open`` or ``half_open``."""
+        now = self.clock()
+        with self._lock:
+            health = self._hosts.get(_normalize_key(domain))
+            if health is None:
+                return "closed"
+            if health.failures >= self.failure_threshold:
+                return "open" if now < health.open_until else "half_open"
+            if now - health.last_failure < self.backoff:
+                return "degraded"
+            return "closed"
+
+    def allow(self, domain: str) -> bool:
+        if self.state(domain) == "open":
+            self.skipped += 1
+            return False
+        return True
+
+    def order(self, domains: list[str]) -> list[str]:
+        """Healthy domains first; recently failing and trial domains last (stable)."""
+        rank = {"closed": 0, "half_open": 1, "degraded": 1}
+        return sorted(domains, key=lambda d: rank.get(self.state(d), 2))
+
+    def stats(self) -> dict:
+        with self._lock:
+            hosts = list(self._hosts.values())
+        now = self.clock()
+        kinds: dict[str, int] = {}
+        for health in hosts:
+            kinds[health.kind or "error"] = kinds.get(health.kind or "error", 0) + 1
+        return {
+            "tracked": len(hosts),
+            "open": sum(
+                1 for h in hosts if h.failures >= self.failure_threshold and now < h.open_until
+            ),
+            "by_kind": kinds,
+            "skipped": self.skipped,
+            "opened": self.opened,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_SUFFIX_LIST = Path(__file__).with_name("public_suffix_list.dat")
+# Used only when the list file cannot be read.
+FALLBACK_SUFFIXES = (
+    "com.ar",
+    "com.br",
+    "com.co",
+    "com.ec",
+    "com.es",
+    "com.mx",
+    "com.pe",
+    "com.cl",
+    "com.ve",
+    "co.uk",
+)
+
+BLOCKED_PATTERNS = (
+    "facebook.com",
+    "instagram.com",
+    "twitter.com",
+    "linkedin.com",
+    "doctoralia.es",
+    "paginasamarillas.es",
+    "tripadvisor.es",
+    "habitissimo.es",
+    "youtube.com",
+    "yelp.com",
+    "maps.google.",
+)
+
+_RULE = ""  # node marker: a suffix rule ends here
+_EXCEPTION = "!"  # node marker: "!rule", the parent is the public suffix
+_CACHE_SIZE = 65536
+
+
+def _ascii(label: str) -> str:
+    try:
+        return label.encode("idna").decode("ascii")
+    except UnicodeError:
+        return label
+
+
+def compile_suffix_trie(rules: Iterable[str]) -> dict:
+    """Build a reversed-label trie from public-suffix rules (``*.`` and ``!`` included)."""
+    root: dict = {}
+    for line in rules:
+        rule = line.split("//", 1)[0].strip().lower()
+        if not rule:
+            continue
+        marker = _RULE
+        if rule.startswith("!"):
+            marker, rule = _EXCEPTION, rule[1:]
+        for form in {rule, ".".join(_ascii(label) for label in rule.split("."))}:
+            node = root
+            for label in reversed(form.split(".")):
+                node = node.setdefault(label, {})
+            node[marker] = True
+    return root
+
+
+@lru_cache(maxsize=1)
+def _trie() -> dict:
+    path = Path(os.getenv("PUBLIC_SUFFIX_LIST_PATH") or PUBLIC_SUFFIX_LIST)
+    try:
+        with path.open(encoding="utf-8") as fh:
+            return compile_suffix_trie(fh)
+    except OSError as exc:
+        logger.warning("public suffix list not available (%s); using built-in fallback", exc)
+        return compile_suffix_trie(FALLBACK_SUFFIXES)
+
+
+def _suffix_labels(labels: list[str], trie: Optional[dict] = None) -> int:
+    """Number of trailing labels forming the public suffix (at least 1)."""
+    node = trie if trie is not None else _trie()
+    matched = 1  # implicit "*" rule: an unknown TLD is a suffix on its own
+    depth = 0
+    for label in reversed(labels):
+        depth += 1
+        child = node.get(label)
+        if child is not None and _EXCEPTION in child:
+            return depth - 1
+        wildcard = node.get("*")
+        if (child is not None and _RULE in child) or (wildcard is not None and _RULE in wildcard):
+            matched = depth
+        node = child if child is not None else wildcard
+        if node is None:
+            break
+    return matched
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def normalize_domain(value: str) -> str:
+    """Host of a URL or bare domain: lowercase, without ``www.``, port or trailing dot."""
+    if not value:
+        return ""
+    v = value.strip()
+    if "://" not in v:
+        v = f"//{v}"
+    try:
+        host = urlsplit(v).hostname or ""
+    except ValueError:
+        host = v.lstrip("/").split("/", 1)[0].split(":", 1)[0].lower()
+    host = host.strip().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def public_suffix(domain: str) -> str:
+    labels = domain.lower().split(".") if domain else []
+    if not labels:
+        return ""
+    return ".".join(labels[-_suffix_labels(labels):])
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def registrable_domain(domain: str) -> str:
+    """Public suffix plus one label (``tienda.com.es``); a bare suffix is returned as is."""
+    if not domain:
+        return ""
+    labels = domain.lower().split(".")
+    size = _suffix_labels(labels) + 1
+    if len(labels) <= size:
+        return domain.lower()
+    return ".".join(labels[-size:])
+
+
+class DomainBlockList:
+    """Hashed block-list: exact domains (and their subdomains) plus host prefixes.
+
+    A pattern ending in ``.`` (``maps.google.``) blocks hosts starting with it;
+    any other pattern blocks the domain and every subdomain of it. Lookups
+    cost one set probe per label instead of a scan of every pattern.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        patterns = [p.strip().lower() for p in patterns if p and p.strip()]
+        self.domains = frozenset(p for p in patterns if not p.endswith("."))
+        self.prefixes = tuple(p for p in patterns if p.endswith("."))
+
+    def __contains__(self, domain: str) -> bool:
+        domain = (domain or "").lower()
+        if not domain:
+            return False
+        if self.prefixes and domain.startswith(self.prefixes):
+            return True
+        labels = domain.split(".")
+        return any(".".join(labels[i:]) in self.domains for i in range(len(labels)))
+
+
+BLOCKLIST = DomainBlockList(BLOCKED_PATTERNS)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def is_blocked(domain: str) -> bool:
+    return domain in BLOCKLIST
+
+
+def normalize_domains(values: Iterable[str]) -> list[str]:
+    return [normalize_domain(v) for v in values]
+
+
+def registrable_domains(domains: Iterable[str]) -> list[str]:
+    return [registrable_domain(d) for d in domains]
+
+
+def filter_domains(values: Iterable[str], dedupe: bool = False) -> list[str]:
+    """URLs to registrable, non-blocked domains (in input order)."""
+    out: list[str] = []
+    seen: set[str] = set()
+    for value in values:
+        host = normalize_domain(value)
+        if not host or is_blocked(host):
+            continue
+        domain = registrable_domain(host)
+        if not domain or is_blocked(domain):
+            continue
+        if dedupe:
+            if domain in seen:
+                continue
+            seen.add(domain)
+        out.append(domain)
+    return out
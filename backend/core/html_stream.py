@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import codecs
+import inspect
+import logging
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Mapping, Optional, Sequence, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+XML_CONTENT_TYPES = ("application/xml", "text/xml")
+DEFAULT_MAX_BYTES = 512 * 1024
+# Characters that can continue a word, URL or email across a chunk boundary.
+_TOKEN_CHARS = re.compile(r"[\w.@%+-]*")
+
+
+def is_html_content_type(value: Optional[str], allowed: Sequence[str] = HTML_CONTENT_TYPES) -> bool:
+    """True for HTML-ish bodies; a missing header is accepted (common on small sites)."""
+    if not value:
+        return True
+    return value.split(";", 1)[0].strip().lower() in allowed
+
+
+def _decoder(encoding: Optional[str]):
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _complete_prefix(text: str, limit: int) -> int:
+    """Length of ``text`` without its trailing token (at most ``limit`` characters held back)."""
+    held = _TOKEN_CHARS.match(text[: -limit - 1 : -1]).end()
+    return len(text) - held
+
+
+class ChunkScanner:
+    """Decodes a body chunk by chunk up to ``max_bytes`` for early-stop scanning.
+
+    ``feed`` returns the text a stop predicate should look at: the new chunk
+    plus ``overlap`` characters of the previous one, so matches spanning
+    chunks are seen, minus a word still open at its end (e.g.
+    ``ventas@empresa.co`` followed by ``m.mx``), which is held back until the
+    next chunk. ``finish`` flushes the decoder at the natural end of the body
+    and returns the held-back rest. Shared by the async ``read_html`` and the
+    sync reader of ``scraper.extractor``.
+    """
+
+    def __init__(self, encoding: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES, overlap: int = 256):
+        self.max_bytes = max_bytes
+        self.overlap = overlap
+        self.bytes_read = 0
+        self.truncated = False
+        self._decoder = _decoder(encoding)
+        self._parts: list[str] = []
+        self._tail = ""
+
+    def feed(self, chunk: bytes) -> str:
+        room = self.max_bytes - self.bytes_read
+        if len(chunk) >= room:
+            chunk = chunk[:room]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        text = self._decoder.decode(chunk, final=self.truncated)
+        self._parts.append(text)
+        window = self._tail + text
+        cut = len(window) if self.truncated else _complete_prefix(window, self.overlap)
+        self._tail = window[max(0, cut - self.overlap) :]
+        return window[:cut]
+
+    def finish(self) -> str:
+        self._parts.append(self._decoder.decode(b"", final=True))
+        return self._tail + self._parts[-1]
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+
+@dataclass
+class PageRead:
+    status_code: int
+    text: str = ""
+    bytes_read: int = 0
+    truncated: bool = False
+    stopped_early: bool = False
+    skipped: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+async def read_html(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    stop: Optional[Callable[[str], Union[bool, Awaitable[bool]]]] = None,
+    overlap: int = 256,
+    timeout: Optional[float] = None,
+    content_types: Sequence[str] = HTML_CONTENT_TYPES,
+    headers: Optional[Mapping[str, str]] = None,
+) -> PageRead:
+    """Stream ``url`` and return at most ``max_bytes`` of decoded HTML.
+
+    Error responses and non-HTML bodies are not read at all. When ``stop`` is
+    given it is called with each window of ``ChunkScanner`` (so it never
+    matches a token cut at a chunk boundary) and reading ends as soon as it
+    returns True; if the body ends without a stop, the held-back rest is
+    offered once more, so a callback that records its matches has seen every
+    character. ``stop`` may be a coroutine function. ``headers`` allows
+    conditional requests: a ``304 Not Modified`` comes back with an empty
+    body, and the response validators (``ETag``, ``Last-Modified``) are
+    always reported.
+    """
+    kwargs: dict = {"timeout": timeout} if timeout is not None else {}
+    if headers:
+        kwargs["headers"] = dict(headers)
+    async with client.stream("GET", url, **kwargs) as resp:
+        page = PageRead(
+            status_code=resp.status_code,
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+        )
+        if resp.status_code >= 400 or page.not_modified:
+            return page
+        if not is_html_content_type(resp.headers.get("content-type"), content_types):
+            page.skipped = True
+            return page
+
+        async def matches(text: str) -> bool:
+            found = stop(text)
+            return await found if inspect.isawaitable(found) else found
+
+        scanner = ChunkScanner(resp.charset_encoding, max_bytes, overlap)
+        async for chunk in resp.aiter_bytes():
+            window = scanner.feed(chunk)
+            if stop is not None and await matches(window):
+                page.stopped_early = True
+                break
+            if scanner.truncated:
+                break
+        else:
+            rest = scanner.finish()
+            if stop is not None and rest:
+                await matches(rest)
+        page.text = scanner.text
+        page.bytes_read = scanner.bytes_read
+        page.truncated = scanner.truncated
+    return page
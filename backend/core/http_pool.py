@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import httpcore
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# httpcore errors and the httpx errors they surface as (same names in both).
+_ERROR_NAMES = (
+    "TimeoutException", "ConnectTimeout", "ReadTimeout", "WriteTimeout", "PoolTimeout",
+    "NetworkError", "ConnectError", "ReadError", "WriteError", "ProxyError",
+    "UnsupportedProtocol", "ProtocolError", "LocalProtocolError", "RemoteProtocolError",
+)
+_ERRORS = {getattr(httpcore, name): getattr(httpx, name) for name in _ERROR_NAMES}
+
+
+@contextlib.contextmanager
+def _httpx_errors() -> Iterator[None]:
+    try:
+        yield
+    except Exception as exc:
+        mapped = next((_ERRORS[cls] for cls in type(exc).__mro__ if cls in _ERRORS), None)
+        if mapped is None:
+            raise
+        raise mapped(str(exc)) from exc
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class NetworkBackendTransport(httpx.AsyncBaseTransport):
+    """httpx transport over an ``httpcore.AsyncConnectionPool`` built here.
+
+    ``httpx.AsyncHTTPTransport`` takes no network backend, so this owns the
+    httpcore pool (public httpcore 1.x API only) and does the same request,
+    response and error mapping.
+    """
+
+    def __init__(
+        self,
+        limits: httpx.Limits,
+        network_backend: httpcore.AsyncNetworkBackend,
+        http2: bool = False,
+    ):
+        self.pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=network_backend,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+@dataclass
+class PoolConfig:
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 10.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls, prefix: str, **defaults: Any) -> "PoolConfig":
+        """Read ``<prefix>_MAX_CONNECTIONS``, ``<prefix>_MAX_KEEPALIVE``, ... over ``defaults``."""
+        base = cls(**defaults)
+        return cls(
+            max_connections=max(1, _env_int(f"{prefix}_MAX_CONNECTIONS", base.max_connections)),
+            max_keepalive_connections=max(
+                0, _env_int(f"{prefix}_MAX_KEEPALIVE", base.max_keepalive_connections)
+            ),
+            keepalive_expiry=_env_float(f"{prefix}_KEEPALIVE_EXPIRY", base.keepalive_expiry),
+            timeout=_env_float(f"{prefix}_TIMEOUT", base.timeout),
+            http2=os.getenv(f"{prefix}_HTTP2", str(base.http2)).lower() == "true",
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class HttpPool:
+    """One shared ``httpx.AsyncClient`` kept open for the application lifetime.
+
+    The client belongs to the event loop that started it, so ``client()``
+    only hands it out to coroutines running on that loop; anything else
+    (a worker process, an ``asyncio.run`` fallback) gets ``None`` and opens
+    a short-lived client of its own. ``network_backend`` replaces httpcore's
+    socket layer (e.g. ``CachedDnsBackend`` to reuse pre-resolved addresses).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: PoolConfig,
+        network_backend: Optional[httpcore.AsyncNetworkBackend] = None,
+        **client_kwargs: Any,
+    ):
+        self.name = name
+        self.config = config
+        self.network_backend = network_backend
+        self.client_kwargs = client_kwargs
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.errors = 0
+        self.borrowed = 0
+        self.fallbacks = 0
+
+    @property
+    def http2(self) -> bool:
+        return self.config.http2 and _http2_available()
+
+    def build_client(self, **overrides: Any) -> httpx.AsyncClient:
+        if self.config.http2 and not _http2_available():
+            logger.warning("http pool %s: HTTP/2 requested but h2 is not installed", self.name)
+        kwargs = {
+            "limits": self.config.limits(),
+            "timeout": self.config.timeout,
+            "http2": self.http2,
+            **self.client_kwargs,
+            **overrides,
+        }
+        if self.network_backend is not None and "transport" not in kwargs:
+            kwargs["transport"] = NetworkBackendTransport(
+                kwargs["limits"], self.network_backend, http2=kwargs["http2"]
+            )
+        return httpx.AsyncClient(**kwargs)
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+
+        async def _on_response(response: httpx.Response) -> None:
+            self.requests += 1
+            if response.status_code >= 500:
+                self.errors += 1
+
+        self._client = self.build_client(event_hooks={"response": [_on_response]})
+        self._loop = asyncio.get_running_loop()
+        logger.info("http pool %s started %s", self.name, asdict(self.config))
+
+    async def close(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+    def client(self) -> Optional[httpx.AsyncClient]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._client is None or loop is not self._loop:
+            self.fallbacks += 1
+            return None
+        self.borrowed += 1
+        return self._client
+
+    def _connections(self) -> tuple[Optional[int], Optional[int]]:
+        # httpx does not expose pool occupancy; read it from httpcore if present.
+        transport = getattr(self._client, "_transport", None)
+        pool = getattr(transport, "pool", None) or getattr(transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return None, None
+        idle = sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)())
+        return len(connections), idle
+
+    def stats(self) -> dict:
+        open_connections, idle_connections = self._connections()
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.config.max_connections,
+            "max_keepalive_connections": self.config.max_keepalive_connections,
+            "open_connections": open_connections,
+            "idle_connections": idle_connections,
+            "requests": self.requests,
+            "server_errors": self.errors,
+            "borrowed": self.borrowed,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class HttpPools:
+    """Separate pools for search APIs and for scraping arbitrary sites."""
+
+    def __init__(self, search: HttpPool, scrape: HttpPool):
+        self.search = search
+        self.scrape = scrape
+
+    @classmethod
+    def from_env(cls, scrape_backend: Optional[httpcore.AsyncNetworkBackend] = None) -> "HttpPools":
+        return cls(
+            search=HttpPool(
+                "search",
+                PoolConfig.from_env(
+                    "SEARCH_HTTP", max_connections=20, max_keepalive_connections=10, timeout=10.0
+                ),
+            ),
+            scrape=HttpPool(
+                "scrape",
+                PoolConfig.from_env(
+                    "SCRAPE_HTTP", max_connections=100, max_keepalive_connections=40, timeout=10.0
+                ),
+                network_backend=scrape_backend,
+                follow_redirects=True,
+            ),
+        )
+
+    async def start(self) -> None:
+        await self.search.start()
+        await self.scrape.start()
+
+    async def close(self) -> None:
+        await self.search.close()
+        await self.scrape.close()
+
+    def stats(self) -> dict:
+        return {"search": self.search.stats(), "scrape": self.scrape.stats()}
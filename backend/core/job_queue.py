@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend.models import ExtractionJob
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Durable extraction queue backed by the ``extraction_jobs`` table.
+
+    Workers claim one job at a time with ``FOR UPDATE SKIP LOCKED``, highest
+    plan priority first and oldest first within a priority, so several
+    workers can poll the same table without handing out a job twice.
+    """
+
+    def __init__(self, db: Session, max_attempts: int = 3):
+        self.db = db
+        self.max_attempts = max(1, max_attempts)
+
+    def enqueue(
+        self,
+        *,
+        user_id: int,
+        user_email_lower: str,
+        plan_name: str,
+        priority: int,
+        payload: dict[str, Any],
+    ) -> ExtractionJob:
+        job = ExtractionJob(
+            user_id=user_id,
+            user_email_lower=user_email_lower,
+            plan=plan_name,
+            priority=priority,
+            status=QUEUED,
+            payload=payload,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def claim(self, worker_id: str) -> Optional[ExtractionJob]:
+        stmt = (
+            select(ExtractionJob)
+            .where(ExtractionJob.status == QUEUED)
+            .order_by(
+                ExtractionJob.priority.desc(),
+                ExtractionJob.created_at,
+                ExtractionJob.id,
+            )
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = self.db.execute(stmt).scalars().first()
+        if job is None:
+            self.db.commit()
+            return None
+        job.status = RUNNING
+        job.worker_id = worker_id
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = datetime.now(timezone.utc)
+        self.db.commit()
+        return job
+
+    def complete(self, job: ExtractionJob, result: dict[str, Any]) -> None:
+        self._finish(job, DONE, result=result)
+
+    def fail(self, job: ExtractionJob, error: dict[str, Any]) -> None:
+        self._finish(job, FAILED, error=error)
+
+    def _finish(self, job: ExtractionJob, status: str, **fields: Any) -> None:
+        job_id = job.id
+        try:
+            self.db.rollback()
+        except Exception:
+            pass
+        self.db.execute(
+            update(ExtractionJob)
+            .where(ExtractionJob.id == job_id)
+            .values(status=status, finished_at=datetime.now(timezone.utc), **fields)
+        )
+        self.db.commit()
+
+    def requeue_stale(self, older_than: timedelta) -> int:
+        """Return running jobs whose worker vanished to the queue (or fail them)."""
+        cutoff = datetime.now(timezone.utc) - older_than
+        stale = and_(ExtractionJob.status == RUNNING, ExtractionJob.started_at < cutoff)
+        failed = self.db.execute(
+            update(ExtractionJob)
+            .where(stale, ExtractionJob.attempts >= self.max_attempts)
+            .values(
+                status=FAILED,
+                finished_at=datetime.now(timezone.utc),
+                error={"status_code": 500, "detail": "worker_lost"},
+            )
+        ).rowcount
+        requeued = self.db.execute(
+            update(ExtractionJob)
+            .where(stale)
+            .values(status=QUEUED, worker_id=None, started_at=None)
+        ).rowcount
+        self.db.commit()
+        if failed or requeued:
+            logger.warning("extraction_jobs stale: requeued=%s failed=%s", requeued, failed)
+        return requeued
+
+    def get(self, job_id: int, user_email_lower: str) -> Optional[ExtractionJob]:
+        return (
+            self.db.query(ExtractionJob)
+            .filter(
+                ExtractionJob.id == job_id,
+                ExtractionJob.user_email_lower == user_email_lower,
+            )
+            .first()
+        )
+
+    def position(self, job: ExtractionJob) -> Optional[int]:
+        """Number of queued jobs that will be claimed before ``job``."""
+        if job.status != QUEUED:
+            return None
+        ahead = self.db.execute(
+            select(func.count())
+            .select_from(ExtractionJob)
+            .where(
+                ExtractionJob.status == QUEUED,
+                or_(
+                    ExtractionJob.priority > job.priority,
+                    and_(
+                        ExtractionJob.priority == job.priority,
+                        or_(
+                            ExtractionJob.created_at < job.created_at,
+                            and_(
+                                ExtractionJob.created_at == job.created_at,
+                                ExtractionJob.id < job.id,
+                            ),
+                        ),
+                    ),
+                ),
+            )
+        ).scalar()
+        return int(ahead or 0)
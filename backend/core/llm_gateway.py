@@ -0,0 +1,480 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Protocol
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+class LLMGatewayError(Exception):
+    """Base error raised by the gateway itself (not by the provider)."""
+
+
+class LLMBusyError(LLMGatewayError):
+    """No concurrency slot or rate-limit token became free within ``queue_timeout``."""
+
+
+@dataclass
+class LLMResult:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: int = 0
+    coalesced: bool = False
+    response: Any = None  # raw provider response (tool calls, finish reason...)
+
+
+class LLMBackend(Protocol):
+    available: bool
+
+    def complete(self, model: str, messages: list[dict], **params: Any) -> LLMResult: ...
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def openai_client_from_env(api_key: Optional[str] = None):
+    """``OpenAI`` client with the shared ``LLM_TIMEOUT_SECONDS`` / ``LLM_MAX_RETRIES`` policy."""
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        timeout=_env_float("LLM_TIMEOUT_SECONDS", 30.0),
+        max_retries=int(_env_float("LLM_MAX_RETRIES", 2)),
+    )
+
+
+class OpenAIBackend:
+    """One pooled OpenAI client shared by every caller, created on first use."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key or os.getenv("OPENAI_API_KEY"))
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = openai_client_from_env(self.api_key)
+            return self._client
+
+    def complete(self, model: str, messages: list[dict], **params: Any) -> LLMResult:
+        response = self._get_client().chat.completions.create(model=model, messages=messages, **params)
+        usage = getattr(response, "usage", None)
+        return LLMResult(
+            text=response.choices[0].message.content or "",
+            model=model,
+            prompt_tokens=int(getattr(usage, "prompt_tokens", 0) or 0),
+            completion_tokens=int(getattr(usage, "completion_tokens", 0) or 0),
+            response=response,
+        )
+
+
+class FakeLLMBackend:
+    """Local backend for tests and offline runs.
+
+    ``reply`` is a fixed string or a callable receiving the messages. Token
+    counts are approximated by words. Every call is kept in ``calls``.
+    """
+
+    available = True
+
+    def __init__(self, reply: Any = "", delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls: list[dict] = []
+        self._lock = threading.Lock()
+
+    def complete(self, model: str, messages: list[dict], **params: Any) -> LLMResult:
+        with self._lock:
+            self.calls.append({"model": model, "messages": messages, **params})
+        if self.delay:
+            time.sleep(self.delay)
+        text = self.reply(messages) if callable(self.reply) else str(self.reply)
+        prompt = " ".join(str(m.get("content") or "") for m in messages)
+        return LLMResult(
+            text=text,
+            model=model,
+            prompt_tokens=len(prompt.split()),
+            completion_tokens=len(text.split()),
+        )
+
+
+@dataclass
+class ModelLimits:
+    concurrency: int = 8
+    requests_per_minute: float = 0.0  # 0 = no rate limit
+
+
+def parse_model_limits(value: str) -> dict[str, ModelLimits]:
+    """``"gpt-4o-mini=4:60,gpt-3.5-turbo=8"`` -> per-model concurrency[:requests per minute]."""
+    limits: dict[str, ModelLimits] = {}
+    for item in (value or "").split(","):
+        model, _, spec = item.strip().partition("=")
+        if not model or not spec:
+            continue
+        concurrency, _, rpm = spec.partition(":")
+        try:
+            limits[model.strip()] = ModelLimits(int(concurrency), float(rpm or 0))
+        except ValueError:
+            logger.warning("invalid LLM model limit %r", item)
+    return limits
+
+
+class _ModelGate:
+    """Concurrency slots plus a token bucket refilled at ``requests_per_minute``."""
+
+    def __init__(self, limits: ModelLimits, clock: Callable[[], float]):
+        self.limits = limits
+        self.clock = clock
+        self.slots = threading.BoundedSemaphore(max(1, limits.concurrency))
+        self.rate = limits.requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * 60.0 / 10)  # burst: up to 6 s worth of requests
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.waiting = 0
+
+    def _take_token(self) -> float:
+        """Consume a token if possible; otherwise return seconds until the next one."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        self.waiting += 1
+        try:
+            if not self.slots.acquire(timeout=max(0.0, timeout)):
+                return False
+            while True:
+                wait = self._take_token()
+                if not wait:
+                    break
+                if time.monotonic() + wait > deadline:
+                    self.slots.release()
+                    return False
+                time.sleep(wait)
+        finally:
+            self.waiting -= 1
+        self.inflight += 1
+        return True
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self.slots.release()
+
+
+def usage_sessions_from_env() -> Optional[Callable[[], Session]]:
+    """``SessionLocal`` when ``DATABASE_URL`` is set, so any process can flush usage on its own."""
+    if not os.getenv("DATABASE_URL"):
+        return None
+    try:
+        from backend.database import SessionLocal
+    except Exception as exc:
+        logger.warning("llm_usage flush disabled: %s", exc)
+        return None
+    return SessionLocal
+
+
+class LLMUsageMeter:
+    """Per-tenant, per-day, per-model counters, flushed into ``llm_usage``.
+
+    Counters accumulate in memory and ``flush`` adds them to the table (one
+    upsert per flush). A failed write puts them back for the next flush.
+    With ``session_factory`` the meter also flushes by itself every
+    ``flush_seconds`` (or sooner once ``max_pending`` rows are waiting), so
+    callers without a request session are metered too. Never more than
+    ``max_pending`` rows are kept: the oldest days are dropped first.
+    """
+
+    FIELDS = ("requests", "errors", "coalesced", "prompt_tokens", "completion_tokens", "latency_ms")
+
+    def __init__(
+        self,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        session_factory: Optional[Callable[[], Session]] = None,
+        flush_seconds: float = 60.0,
+        max_pending: int = 10000,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        self.max_pending = max(1, max_pending)
+        self.monotonic = monotonic
+        self._pending: dict[tuple[str, str, str], dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = monotonic()
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, tenant: Optional[str], model: str, **counts: int) -> None:
+        key = ((tenant or "").strip().lower(), self.clock().strftime("%Y%m%d"), model)
+        with self._lock:
+            row = self._pending.setdefault(key, dict.fromkeys(self.FIELDS, 0))
+            for field, value in counts.items():
+                row[field] += int(value or 0)
+            due = self.session_factory is not None and (
+                self.monotonic() - self._last_flush >= self.flush_seconds
+                or len(self._pending) >= self.max_pending
+            )
+            if due:
+                self._last_flush = self.monotonic()
+            self._trim()
+        if due:
+            self.flush_pending()
+
+    def _trim(self) -> None:
+        excess = len(self._pending) - self.max_pending
+        if excess <= 0:
+            return
+        for key in sorted(self._pending, key=lambda k: k[1])[:excess]:
+            del self._pending[key]
+        self.dropped += excess
+        logger.warning("llm_usage: %d pending rows dropped (max %d)", excess, self.max_pending)
+
+    def flush_pending(self) -> None:
+        """Flush through a session of ``session_factory`` (no-op without one)."""
+        if self.session_factory is None:
+            return
+        try:
+            db = self.session_factory()
+        except Exception as exc:
+            logger.warning("llm_usage flush failed: %s", exc)
+            return
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+    def pending(self) -> dict[tuple[str, str, str], dict[str, int]]:
+        with self._lock:
+            return {key: dict(row) for key, row in self._pending.items()}
+
+    def _merge(self, rows: dict[tuple[str, str, str], dict[str, int]]) -> None:
+        with self._lock:
+            for key, counts in rows.items():
+                row = self._pending.setdefault(key, dict.fromkeys(self.FIELDS, 0))
+                for field, value in counts.items():
+                    row[field] += value
+            self._trim()
+
+    def flush(self, db: Optional[Session]) -> None:
+        if db is None:
+            return
+        from backend.models import LLMUsage
+
+        with self._lock:
+            rows, self._pending = self._pending, {}
+        if not rows:
+            return
+        tbl = LLMUsage.__table__
+        now = datetime.now(timezone.utc)
+        values = [
+            {"user_email_lower": tenant, "period_yyyymmdd": day, "model": model, "updated_at": now, **counts}
+            for (tenant, day, model), counts in rows.items()
+        ]
+        stmt = pg_insert(tbl).values(values)
+        stmt = stmt.on_conflict_do_update(
+            constraint="llm_usage_user_period_model_uk",
+            set_={
+                **{field: tbl.c[field] + stmt.excluded[field] for field in self.FIELDS},
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        try:
+            db.execute(stmt)
+            db.commit()
+            self.flushed += len(values)
+        except Exception as exc:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+            self._merge(rows)
+            logger.warning("llm_usage write failed: %s", exc)
+
+
+def _flight_key(model: str, messages: list[dict], params: dict) -> str:
+    return json.dumps([model, messages, params], sort_keys=True, default=str, ensure_ascii=False)
+
+
+class LLMGateway:
+    """Single entry point for LLM calls.
+
+    Identical concurrent requests (same model, messages and parameters) are
+    coalesced into one provider call. Each model has its own concurrency and
+    requests-per-minute limits; callers that cannot get a slot within
+    ``queue_timeout`` get ``LLMBusyError`` instead of piling up. Tokens,
+    latency and errors are metered per tenant.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        limits: Optional[dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        queue_timeout: float = 30.0,
+        meter: Optional[LLMUsageMeter] = None,
+    ):
+        self.backend = backend
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ModelLimits()
+        self.queue_timeout = queue_timeout
+        self.meter = meter or LLMUsageMeter()
+        self._gates: dict[str, _ModelGate] = {}
+        self._flights: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMGateway":
+        """Gateway configured from ``LLM_*``; its usage is flushed periodically and at exit."""
+        gateway = cls(
+            OpenAIBackend(),
+            limits=parse_model_limits(os.getenv("LLM_MODEL_LIMITS", "")),
+            default_limits=ModelLimits(
+                concurrency=int(_env_float("LLM_MAX_CONCURRENCY", 8)),
+                requests_per_minute=_env_float("LLM_REQUESTS_PER_MINUTE", 0),
+            ),
+            queue_timeout=_env_float("LLM_QUEUE_TIMEOUT_SECONDS", 30.0),
+            meter=LLMUsageMeter(
+                session_factory=usage_sessions_from_env(),
+                flush_seconds=_env_float("LLM_USAGE_FLUSH_SECONDS", 60.0),
+                max_pending=int(_env_float("LLM_USAGE_MAX_PENDING", 10000)),
+            ),
+        )
+        atexit.register(gateway.meter.flush_pending)
+        return gateway
+
+    @property
+    def available(self) -> bool:
+        return bool(getattr(self.backend, "available", True))
+
+    def _gate(self, model: str) -> _ModelGate:
+        with self._lock:
+            gate = self._gates.get(model)
+            if gate is None:
+                gate = _ModelGate(self.limits.get(model, self.default_limits), time.monotonic)
+                self._gates[model] = gate
+            return gate
+
+    # ------------------------------------------------------------------
+    def complete(
+        self,
+        messages: list[dict],
+        model: str = DEFAULT_MODEL,
+        tenant: Optional[str] = None,
+        **params: Any,
+    ) -> LLMResult:
+        key = _flight_key(model, messages, params)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+        if not leader:
+            self.coalesced += 1
+            self.meter.record(tenant, model, requests=1, coalesced=1)
+            return replace(flight.result(), coalesced=True)
+        try:
+            result = self._call(model, messages, params, tenant)
+        except BaseException as exc:
+            flight.set_exception(exc)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _call(self, model: str, messages: list[dict], params: dict, tenant: Optional[str]) -> LLMResult:
+        gate = self._gate(model)
+        if not gate.acquire(self.queue_timeout):
+            self.rejected += 1
+            self.meter.record(tenant, model, requests=1, errors=1)
+            raise LLMBusyError(f"{model}: no capacity within {self.queue_timeout:.0f}s")
+        started = time.monotonic()
+        try:
+            self.calls += 1
+            result = self.backend.complete(model, messages, **params)
+        except Exception:
+            self.errors += 1
+            latency = int((time.monotonic() - started) * 1000)
+            self.meter.record(tenant, model, requests=1, errors=1, latency_ms=latency)
+            raise
+        finally:
+            gate.release()
+        result.latency_ms = int((time.monotonic() - started) * 1000)
+        self.meter.record(
+            tenant,
+            model,
+            requests=1,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+            latency_ms=result.latency_ms,
+        )
+        return result
+
+    def flush_usage(self, db: Optional[Session]) -> None:
+        self.meter.flush(db)
+
+    def stats(self) -> dict:
+        with self._lock:
+            gates = dict(self._gates)
+            flights = len(self._flights)
+        return {
+            "available": self.available,
+            "calls": self.calls,
+            "errors": self.errors,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "inflight_prompts": flights,
+            "models": {
+                model: {
+                    "concurrency": gate.limits.concurrency,
+                    "requests_per_minute": gate.limits.requests_per_minute,
+                    "inflight": gate.inflight,
+                    "waiting": gate.waiting,
+                }
+                for model, gate in gates.items()
+            },
+            "usage_pending": len(self.meter.pending()),
+            "usage_flushed": self.meter.flushed,
+            "usage_dropped": self.meter.dropped,
+        }
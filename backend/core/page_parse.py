@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.[a-zA-Z]{2,}")
+ASSET_EMAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+
+
+def first_valid_email(html: str) -> Optional[str]:
+    for match in EMAIL_RE.finditer(html or ""):
+        candidate = match.group(0).strip(".")
+        if candidate.lower().endswith(ASSET_EMAIL_SUFFIXES):
+            continue
+        return candidate
+    return None
+
+
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s\-()]*)?(?:\d[\d\s\-()]{7,}\d)")
+# Matches of PHONE_RE that are never phones: dates (2024-01-31, 31-01-2024).
+_DATE_RE = re.compile(r"^\s*(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}-\d{1,2}-\d{4})\s*$")
+_NON_DIGIT_RE = re.compile(r"\D")
+DEFAULT_PHONE_REGION = "ES"
+
+
+def discard_phone(raw: str) -> bool:
+    """Cheap filter run before ``phonenumbers``: True if ``raw`` cannot be a phone."""
+    digits = _NON_DIGIT_RE.sub("", raw)
+    if not 7 <= len(digits) <= 15:  # E.164 allows at most 15 digits
+        return True
+    if len(set(digits)) == 1:
+        return True
+    return bool(_DATE_RE.match(raw))
+
+
+@lru_cache(maxsize=20000)
+def parse_phone(raw: str, region: str) -> Optional[str]:
+    """International format of ``raw`` if it is a valid number, memoized across pages."""
+    import phonenumbers
+
+    try:
+        parsed = phonenumbers.parse(raw, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if phonenumbers.is_possible_number(parsed) and phonenumbers.is_valid_number(parsed):
+        return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+    return None
+
+
+def valid_phone(raw: str, region: str = DEFAULT_PHONE_REGION) -> Optional[str]:
+    raw = " ".join(raw.split())
+    if discard_phone(raw):
+        return None
+    return parse_phone(raw, region)
+
+
+def first_valid_phone(html: str, region: str = DEFAULT_PHONE_REGION) -> Optional[str]:
+    for match in PHONE_RE.finditer(html or ""):
+        phone = valid_phone(match.group(0), region)
+        if phone:
+            return phone
+    return None
+
+
+def first_contact(html: str, region: str = DEFAULT_PHONE_REGION) -> tuple[Optional[str], Optional[str]]:
+    """``(email, phone)``: the first valid ones in ``html``, each possibly None."""
+    return first_valid_email(html), first_valid_phone(html, region)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ParsePool:
+    """Process pool for CPU-bound page parsing, shared by all scrapes.
+
+    Inputs smaller than ``threshold`` characters are parsed inline: for them
+    pickling and the round trip cost more than the regex itself. Larger ones
+    go to ``workers`` processes so big pages do not stall the event loop and
+    parsing overlaps network I/O across cores. With ``workers=0`` everything
+    runs inline. ``fn`` must be a module-level function of a light module
+    (workers are spawned and import it fresh). ``run`` serves async callers;
+    ``map`` and ``call`` block and serve sync ones (``scraper.extractor``).
+    """
+
+    def __init__(self, workers: int = 0, threshold: int = 64 * 1024):
+        self.workers = max(0, workers)
+        self.threshold = max(0, threshold)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.inline = 0
+        self.offloaded = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_env(cls) -> "ParsePool":
+        default_workers = max(0, min(4, (os.cpu_count() or 1) - 1))
+        return cls(
+            workers=_env_int("PARSE_POOL_WORKERS", default_workers),
+            threshold=_env_int("PARSE_POOL_THRESHOLD_BYTES", 64 * 1024),
+        )
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info("parse pool started workers=%d threshold=%d", self.workers, self.threshold)
+            return self._executor
+
+    def _recover(self, fn: Callable[..., Any], args: Sequence[Any]) -> Any:
+        # A worker died (OOM, kill): parse this page inline and start afresh next time.
+        logger.warning("parse pool broken; falling back to inline parsing")
+        self.shutdown(wait=False)
+        self.fallbacks += 1
+        return fn(*args)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, size: int) -> Any:
+        if not self.workers or size < self.threshold:
+            self.inline += 1
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._pool(), fn, *args)
+        except BrokenProcessPool:
+            return self._recover(fn, args)
+        self.offloaded += 1
+        return result
+
+    def map(self, fn: Callable[..., Any], calls: Sequence[Sequence[Any]], sizes: Sequence[int]) -> list:
+        """``[fn(*args) for args in calls]``; big inputs go to the workers while small ones run here."""
+        futures: dict[int, Any] = {}
+        if self.workers:
+            try:
+                pool = self._pool()
+                for n, (args, size) in enumerate(zip(calls, sizes)):
+                    if size >= self.threshold:
+                        futures[n] = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                self.shutdown(wait=False)
+                futures = {}
+        results: list = []
+        for n, args in enumerate(calls):
+            if n not in futures:
+                self.inline += 1
+                results.append(fn(*args))
+            else:
+                results.append(None)
+        for n, future in futures.items():
+            try:
+                results[n] = future.result()
+                self.offloaded += 1
+            except BrokenProcessPool:
+                results[n] = self._recover(fn, calls[n])
+        return results
+
+    def call(self, fn: Callable[..., Any], *args: Any, size: int) -> Any:
+        return self.map(fn, [args], [size])[0]
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "threshold_bytes": self.threshold,
+            "started": self._executor is not None,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "fallbacks": self.fallbacks,
+        }
+
+
+_shared: Optional[ParsePool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool() -> ParsePool:
+    """The process-wide pool (``PARSE_POOL_*``), created on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ParsePool.from_env()
+        return _shared
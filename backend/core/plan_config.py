@@ -17,6 +17,18 @@ class PlanConfig:
     # paid plans
     lead_credits_month: Optional[int] = None
     csv_unlimited: bool = False
+    # scraping: candidate pages per domain and how many are fetched at once
+    scrape_contact_paths: Tuple[str, ...] = ("/contacto", "/contact")
+    scrape_parallel_fetches: int = 1
+
+
+FULL_CONTACT_PATHS: Tuple[str, ...] = (
+    "/contacto",
+    "/contact",
+    "/aviso-legal",
+    "/legal",
+    "/politica-privacidad",
+)
 
 
 PLANES: Dict[str, PlanConfig] = {
@@ -37,6 +49,8 @@ PLANES: Dict[str, PlanConfig] = {
         tasks_active_max=20,
         ai_daily_limit=20,
         queue_priority=1,
+        scrape_contact_paths=("/contacto", "/contact", "/aviso-legal"),
+        scrape_parallel_fetches=2,
     ),
     "pro": PlanConfig(
         type="paid",
@@ -45,6 +59,8 @@ PLANES: Dict[str, PlanConfig] = {
         tasks_active_max=100,
         ai_daily_limit=100,
         queue_priority=2,
+        scrape_contact_paths=FULL_CONTACT_PATHS,
+        scrape_parallel_fetches=3,
     ),
     "business": PlanConfig(
         type="paid",
@@ -53,6 +69,8 @@ PLANES: Dict[str, PlanConfig] = {
         tasks_active_max=500,
         ai_daily_limit=500,
         queue_priority=3,
+        scrape_contact_paths=FULL_CONTACT_PATHS,
+        scrape_parallel_fetches=4,
     ),
 }
 
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class ScrapeLimits:
+    max_concurrency: int = 10
+    per_host_concurrency: int = 3
+    domain_timeout: float = 20.0
+    total_timeout: float = 45.0
+
+    @classmethod
+    def from_env(cls) -> "ScrapeLimits":
+        return cls(
+            max_concurrency=max(1, _env_int("SCRAPE_MAX_CONCURRENCY", cls.max_concurrency)),
+            per_host_concurrency=max(
+                1, _env_int("SCRAPE_PER_HOST_CONCURRENCY", cls.per_host_concurrency)
+            ),
+            domain_timeout=_env_float("SCRAPE_DOMAIN_TIMEOUT", cls.domain_timeout),
+            total_timeout=_env_float("SCRAPE_TOTAL_TIMEOUT", cls.total_timeout),
+        )
+
+
+@dataclass
+class ScrapeStats:
+    requested: int = 0
+    cached: int = 0
+    finished: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    skipped: int = 0
+    elapsed_ms: int = 0
+
+    def record(self, status: str) -> None:
+        if status == "cached":
+            self.cached += 1
+        elif status == "ok":
+            self.finished += 1
+        elif status == "error":
+            self.failed += 1
+        elif status == "timeout":
+            self.timed_out += 1
+        else:
+            self.skipped += 1
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class DomainOutcome:
+    domain: str
+    index: int = 0
+    status: str = "skipped"  # ok | error | timeout | skipped
+    value: Any = None
+    error: Optional[BaseException] = field(default=None, repr=False)
+
+
+class HostLimiter:
+    """Cap the number of simultaneous requests sent to the same host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    def slot(self, host: str) -> asyncio.Semaphore:
+        key = (host or "").lower()
+        sem = self._slots.get(key)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._slots[key] = sem
+        return sem
+
+
+class ScrapeEngine:
+    """Run one worker per domain under global, per-host and time limits.
+
+    Domains that have not started when the overall deadline expires are
+    reported as ``skipped``; domains cut by either deadline as ``timeout``.
+    ``stream`` yields outcomes as they complete; ``run`` returns them all in
+    input order so callers get partial results instead of an error.
+    """
+
+    def __init__(self, limits: ScrapeLimits | None = None):
+        self.limits = limits or ScrapeLimits.from_env()
+        self.hosts = HostLimiter(self.limits.per_host_concurrency)
+
+    async def stream(
+        self,
+        domains: list[str],
+        worker: Callable[[str], Awaitable[Any]],
+    ) -> AsyncIterator[DomainOutcome]:
+        deadline = time.monotonic() + self.limits.total_timeout
+        gate = asyncio.Semaphore(self.limits.max_concurrency)
+
+        async def _one(outcome: DomainOutcome) -> None:
+            async with gate:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                outcome.status = "running"
+                try:
+                    outcome.value = await asyncio.wait_for(
+                        worker(outcome.domain),
+                        timeout=min(self.limits.domain_timeout, remaining),
+                    )
+                    outcome.status = "ok"
+                except asyncio.TimeoutError:
+                    outcome.status = "timeout"
+                except Exception as exc:
+                    outcome.status = "error"
+                    outcome.error = exc
+
+        tasks = {
+            asyncio.create_task(_one(outcome)): outcome
+            for outcome in (DomainOutcome(domain=d, index=i) for i, d in enumerate(domains))
+        }
+        pending = set(tasks)
+        leftovers: list[DomainOutcome] = []
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=lambda t: tasks[t].index):
+                    yield tasks[task]
+            leftovers = sorted((tasks[t] for t in pending), key=lambda o: o.index)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for outcome in leftovers:
+            if outcome.status == "running":
+                outcome.status = "timeout"
+            yield outcome
+
+    async def run(
+        self,
+        domains: list[str],
+        worker: Callable[[str], Awaitable[Any]],
+    ) -> tuple[list[DomainOutcome], ScrapeStats]:
+        started = time.monotonic()
+        stats = ScrapeStats(requested=len(domains))
+        outcomes: list[DomainOutcome] = []
+        async for outcome in self.stream(domains, worker):
+            stats.record(outcome.status)
+            outcomes.append(outcome)
+        outcomes.sort(key=lambda o: o.index)
+        stats.elapsed_ms = int((time.monotonic() - started) * 1000)
+        logger.info("scrape_engine_run %s", stats.as_dict())
+        return outcomes, stats
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.core.ttl_cache import PersistentTTLCache, datetime_utc, timestamp
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def cache_key(query: str, count: int, page: int = 0) -> str:
+    return f"{normalize_query(query)}|{int(count)}|{int(page)}"
+
+
+class SearchResultCache(PersistentTTLCache):
+    """TTL + LRU cache of Brave result URLs keyed by normalized query and count.
+
+    Memory is the primary store. When ``persist`` is on, ``warm`` preloads
+    entries from ``search_query_cache`` before a search and ``flush`` writes
+    the entries fetched since the last flush. Prefetched results are put
+    with the shorter prefetch TTL and only get the full one (and are
+    persisted) once a confirmed search reads them.
+    """
+
+    ENV_PREFIX = "SEARCH_CACHE"
+    DEFAULT_TTL_HOURS = 6.0
+    DEFAULT_MAX_ENTRIES = 2000
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 6 * 3600, persist: bool = False):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds, persist=persist)
+
+    @staticmethod
+    def _model():
+        from backend.models import SearchQueryCache
+
+        return SearchQueryCache
+
+    def _row(self, key: str, urls: list[str], stored_at: float) -> dict:
+        query, count, page = key.rsplit("|", 2)
+        return {
+            "cache_key": key,
+            "query": query,
+            "count": int(count),
+            "page": int(page),
+            "urls": urls,
+            "fetched_at": datetime_utc(stored_at),
+        }
+
+    def _entry(self, row) -> tuple[str, list[str], float]:
+        return row.cache_key, list(row.urls or []), timestamp(row.fetched_at)
+
+    # ------------------------------------------------------------------
+    def get(self, query: str, count: int, page: int = 0, confirm: bool = True) -> Optional[list[str]]:
+        key = cache_key(query, count, page)
+        urls = self._get(key)
+        if urls is None:
+            return None
+        if confirm:
+            self._confirm(key)
+        return list(urls)
+
+    def put(
+        self, query: str, count: int, page: int, urls: list[str], ttl_seconds: Optional[float] = None
+    ) -> None:
+        self._put(cache_key(query, count, page), list(urls), ttl_seconds=ttl_seconds)
+
+    def warm(self, db: Optional[Session], queries: Iterable[str], count: int, pages: int = 1) -> None:
+        """Load persisted entries for ``queries`` that are not in memory yet."""
+        self._warm(
+            db,
+            [
+                cache_key(q, count, page)
+                for q in queries
+                if normalize_query(q)
+                for page in range(max(1, pages))
+            ],
+        )
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Iterable, Optional
+
+from backend.core.search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPrefetcher:
+    """Speculative Brave searches for variants the user has not confirmed yet.
+
+    ``prefetch`` runs ``fetch(query)`` for each variant (which fills the
+    search cache) while the user is still choosing. Each user may start at
+    most ``budget`` queries per ``window_seconds``; a query prefetched less
+    than ``ttl_seconds`` ago is not fetched again, and ``fetch`` should keep
+    its results only that long unless the user confirms them. ``join`` lets the confirm
+    step wait for prefetches still in flight instead of repeating them.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        budget: int = 20,
+        window_seconds: float = 3600.0,
+        ttl_seconds: float = 600.0,
+        join_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.budget = max(0, budget)
+        self.window_seconds = window_seconds
+        self.ttl_seconds = ttl_seconds
+        self.join_timeout = join_timeout
+        self.clock = clock
+        self._spent: dict[str, deque[float]] = {}
+        self._fetched: dict[str, float] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.over_budget = 0
+        self.failed = 0
+        self.hits = 0
+        self.joined = 0
+
+    @classmethod
+    def from_env(cls) -> "SearchPrefetcher":
+        def _float(name: str, default: float) -> float:
+            try:
+                return float(os.getenv(name, default))
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            enabled=os.getenv("SEARCH_PREFETCH", "false").lower() == "true",
+            budget=int(_float("SEARCH_PREFETCH_BUDGET", 20)),
+            window_seconds=_float("SEARCH_PREFETCH_WINDOW_SECONDS", 3600.0),
+            ttl_seconds=_float("SEARCH_PREFETCH_TTL_SECONDS", 600.0),
+            join_timeout=_float("SEARCH_PREFETCH_JOIN_SECONDS", 10.0),
+        )
+
+    # ------------------------------------------------------------------
+    def _select(self, user_key: str, queries: Iterable[str]) -> list[str]:
+        now = self.clock()
+        with self._lock:
+            spent = self._spent.setdefault(user_key, deque())
+            while spent and now - spent[0] >= self.window_seconds:
+                spent.popleft()
+            for key, at in list(self._fetched.items()):
+                if now - at >= self.ttl_seconds:
+                    del self._fetched[key]
+            selected: list[str] = []
+            for query in dict.fromkeys(q.strip() for q in queries if q and q.strip()):
+                key = normalize_query(query)
+                if key in self._fetched or key in self._inflight:
+                    continue
+                if len(spent) >= self.budget:
+                    self.over_budget += 1
+                    continue
+                spent.append(now)
+                self._fetched[key] = now
+                selected.append(query)
+            if not spent:
+                self._spent.pop(user_key, None)
+            return selected
+
+    async def prefetch(
+        self,
+        user_key: str,
+        queries: Iterable[str],
+        fetch: Callable[[str], Awaitable[object]],
+    ) -> int:
+        """Fetch the variants within the user's budget; returns how many were started."""
+        if not self.enabled:
+            return 0
+        selected = self._select(user_key, queries)
+        if not selected:
+            return 0
+
+        async def _one(query: str) -> None:
+            try:
+                await fetch(query)
+            except Exception as exc:
+                self.failed += 1
+                with self._lock:
+                    self._fetched.pop(normalize_query(query), None)
+                logger.warning("search prefetch failed q=%s err=%s", query, exc)
+
+        tasks = []
+        with self._lock:
+            for query in selected:
+                task = asyncio.create_task(_one(query))
+                self._inflight[normalize_query(query)] = task
+                tasks.append(task)
+            self.started += len(tasks)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            with self._lock:
+                for query in selected:
+                    self._inflight.pop(normalize_query(query), None)
+        return len(selected)
+
+    async def join(self, queries: Iterable[str]) -> int:
+        """Wait (up to ``join_timeout``) for prefetches of ``queries`` still running."""
+        if not self.enabled:
+            return 0
+        loop = asyncio.get_running_loop()
+        keys = {normalize_query(q) for q in queries if q}
+        with self._lock:
+            self.hits += sum(1 for k in keys if k in self._fetched)
+            pending = [
+                task
+                for key, task in self._inflight.items()
+                if key in keys and not task.done() and task.get_loop() is loop
+            ]
+        if not pending:
+            return 0
+        self.joined += len(pending)
+        await asyncio.wait(pending, timeout=self.join_timeout)
+        return len(pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            inflight = len(self._inflight)
+            tracked = len(self._fetched)
+        return {
+            "enabled": self.enabled,
+            "budget": self.budget,
+            "window_seconds": int(self.window_seconds),
+            "ttl_seconds": int(self.ttl_seconds),
+            "inflight": inflight,
+            "tracked_queries": tracked,
+            "started": self.started,
+            "over_budget": self.over_budget,
+            "failed": self.failed,
+            "hits": self.hits,
+            "joined": self.joined,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spent.clear()
+            self._fetched.clear()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import abc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def datetime_utc(stored_at: float) -> datetime:
+    return datetime.fromtimestamp(stored_at, timezone.utc)
+
+
+def timestamp(value: datetime) -> float:
+    """Epoch seconds of ``value``; naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class PersistentTTLCache(abc.ABC):
+    """TTL + LRU cache in memory, optionally backed by a Postgres table.
+
+    Memory is the primary store. With ``persist`` on, ``_warm`` loads rows
+    still within the TTL and ``flush`` upserts the entries written since the
+    last flush. Subclasses only map their values to rows: ``_model`` returns
+    the ORM class (keyed by ``KEY_COLUMN``, timestamped by ``fetched_at``),
+    ``_row`` builds the row of an entry and ``_entry`` reads one back.
+    Database errors are logged and never propagate. An entry may be stored
+    with a shorter TTL of its own (speculative results nobody asked for
+    yet); it stays in memory only until ``_confirm`` gives it the cache TTL.
+    """
+
+    ENV_PREFIX = ""
+    DEFAULT_TTL_HOURS = 24.0
+    DEFAULT_MAX_ENTRIES = 5000
+    DEFAULT_PERSIST = False
+    KEY_COLUMN = "cache_key"
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 24 * 3600, persist: bool = False):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._short_ttl: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+
+    @classmethod
+    def from_env(cls):
+        """Read ``<ENV_PREFIX>_TTL_HOURS``, ``_MAX_ENTRIES`` and ``_PERSIST``."""
+        prefix = cls.ENV_PREFIX
+        ttl_hours = _env_float(f"{prefix}_TTL_HOURS", cls.DEFAULT_TTL_HOURS)
+        max_entries = int(_env_float(f"{prefix}_MAX_ENTRIES", cls.DEFAULT_MAX_ENTRIES))
+        persist = os.getenv(f"{prefix}_PERSIST", str(cls.DEFAULT_PERSIST)).lower() == "true"
+        return cls(max_entries=max_entries, ttl_seconds=ttl_hours * 3600, persist=persist)
+
+    # Row mapping -------------------------------------------------------
+    @staticmethod
+    @abc.abstractmethod
+    def _model():
+        """The ORM class of the table."""
+
+    @abc.abstractmethod
+    def _row(self, key: str, value: Any, stored_at: float) -> dict:
+        """Column values of an entry."""
+
+    @abc.abstractmethod
+    def _entry(self, row: Any) -> Optional[tuple[str, Any, float]]:
+        """``(key, value, stored_at)`` of a stored row, or None to ignore it."""
+
+    # Memory ------------------------------------------------------------
+    def _set(self, key: str, value: Any, stored_at: float, ttl_seconds: Optional[float] = None) -> None:
+        # Called with the lock held.
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        if ttl_seconds is None:
+            self._short_ttl.pop(key, None)
+        else:
+            self._short_ttl[key] = ttl_seconds
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._short_ttl.pop(evicted, None)
+
+    def _expired(self, key: str, value: Any) -> None:
+        """Hook for an entry dropped because it outlived the TTL (lock held)."""
+
+    def _lookup(self, key: str, now: float) -> Optional[Any]:
+        # Called with the lock held; counts hits, callers count misses.
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self._short_ttl.get(key, self.ttl_seconds):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            self._entries.pop(key, None)
+            self._short_ttl.pop(key, None)
+            self._expired(key, entry[1])
+        return None
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._lookup(key, time.time())
+            if value is None:
+                self.misses += 1
+            return value
+
+    def _put(
+        self,
+        key: str,
+        value: Any,
+        stored_at: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            self._set(key, value, time.time() if stored_at is None else stored_at, ttl_seconds)
+            if ttl_seconds is not None:
+                self._dirty.discard(key)
+            elif self.persist:
+                self._dirty.add(key)
+
+    def _confirm(self, key: str) -> None:
+        """Give an entry stored with its own shorter TTL the cache TTL (and persist it)."""
+        with self._lock:
+            if self._short_ttl.pop(key, None) is not None and self.persist:
+                self._dirty.add(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": int(self.ttl_seconds),
+            "persist": self.persist,
+            "hits": self.hits,
+            "misses": self.misses,
+            "db_hits": self.db_hits,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty.clear()
+            self._short_ttl.clear()
+
+    # Database ----------------------------------------------------------
+    def _read(self, db: Session, keys: list[str], *criteria: Any, fresh: bool = True) -> list:
+        model = self._model()
+        query = db.query(model).filter(getattr(model, self.KEY_COLUMN).in_(keys), *criteria)
+        if fresh:
+            query = query.filter(model.fetched_at >= datetime_utc(time.time() - self.ttl_seconds))
+        try:
+            return query.all()
+        except Exception as exc:
+            self._rollback(db)
+            logger.warning("%s read failed: %s", model.__tablename__, exc)
+            return []
+
+    def _warm(self, db: Optional[Session], keys: Iterable[str]) -> None:
+        """Load the persisted entries of ``keys`` that are not fresh in memory."""
+        if not self.persist or db is None:
+            return
+        now = time.time()
+        with self._lock:
+            keys = [
+                key for key in dict.fromkeys(keys)
+                if key not in self._entries or now - self._entries[key][0] >= self.ttl_seconds
+            ]
+        if not keys:
+            return
+        entries = [entry for entry in map(self._entry, self._read(db, keys)) if entry is not None]
+        with self._lock:
+            for key, value, stored_at in entries:
+                self._set(key, value, stored_at)
+                self.db_hits += 1
+
+    def _write(self, db: Session, rows: list[dict]) -> None:
+        model = self._model()
+        tbl = model.__table__
+        stmt = pg_insert(tbl).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tbl.c[self.KEY_COLUMN]],
+            set_={column: stmt.excluded[column] for column in rows[0] if column != self.KEY_COLUMN},
+        )
+        try:
+            db.execute(stmt)
+            db.commit()
+        except Exception as exc:
+            self._rollback(db)
+            logger.warning("%s write failed: %s", model.__tablename__, exc)
+
+    def flush(self, db: Optional[Session]) -> None:
+        """Persist entries written since the last flush."""
+        if not self.persist or db is None:
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            rows = [
+                self._row(key, self._entries[key][1], self._entries[key][0])
+                for key in dirty
+                if key in self._entries
+            ]
+        if rows:
+            self._write(db, rows)
+
+    @staticmethod
+    def _rollback(db: Session) -> None:
+        try:
+            db.rollback()
+        except Exception:
+            pass
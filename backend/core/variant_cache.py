@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from backend.core.ttl_cache import PersistentTTLCache, datetime_utc, timestamp
+
+# Words that do not change what a prompt is asking for.
+STOPWORDS = frozenset(
+    {"a", "al", "de", "del", "el", "en", "la", "las", "los", "para", "por", "y", "e", "o", "u", "con", "zona"}
+)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").strip().split())
+
+
+def split_cat_geo(texto: str, contexto_extra: Optional[str]) -> tuple[str, str]:
+    """Split ``"dentistas en Madrid"`` into category and place; ``contexto_extra`` fills a missing place."""
+    t = _norm(texto)
+    low = t.lower()
+    cat, geo = t, ""
+    if " en " in low:
+        idx = low.rfind(" en ")
+        cat = _norm(t[:idx])
+        geo = _norm(t[idx + 4 :])
+    if not geo and contexto_extra:
+        geo = _norm(contexto_extra)
+    return (cat, geo)
+
+
+def _token(word: str) -> str:
+    # Crude Spanish plural folding: "dentistas"/"dentista", "dentales"/"dental".
+    if len(word) > 4 and word.endswith("es") and word[-3] in "dlnrj":
+        return word[:-2]
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+def fold_terms(text: str) -> str:
+    """Accent-, case-, order- and plural-insensitive form of ``text``."""
+    ascii_text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    words = _NON_WORD.sub(" ", ascii_text.lower()).split()
+    return " ".join(sorted({_token(w) for w in words if w not in STOPWORDS}))
+
+
+def variant_key(cliente_ideal: str, contexto_extra: Optional[str] = None) -> str:
+    """Cache key for the variants of a prompt: folded category, place and remaining context."""
+    cat, geo = split_cat_geo(cliente_ideal, contexto_extra)
+    cat_key, geo_key = fold_terms(cat), fold_terms(geo)
+    extra_key = fold_terms(contexto_extra or "")
+    if extra_key == geo_key:
+        extra_key = ""
+    return f"{cat_key}|{geo_key}|{extra_key}"
+
+
+class VariantCache(PersistentTTLCache):
+    """TTL + LRU cache of generated ``/buscar`` variants keyed by ``variant_key``.
+
+    Prompts that only differ in accents, case, word order, plurals or stop
+    words share an entry. Memory is the primary store; with ``persist`` on,
+    ``warm`` loads the entry from ``search_variant_cache`` and ``flush``
+    writes the entries generated since the last flush.
+    """
+
+    ENV_PREFIX = "VARIANT_CACHE"
+
+    @staticmethod
+    def _model():
+        from backend.models import SearchVariantCache
+
+        return SearchVariantCache
+
+    def _row(self, key: str, variantes: list[str], stored_at: float) -> dict:
+        return {"cache_key": key, "variantes": variantes, "fetched_at": datetime_utc(stored_at)}
+
+    def _entry(self, row) -> Optional[tuple[str, list[str], float]]:
+        if not row.variantes:
+            return None
+        return row.cache_key, list(row.variantes), timestamp(row.fetched_at)
+
+    # ------------------------------------------------------------------
+    def get(self, cliente_ideal: str, contexto_extra: Optional[str] = None) -> Optional[list[str]]:
+        variantes = self._get(variant_key(cliente_ideal, contexto_extra))
+        return list(variantes) if variantes is not None else None
+
+    def put(self, cliente_ideal: str, contexto_extra: Optional[str], variantes: list[str]) -> None:
+        if variantes:
+            self._put(variant_key(cliente_ideal, contexto_extra), list(variantes))
+
+    def warm(self, db: Optional[Session], cliente_ideal: str, contexto_extra: Optional[str] = None) -> None:
+        """Load the persisted entry for this prompt if it is not in memory yet."""
+        self._warm(db, [variant_key(cliente_ideal, contexto_extra)])
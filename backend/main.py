@@ -2,15 +2,19 @@
 import asyncio
 import csv
 import io
+import json
 import os
 import logging
 import unicodedata
 import re
-from urllib.parse import urlparse
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import aclosing, nullcontext
+from functools import partial
 
 # --- Third-party ---
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr, validator, root_validator
 from sqlalchemy.orm import Session
@@ -18,7 +22,8 @@ from sqlalchemy.exc import IntegrityError, ProgrammingError
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy import func, select, text, delete, and_, or_
 from datetime import date, datetime, timezone
-from typing import Any, Literal, Optional, List
+from typing import Any, AsyncIterator, Literal, NamedTuple, Optional, List, Sequence
+import anyio
 import httpx
 
 # --- Local / project ---
@@ -32,8 +37,32 @@ from backend.models import (
     LeadTarea,
     LeadHistorial,
     UsuarioMemoria,
+    ExtractionJob,
 )
+from backend.core.contact_discovery import (
+    ContactPageCache,
+    discover_contact_links,
+    discover_sitemap_links,
+)
+from backend.core.dns_cache import CachedDnsBackend, DnsCache
+from backend.core.domain_cache import CACHE_FIELDS, DomainContactCache, has_validators
+from backend.core.domain_health import DomainHealth, classify_failure
+from backend.core.domains import filter_domains, normalize_domain as normalizar_dominio
+from backend.core.html_stream import (
+    DEFAULT_MAX_BYTES,
+    HTML_CONTENT_TYPES,
+    XML_CONTENT_TYPES,
+    read_html,
+)
+from backend.core.http_pool import HttpPools
+from backend.core.job_queue import DONE as JOB_DONE, FAILED as JOB_FAILED, JobQueue
+from backend.core.llm_gateway import LLMBusyError, LLMGateway
+from backend.core.page_parse import first_contact, first_valid_email as _first_valid_email, shared_pool
+from backend.core.plan_config import PlanConfig
 from backend.core.plan_service import PlanService
+from backend.core.scrape_engine import HostLimiter, ScrapeEngine, ScrapeLimits, ScrapeStats
+from backend.core.search_cache import SearchResultCache
+from backend.core.search_prefetch import SearchPrefetcher
 from backend.core.usage_helpers import (
     can_export_csv,
     can_start_search,
@@ -45,6 +74,7 @@ from backend.core.usage_helpers import (
     inc_count,
 )
 from backend.core.usage_service import UsageService
+from backend.core.variant_cache import VariantCache, split_cat_geo as _split_cat_geo
 
 # --- Load environment variables ---
 from dotenv import load_dotenv
@@ -85,22 +115,6 @@ if os.getenv("ENV") == "dev":
 
 
 
-def normalizar_dominio(value: str) -> str:
-    if not value:
-        return ""
-    v = value.strip()
-    if v.startswith("http://") or v.startswith("https://"):
-        try:
-            netloc = urlparse(v).netloc
-            v = netloc or v
-        except Exception:
-            pass
-    v = re.sub(r"^www\.", "", v, flags=re.IGNORECASE)
-    v = v.lower()
-    v = v.split("/")[0].strip()
-    return v
-
-
 def normalizar_nicho(value: str) -> str:
     if not value:
         return ""
@@ -112,10 +126,49 @@ def normalizar_nicho(value: str) -> str:
 
 # --- Búsqueda y scraping ---
 
+# Resolución DNS previa de cada lote: los dominios inexistentes (NXDOMAIN) se
+# descartan sin abrir ninguna conexión HTTP, y el cliente de scraping conecta
+# a las direcciones ya resueltas en vez de volver a resolver el nombre.
+SCRAPE_DNS_PRERESOLVE = os.getenv("SCRAPE_DNS_PRERESOLVE", "true").lower() == "true"
+DNS_CACHE = DnsCache.from_env()
+
+# Clientes HTTP compartidos durante la vida de la app (uno para Brave y otro
+# para scraping), abiertos en el arranque sobre el loop principal.
+HTTP_POOLS = HttpPools.from_env(
+    scrape_backend=CachedDnsBackend(DNS_CACHE) if SCRAPE_DNS_PRERESOLVE else None
+)
+
+
+@app.on_event("startup")
+async def _abrir_http_pools():
+    await HTTP_POOLS.start()
+
+
+@app.on_event("shutdown")
+async def _cerrar_http_pools():
+    await HTTP_POOLS.close()
+
+
+# Los endpoints de búsqueda y extracción son nativamente async: el trabajo de
+# base de datos (sesiones síncronas de SQLAlchemy) va a este pool acotado
+# para no bloquear el loop ni agotar las conexiones del engine.
+DB_EXECUTOR_THREADS = max(1, int(os.getenv("DB_EXECUTOR_THREADS", "8")))
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="db")
+
+
+async def _en_db(fn, *args, **kwargs):
+    """Ejecuta ``fn(*args, **kwargs)`` (bloqueante, de base de datos) en ``DB_EXECUTOR``."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, partial(fn, *args, **kwargs))
+
+
+@app.on_event("shutdown")
+def _cerrar_db_executor():
+    DB_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
 BRAVE_SEARCH_URL = "https://api.search.brave.com/res/v1/web/search"
 MAX_SEARCH_RESULTS = 60
 MAX_LEADS_PER_EXTRACTION = 30
-EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.[a-zA-Z]{2,}")
 CONTACT_PATHS: tuple[str, ...] = (
     "/contacto",
     "/contact",
@@ -123,61 +176,64 @@ CONTACT_PATHS: tuple[str, ...] = (
     "/legal",
     "/politica-privacidad",
 )
-BLOCKED_PATTERNS = (
-    "facebook.com",
-    "instagram.com",
-    "twitter.com",
-    "linkedin.com",
-    "doctoralia.es",
-    "paginasamarillas.es",
-    "tripadvisor.es",
-    "habitissimo.es",
-    "youtube.com",
-    "yelp.com",
-    "maps.google.",
-)
-KNOWN_MULTI_TLDS = {
-    "com.ar",
-    "com.br",
-    "com.co",
-    "com.ec",
-    "com.es",
-    "com.mx",
-    "com.pe",
-    "com.cl",
-    "com.ve",
-    "co.uk",
-}
 
 
-def base_domain(domain: str) -> str:
-    if not domain:
-        return ""
-    parts = domain.split(".")
-    if len(parts) <= 2:
-        return domain
-    last_two = ".".join(parts[-2:])
-    last_three = ".".join(parts[-3:])
-    if last_two in KNOWN_MULTI_TLDS and len(parts) >= 3:
-        return last_three
-    return last_two
-
-
-def _is_blocked_domain(domain: str) -> bool:
-    domain = domain.lower()
-    for pattern in BLOCKED_PATTERNS:
-        pat = pattern.lower()
-        if pat.endswith("."):
-            if domain.startswith(pat):
-                return True
-        if domain == pat:
-            return True
-        if domain.endswith(f".{pat}"):
-            return True
-    return False
+BRAVE_MAX_CONCURRENCY = int(os.getenv("BRAVE_MAX_CONCURRENCY", "4"))
+BRAVE_PAGES_PER_QUERY = int(os.getenv("BRAVE_PAGES_PER_QUERY", "1"))
+
+
+SEARCH_CACHE = SearchResultCache.from_env()
+# Búsquedas especulativas de las variantes mientras el usuario las elige.
+SEARCH_PREFETCH = SearchPrefetcher.from_env()
+
+
+def _domains_from_results(urls: list[str]) -> list[str]:
+    return filter_domains(urls)
 
 
-def search_domains(queries: list[str], per_query: int = 20) -> list[str]:
+async def _brave_query(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    q: str,
+    count: int,
+    page: int = 0,
+) -> Optional[list[str]]:
+    """Devuelve las URLs de resultados de una consulta, o None si falla."""
+    params: dict[str, Any] = {"q": q, "count": count}
+    if page:
+        params["offset"] = page
+    try:
+        resp = await client.get(BRAVE_SEARCH_URL, params=params, headers=headers)
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as exc:
+        logger.warning(
+            "[buscar_variantes_seleccionadas] fallo consulta Brave q=%s page=%d err=%s", q, page, exc
+        )
+        return None
+    results = data.get("web", {}).get("results", []) or []
+    return [item.get("url") for item in results if item.get("url")]
+
+
+async def search_domains_async(
+    queries: list[str],
+    per_query: int = 20,
+    pages: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    prefetch: bool = False,
+) -> list[str]:
+    """
+    Lanza todas las consultas (y sus páginas siguientes) contra Brave a la vez,
+    con un máximo de ``max_concurrency`` en vuelo. Los resultados se filtran
+    según llegan pero se fusionan en el orden de las variantes, de modo que las
+    primeras variantes siguen teniendo prioridad. Al alcanzar
+    ``MAX_SEARCH_RESULTS`` se cancelan las consultas pendientes.
+
+    Con ``prefetch`` (precarga especulativa) lo obtenido se guarda en
+    ``SEARCH_CACHE`` solo durante ``SEARCH_PREFETCH_TTL_SECONDS``; pasa al TTL
+    normal de la caché cuando una búsqueda confirmada lo lee.
+    """
     api_key = os.getenv("BRAVE_API_KEY")
     if not api_key:
         logger.error("[buscar_variantes_seleccionadas] falta BRAVE_API_KEY para búsquedas")
@@ -186,54 +242,71 @@ def search_domains(queries: list[str], per_query: int = 20) -> list[str]:
             detail="Busqueda no configurada: BRAVE_API_KEY ausente",
         )
 
+    if client is None:
+        client = HTTP_POOLS.search.client()
+    if client is None:
+        async with HTTP_POOLS.search.build_client() as own_client:
+            return await search_domains_async(
+                queries, per_query, pages, max_concurrency, client=own_client, prefetch=prefetch
+            )
+
     headers = {
         "Accept": "application/json",
         "X-Subscription-Token": api_key,
     }
+    pages = max(1, pages or BRAVE_PAGES_PER_QUERY)
+    gate = asyncio.Semaphore(max(1, max_concurrency or BRAVE_MAX_CONCURRENCY))
+    jobs = [
+        (q, page)
+        for q in ((query or "").strip() for query in queries)
+        if q
+        for page in range(pages)
+    ]
     dominios: list[str] = []
     vistos: set[str] = set()
+    prefetch_ttl = SEARCH_PREFETCH.ttl_seconds if prefetch else None
+
+    async def run_job(idx: int) -> tuple[int, list[str]]:
+        q, page = jobs[idx]
+        urls = SEARCH_CACHE.get(q, per_query, page, confirm=not prefetch)
+        if urls is None:
+            async with gate:
+                urls = await _brave_query(client, headers, q, per_query, page)
+            if urls is None:
+                urls = []
+            else:
+                SEARCH_CACHE.put(q, per_query, page, urls, ttl_seconds=prefetch_ttl)
+        return idx, _domains_from_results(urls)
 
-    with httpx.Client(timeout=10) as client:
-        for query in queries:
-            q = (query or "").strip()
-            if not q:
-                continue
-            try:
-                resp = client.get(
-                    BRAVE_SEARCH_URL,
-                    params={"q": q, "count": per_query},
-                    headers=headers,
+    tasks = [asyncio.create_task(run_job(i)) for i in range(len(jobs))]
+    llegados: dict[int, list[str]] = {}
+    siguiente = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            idx, found = await next_done
+            llegados[idx] = found
+            while siguiente in llegados and len(dominios) < MAX_SEARCH_RESULTS:
+                for domain in llegados.pop(siguiente):
+                    if domain in vistos:
+                        continue
+                    vistos.add(domain)
+                    dominios.append(domain)
+                    if len(dominios) >= MAX_SEARCH_RESULTS:
+                        break
+                q, page = jobs[siguiente]
+                logger.info(
+                    "[buscar_variantes_seleccionadas] query=%s page=%d dominios_parciales=%d",
+                    q,
+                    page,
+                    len(vistos),
                 )
-                resp.raise_for_status()
-                data = resp.json()
-            except Exception as exc:
-                logger.warning("[buscar_variantes_seleccionadas] fallo consulta Brave q=%s err=%s", q, exc)
-                continue
-
-            results = data.get("web", {}).get("results", []) or []
-            for item in results:
-                url = item.get("url") or ""
-                normalized = normalizar_dominio(url)
-                if not normalized:
-                    continue
-                if _is_blocked_domain(normalized):
-                    continue
-                domain = base_domain(normalized)
-                if not domain or _is_blocked_domain(domain):
-                    continue
-                if domain in vistos:
-                    continue
-                vistos.add(domain)
-                dominios.append(domain)
-                if len(dominios) >= MAX_SEARCH_RESULTS:
-                    break
-            logger.info(
-                "[buscar_variantes_seleccionadas] query=%s dominios_parciales=%d",
-                q,
-                len(vistos),
-            )
+                siguiente += 1
             if len(dominios) >= MAX_SEARCH_RESULTS:
                 break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     logger.info(
         "[buscar_variantes_seleccionadas] dominios_unicos_totales=%d",
@@ -242,55 +315,382 @@ def search_domains(queries: list[str], per_query: int = 20) -> list[str]:
     return dominios
 
 
-async def _fetch_email_for_domain(client: httpx.AsyncClient, domain: str) -> Optional[str]:
-    async def get_text(url: str) -> str:
+async def search_domains_cached(
+    queries: list[str],
+    per_query: int = 20,
+    db: Optional[Session] = None,
+) -> list[str]:
+    """``search_domains_async`` con la caché persistente, leída y escrita en ``DB_EXECUTOR``."""
+    await _en_db(SEARCH_CACHE.warm, db, queries, per_query, BRAVE_PAGES_PER_QUERY)
+    # Si alguna variante se está precargando, se espera a ella en vez de repetirla.
+    await SEARCH_PREFETCH.join(queries)
+    try:
+        return await search_domains_async(queries, per_query=per_query)
+    finally:
+        await _en_db(SEARCH_CACHE.flush, db)
+
+
+async def _prefetch_variante(query: str) -> None:
+    await search_domains_async([query], prefetch=True)
+
+
+DOMAIN_CACHE = DomainContactCache.from_env()
+# Al caducar una entrada se revalida su página de origen con If-None-Match /
+# If-Modified-Since; un 304 reutiliza el contacto guardado.
+SCRAPE_REVALIDATE = os.getenv("SCRAPE_REVALIDATE", "true").lower() == "true"
+# Fallos recientes por dominio (DNS, TLS, timeouts, 403/429...) con circuit breaker.
+DOMAIN_HEALTH = DomainHealth.from_env()
+
+# Bytes máximos leídos por página; la lectura se corta antes en cuanto aparece
+# un email válido, y los cuerpos que no son HTML no se descargan.
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+SCRAPE_USE_SITEMAP = os.getenv("SCRAPE_USE_SITEMAP", "false").lower() == "true"
+# Páginas de contacto descubiertas por dominio (enlaces de la home o sitemap).
+CONTACT_PAGES = ContactPageCache.from_env()
+
+# Análisis de páginas grandes (regex de emails y enlaces) en procesos aparte.
+PARSE_POOL = shared_pool()
+
+
+@app.on_event("shutdown")
+def _cerrar_parse_pool():
+    PARSE_POOL.shutdown()
+
+
+async def _fetch_contact_for_domain(
+    client: httpx.AsyncClient,
+    domain: str,
+    hosts: Optional[HostLimiter] = None,
+    paths: Optional[Sequence[str]] = None,
+    parallel: int = 1,
+    previous: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """
+    Busca un email en la home y en las páginas de contacto del dominio.
+
+    Cada página se lee solo hasta el primer email o teléfono válido. Se
+    devuelve también el teléfono de la página del email o, si no tiene, el
+    primero encontrado en las demás.
+
+    Las páginas de contacto se descubren a partir de los enlaces de la home
+    (y, con ``SCRAPE_USE_SITEMAP``, del ``sitemap.xml``); solo si no aparece
+    ninguna se prueban las rutas fijas ``paths`` del plan, cuyo número marca
+    también cuántas páginas se visitan. La página donde aparece el email se
+    recuerda en ``CONTACT_PAGES`` para ir directa la próxima vez.
+
+    Con ``parallel`` <= 1 recorre las páginas en orden. Con un valor mayor las
+    descarga en paralelo (hasta ``parallel`` a la vez), acepta la primera que
+    contenga un email válido y cancela el resto; además la home compite con
+    la primera ruta fija mientras se descubren los enlaces. Devuelve también
+    el código HTTP de la home (o el primero recibido) para la caché de dominios.
+    Si la home falla o responde 403/429/5xx no se prueban más páginas y el
+    tipo de fallo sale en ``error_kind`` para ``DOMAIN_HEALTH``.
+
+    ``previous`` es la entrada caducada de la caché con los validadores
+    (``ETag``/``Last-Modified``) de la página donde se encontró el contacto:
+    esa página se pide primero de forma condicional y, si responde ``304``,
+    se reutiliza el resultado anterior sin descargar nada más.
+    """
+    statuses: dict[str, int] = {}
+    failures: dict[str, str] = {}
+    pages: dict[str, str] = {}
+    emails: dict[str, Optional[str]] = {}
+    phones: dict[str, Optional[str]] = {}
+    validators: dict[str, dict[str, Optional[str]]] = {}
+
+    async def get_text(
+        url: str,
+        content_types: Sequence[str] = HTML_CONTENT_TYPES,
+        headers: Optional[dict[str, str]] = None,
+    ) -> str:
+        if url in pages:
+            return pages[url]
+        found: dict[str, Optional[str]] = {"email": None, "telefono": None}
+
+        async def scan(window: str) -> bool:
+            # Cada trozo se analiza una sola vez y la lectura se corta en el
+            # primer email o teléfono; lo hallado se guarda para no volver a
+            # recorrer la página entera.
+            email, telefono = await PARSE_POOL.run(first_contact, window, size=len(window))
+            found["email"] = found["email"] or email
+            found["telefono"] = found["telefono"] or telefono
+            return bool(email or telefono)
+
+        slot = hosts.slot(domain) if hosts is not None else nullcontext()
         try:
-            resp = await client.get(url, timeout=8)
-            if resp.status_code < 400:
-                return resp.text or ""
+            async with slot:
+                page = await read_html(
+                    client,
+                    url,
+                    max_bytes=SCRAPE_MAX_BYTES,
+                    stop=scan,
+                    timeout=8,
+                    content_types=content_types,
+                    headers=headers,
+                )
+            statuses[url] = page.status_code
+            validators[url] = {"etag": page.etag, "last_modified": page.last_modified}
+            if not page.not_modified:
+                pages[url] = page.text
+                emails[url] = found["email"]
+                phones[url] = found["telefono"]
+            return page.text
         except Exception as exc:
+            failures[url] = classify_failure(exc)
             logger.debug("[scrape] fallo request url=%s err=%s", url, exc)
         return ""
 
     base_url = f"https://{domain}"
-    html = await get_text(base_url)
-    matches = EMAIL_RE.findall(html)
-    if matches:
-        return matches[0]
-
-    for idx, path in enumerate(CONTACT_PATHS, start=1):
-        if idx > 2:
-            break
-        html = await get_text(f"{base_url}{path}")
-        matches = EMAIL_RE.findall(html)
-        if matches:
-            return matches[0]
-    return None
-
-
-async def scrape_domains(domains: list[str]) -> list[dict[str, Any]]:
-    results: list[dict[str, Any]] = []
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        tasks = [_fetch_email_for_domain(client, d) for d in domains]
-        emails = await asyncio.gather(*tasks, return_exceptions=True)
-
-    for domain, email in zip(domains, emails):
-        if isinstance(email, Exception):
-            logger.debug("[scrape] excepción dominio=%s err=%s", domain, email)
-            email_value = None
-        else:
-            email_value = email
-        results.append(
-            {
-                "dominio": domain,
-                "url": f"https://{domain}",
-                "email": email_value,
-                "telefono": None,
-                "origen": "scraping_web",
-            }
+    if paths is None:
+        paths = CONTACT_PATHS[:2]
+    budget = max(1, len(paths))
+    guesses = [f"{base_url}{path}" for path in paths]
+
+    def home_failure() -> Optional[str]:
+        """Tipo de fallo de la home (error de red, 403/429 o 5xx), o None."""
+        return failures.get(base_url) or classify_failure(status=statuses.get(base_url))
+
+    def contact(email: Optional[str], source_url: Optional[str] = None) -> dict[str, Any]:
+        status = statuses.get(base_url)
+        if status is None and statuses:
+            status = min(statuses.values())
+        telefono = phones.get(source_url) or next((tel for tel in phones.values() if tel), None)
+        found = {"email": email, "telefono": telefono, "http_status": status}
+        if source_url is not None:
+            found.update(source_url=source_url, **validators.get(source_url, {}))
+        # Sin email, una home bloqueada o caída se informa a DOMAIN_HEALTH
+        # aunque otra página haya respondido; sin ninguna página legible
+        # también.
+        if email is None and home_failure():
+            found["error_kind"] = home_failure()
+        elif email is None and not any(code < 400 for code in statuses.values()):
+            kind = failures.get(base_url) or classify_failure(status=status)
+            if kind is None and failures:
+                kind = next(iter(failures.values()))
+            if kind:
+                found["error_kind"] = kind
+        return found
+
+    async def email_en(url: str, headers: Optional[dict[str, str]] = None) -> Optional[str]:
+        await get_text(url, headers=headers)
+        return emails.get(url)
+
+    gate = asyncio.Semaphore(max(1, parallel))
+
+    async def probe(url: str) -> tuple[str, Optional[str]]:
+        async with gate:
+            return url, await email_en(url)
+
+    async def first_hit(urls: list[str]) -> Optional[tuple[str, str]]:
+        """(url, email) de la primera página con email; cancela el resto."""
+        if parallel <= 1:
+            for url in urls:
+                email = await email_en(url)
+                if email:
+                    return url, email
+                if url == base_url and home_failure():
+                    return None
+            return None
+        tasks = [asyncio.create_task(probe(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                url, email = await next_done
+                if email:
+                    return url, email
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def remember(hit: tuple[str, str]) -> dict[str, Any]:
+        if hit[0] != base_url:
+            CONTACT_PAGES.put(domain, [hit[0]])
+        return contact(hit[1], source_url=hit[0])
+
+    if has_validators(previous):
+        source_url = previous["source_url"]
+        conditional = {}
+        if previous.get("etag"):
+            conditional["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            conditional["If-Modified-Since"] = previous["last_modified"]
+        email = await email_en(source_url, headers=conditional)
+        if statuses.get(source_url) == 304:
+            reused = {field: previous.get(field) for field in CACHE_FIELDS if field != "fetched_at"}
+            return {**reused, "revalidated": True}
+        if email:
+            return remember((source_url, email))
+
+    known = CONTACT_PAGES.get(domain)
+    if known is not None:
+        hit = await first_hit([base_url] + known[:budget])
+        return remember(hit) if hit else contact(None)
+
+    hit = await first_hit([base_url] + (guesses[:1] if parallel > 1 else []))
+    if hit:
+        return remember(hit)
+    if home_failure():
+        # La home no conecta o nos bloquea: el resto de páginas correría la
+        # misma suerte y solo empeoraría el bloqueo.
+        return contact(None)
+
+    home = pages.get(base_url, "")
+    enlazadas = await PARSE_POOL.run(discover_contact_links, home, base_url, budget, size=len(home))
+    links = [url for url in enlazadas if url not in pages]
+    if not links and SCRAPE_USE_SITEMAP:
+        sitemap = await get_text(f"{base_url}/sitemap.xml", XML_CONTENT_TYPES)
+        enlazadas = await PARSE_POOL.run(
+            discover_sitemap_links, sitemap, base_url, budget, size=len(sitemap)
         )
+        links = [u for u in enlazadas if u not in pages]
+    discovered = bool(links)
+    if not links:
+        links = [url for url in guesses if url not in pages]
+
+    hit = await first_hit(links)
+    if hit:
+        return remember(hit)
+    if discovered:
+        CONTACT_PAGES.put(domain, links)
+    return contact(None)
+
 
-    return results
+def _scrape_result(domain: str, contact: Optional[dict[str, Any]]) -> dict[str, Any]:
+    contact = contact or {}
+    return {
+        "dominio": domain,
+        "url": f"https://{domain}",
+        "email": contact.get("email"),
+        "telefono": contact.get("telefono"),
+        "origen": "scraping_web",
+    }
+
+
+def _is_cacheable_contact(contact: dict[str, Any]) -> bool:
+    # Los fallos no se guardan: de ellos se encarga DOMAIN_HEALTH con su backoff.
+    if contact.get("error_kind"):
+        return False
+    return bool(contact.get("email")) or contact.get("http_status") is not None
+
+
+async def iter_scrape_domains(
+    domains: list[str],
+    limits: Optional[ScrapeLimits] = None,
+    plan: Optional[PlanConfig] = None,
+    db: Optional[Session] = None,
+) -> AsyncIterator[tuple[dict[str, Any], str]]:
+    """
+    Produce ``(resultado, estado)`` por dominio en cuanto está disponible:
+    primero los aciertos de la caché compartida (estado ``cached``) y después
+    los scrapeados según terminan (``ok``, ``error``, ``timeout`` o
+    ``skipped``). Los dominios con el circuit breaker abierto no se piden y
+    salen como ``circuit_open``; los que fallaron hace poco se piden los últimos.
+    Con ``SCRAPE_DNS_PRERESOLVE`` el lote se resuelve antes en paralelo y los
+    dominios que no existen salen como ``nxdomain``. Con ``SCRAPE_REVALIDATE``
+    los dominios caducados en caché se revalidan con peticiones condicionales. Lo obtenido de la red se
+    guarda en la caché al terminar, también si el consumidor corta la
+    iteración antes.
+    """
+    cached = await _en_db(DOMAIN_CACHE.get_many, db, domains)
+    for domain in domains:
+        if domain in cached:
+            yield _scrape_result(domain, cached[domain]), "cached"
+    pendientes = []
+    for domain in domains:
+        if domain in cached:
+            continue
+        if DOMAIN_HEALTH.allow(domain):
+            pendientes.append(domain)
+        else:
+            yield _scrape_result(domain, None), "circuit_open"
+    if pendientes and SCRAPE_DNS_PRERESOLVE:
+        answers = await DNS_CACHE.resolve_many(pendientes)
+        vivos = []
+        for domain in pendientes:
+            if answers[domain].nxdomain:
+                DOMAIN_HEALTH.record_failure(domain, "dns")
+                yield _scrape_result(domain, None), "nxdomain"
+            else:
+                vivos.append(domain)
+        pendientes = vivos
+    if not pendientes:
+        return
+    pendientes = DOMAIN_HEALTH.order(pendientes)
+    previos: dict[str, dict[str, Any]] = {}
+    if SCRAPE_REVALIDATE:
+        previos = await _en_db(DOMAIN_CACHE.revalidation_candidates, db, pendientes)
+
+    scheduler = ScrapeEngine(limits)
+    paths = plan.scrape_contact_paths if plan is not None else None
+    parallel = plan.scrape_parallel_fetches if plan is not None else 1
+    scraped: dict[str, dict[str, Any]] = {}
+    try:
+        pooled = HTTP_POOLS.scrape.client()
+        client_ctx = HTTP_POOLS.scrape.build_client() if pooled is None else nullcontext(pooled)
+        async with client_ctx as client:
+            outcomes = scheduler.stream(
+                pendientes,
+                lambda d: _fetch_contact_for_domain(
+                    client,
+                    d,
+                    scheduler.hosts,
+                    paths=paths,
+                    parallel=parallel,
+                    previous=previos.get(d),
+                ),
+            )
+            async with aclosing(outcomes):
+                async for outcome in outcomes:
+                    contact = None
+                    if outcome.status == "ok":
+                        contact = outcome.value
+                        if contact.get("error_kind"):
+                            DOMAIN_HEALTH.record_failure(outcome.domain, contact["error_kind"])
+                        else:
+                            DOMAIN_HEALTH.record_success(outcome.domain)
+                        if _is_cacheable_contact(contact):
+                            scraped[outcome.domain] = contact
+                    elif outcome.status == "error":
+                        DOMAIN_HEALTH.record_failure(outcome.domain, classify_failure(outcome.error))
+                        logger.debug(
+                            "[scrape] excepción dominio=%s err=%s", outcome.domain, outcome.error
+                        )
+                    elif outcome.status == "timeout":
+                        DOMAIN_HEALTH.record_failure(outcome.domain, "timeout")
+                        logger.debug("[scrape] dominio=%s estado=timeout", outcome.domain)
+                    else:
+                        logger.debug("[scrape] dominio=%s estado=%s", outcome.domain, outcome.status)
+                    yield _scrape_result(outcome.domain, contact), outcome.status
+    finally:
+        if scraped:
+            await _en_db(DOMAIN_CACHE.put_many, db, scraped)
+
+
+async def scrape_domains(
+    domains: list[str],
+    limits: Optional[ScrapeLimits] = None,
+    plan: Optional[PlanConfig] = None,
+    db: Optional[Session] = None,
+) -> tuple[list[dict[str, Any]], ScrapeStats]:
+    """
+    Extrae el email de cada dominio respetando los límites de concurrencia
+    global y por host. Si vence el plazo global devuelve resultados parciales:
+    los dominios sin terminar quedan con email vacío y se contabilizan en las
+    estadísticas como ``timed_out`` o ``skipped``. Las páginas candidatas y su
+    paralelismo salen del plan del usuario.
+
+    Antes de salir a la red consulta la caché compartida de contactos: solo
+    se descargan los dominios ausentes o caducados, y lo obtenido se guarda.
+    """
+    started = time.monotonic()
+    stats = ScrapeStats(requested=len(domains))
+    por_dominio: dict[str, dict[str, Any]] = {}
+    async for resultado, estado in iter_scrape_domains(domains, limits, plan, db):
+        stats.record(estado)
+        por_dominio[resultado["dominio"]] = resultado
+    stats.elapsed_ms = int((time.monotonic() - started) * 1000)
+    return [por_dominio[d] for d in domains], stats
 
 
 # --- Compatibilidad con 1_Busqueda.py: endpoints de búsqueda/variantes/extracción ---
@@ -320,6 +720,30 @@ def normalize_client_variantes(payload_variantes: Optional[list[str]]) -> list[s
         result.append(v.strip())
     return result
 
+
+# Variantes ya generadas por prompt normalizado (sin acentos, orden de
+# palabras ni plurales): los prompts habituales no vuelven a llamar a OpenAI.
+VARIANT_CACHE = VariantCache.from_env()
+
+# Presupuesto de latencia de OpenAI en /buscar: pasado este tiempo se responde
+# con las variantes deterministas y la respuesta tardía se guarda en caché.
+# Con 0 o menos se espera siempre a OpenAI.
+BUSCAR_LLM_BUDGET_SECONDS: Optional[float] = float(os.getenv("BUSCAR_LLM_BUDGET_SECONDS", "4"))
+if BUSCAR_LLM_BUDGET_SECONDS <= 0:
+    BUSCAR_LLM_BUDGET_SECONDS = None
+# Todas las llamadas a OpenAI del backend pasan por este gateway (cliente
+# compartido, límites por modelo, coalescencia y consumo en ``llm_usage``).
+LLM_GATEWAY = LLMGateway.from_env()
+LLM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(1, int(os.getenv("BUSCAR_LLM_THREADS", "8"))), thread_name_prefix="llm"
+)
+
+
+@app.on_event("shutdown")
+def _cerrar_llm_executor():
+    LLM_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
 class BuscarPayload(BaseModel):
     cliente_ideal: str
     contexto_extra: Optional[str] = None
@@ -327,11 +751,18 @@ class BuscarPayload(BaseModel):
 
 
 @app.post("/buscar")
-def generar_variantes(payload: BuscarPayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+def generar_variantes(
+    payload: BuscarPayload,
+    background_tasks: BackgroundTasks,
+    usuario=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """
     Devuelve una pregunta de refinamiento si el prompt es ambiguo (y no se forzó),
     o bien una lista de 'variantes_generadas' para que el usuario seleccione.
     No consume créditos todavía; eso se hará al extraer/guardar.
+    Con ``SEARCH_PREFETCH`` activo, las variantes se buscan en Brave en segundo
+    plano para que la confirmación salga de la caché.
     """
     txt = (payload.cliente_ideal or "").strip()
     if not txt:
@@ -346,18 +777,6 @@ def generar_variantes(payload: BuscarPayload, usuario=Depends(get_current_user),
     def _norm(s: str) -> str:
         return " ".join((s or "").strip().split())
 
-    def _split_cat_geo(texto: str, contexto_extra: Optional[str]) -> tuple[str, str]:
-        t = _norm(texto)
-        low = t.lower()
-        cat, geo = t, ""
-        if " en " in low:
-            idx = low.rfind(" en ")
-            cat = _norm(t[:idx])
-            geo = _norm(t[idx + 4 :])
-        if not geo and contexto_extra:
-            geo = _norm(contexto_extra)
-        return (cat, geo)
-
     def _fallback_variants(texto: str, contexto_extra: Optional[str]) -> list[str]:
         cat, geo = _split_cat_geo(texto, contexto_extra)
         base_geo = f"{geo}" if geo else ""
@@ -448,18 +867,11 @@ def generar_variantes(payload: BuscarPayload, usuario=Depends(get_current_user),
     contexto_extra = payload.contexto_extra or ""
     cliente_ideal = txt
 
-    openai_client = None
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        try:
-            from openai import OpenAI
-
-            openai_client = OpenAI(api_key=api_key)
-        except Exception as exc:
-            logger.warning("No se pudo inicializar OpenAI: %s", exc)
-            openai_client = None
+    VARIANT_CACHE.warm(db, cliente_ideal, contexto_extra)
+    variantes = VARIANT_CACHE.get(cliente_ideal, contexto_extra)
 
-    if openai_client:
+    # Con las variantes en caché no se llama a OpenAI.
+    if variantes is None and LLM_GATEWAY.available:
         prompt_variantes = f"""
 Eres un generador de consultas para Google/Maps orientadas a scraping de leads.
 
@@ -478,13 +890,14 @@ Genera EXACTAMENTE 5 consultas de búsqueda diferentes y útiles (una por línea
 
 SALIDA: 5 líneas, cada línea es una consulta. Sin texto extra.
 """
-        try:
-            respuesta = openai_client.chat.completions.create(
+
+        def _variantes_llm() -> list[str]:
+            contenido = LLM_GATEWAY.complete(
+                [{"role": "user", "content": prompt_variantes}],
                 model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt_variantes}],
+                tenant=usuario.email_lower,
                 temperature=0.4,
-            )
-            contenido = respuesta.choices[0].message.content
+            ).text
             variantes = _clean_lines(contenido)
             variantes = [v for v in variantes if v]
             variantes = [v for v in variantes if len(v.split()) >= 2]
@@ -493,14 +906,40 @@ SALIDA: 5 líneas, cada línea es una consulta. Sin texto extra.
             if len(variantes) < 5:
                 faltan = 5 - len(variantes)
                 variantes += _fallback_variants(cliente_ideal, contexto_extra)[:faltan]
+            return variantes
+
+        def _guardar_tardias(futuro) -> None:
+            # La respuesta llegó fuera de presupuesto: queda en caché para la próxima vez.
+            if futuro.cancelled() or futuro.exception() is not None:
+                return
+            VARIANT_CACHE.put(cliente_ideal, contexto_extra, futuro.result())
+
+        futuro = LLM_EXECUTOR.submit(_variantes_llm)
+        try:
+            variantes = futuro.result(timeout=BUSCAR_LLM_BUDGET_SECONDS)
+            VARIANT_CACHE.put(cliente_ideal, contexto_extra, variantes)
+        except FuturesTimeoutError:
+            logger.info(
+                "OpenAI supera el presupuesto de %.1fs en /buscar, usando fallback",
+                BUSCAR_LLM_BUDGET_SECONDS,
+            )
+            futuro.add_done_callback(_guardar_tardias)
+            variantes = _fallback_variants(cliente_ideal, contexto_extra)
         except Exception as e:
             logger.warning("Fallo OpenAI en /buscar, usando fallback: %s", e)
             variantes = _fallback_variants(cliente_ideal, contexto_extra)
-    else:
+    elif variantes is None:
         variantes = _fallback_variants(cliente_ideal, contexto_extra)
+    VARIANT_CACHE.flush(db)
+    LLM_GATEWAY.flush_usage(db)
 
     variantes_display, has_extended_variant, extended_index = build_variantes_display(variantes)
 
+    if SEARCH_PREFETCH.enabled and os.getenv("BRAVE_API_KEY"):
+        background_tasks.add_task(
+            SEARCH_PREFETCH.prefetch, usuario.email_lower, variantes, _prefetch_variante
+        )
+
     return {
         "variantes_generadas": variantes,
         "variantes": variantes,
@@ -526,7 +965,7 @@ class VariantesPayload(BaseModel):
 
 
 @app.post("/buscar_variantes_seleccionadas")
-def buscar_dominios(payload: VariantesPayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+async def buscar_dominios(payload: VariantesPayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
     """
     Genera 'dominios' a partir de las variantes seleccionadas realizando
     consultas reales contra Brave Search.
@@ -535,7 +974,7 @@ def buscar_dominios(payload: VariantesPayload, usuario=Depends(get_current_user)
         raise HTTPException(400, detail="variantes vacío")
 
     queries = [v for v in payload.variantes if v]
-    dominios = search_domains(queries)
+    dominios = await search_domains_cached(queries, db=db)
     logger.info(
         "[buscar_variantes_seleccionadas] user=%s queries=%d dominios=%d",
         getattr(usuario, "email_lower", None),
@@ -552,6 +991,9 @@ def buscar_dominios(payload: VariantesPayload, usuario=Depends(get_current_user)
 class ExtraerMultiplesPayload(BaseModel):
     urls: List[str]
     pais: Optional[str] = "ES"
+    # Sustituye los dominios que el usuario ya tiene guardados por los
+    # siguientes de la lista de resultados.
+    rellenar: bool = True
 
 
 class LeadPayloadItem(BaseModel):
@@ -701,13 +1143,43 @@ def _upsert_info_extra(
 
     db.execute(stmt)
 
-@app.post("/extraer_multiples")
-def extraer_multiples(payload: ExtraerMultiplesPayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+class ExtraccionPreparada(NamedTuple):
+    plan_name: str
+    plan: PlanConfig
+    allowed: bool
+    remaining_quota: Optional[int]
+    leads_cap: Optional[int]
+    dominios: list[str]
+    ya_guardados: tuple[str, ...] = ()
+
+
+def _dominios_guardados(db: Session, user_email_lower: Optional[str], dominios: list[str]) -> set[str]:
+    """Dominios de la lista que el usuario ya tiene en ``leads_extraidos`` (una consulta)."""
+    if not user_email_lower or not dominios:
+        return set()
+    rows = (
+        db.query(LeadExtraido.dominio)
+        .filter(
+            LeadExtraido.user_email_lower == user_email_lower,
+            LeadExtraido.dominio.in_(dominios),
+        )
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def _preparar_extraccion(
+    urls: list[str], usuario, db: Session, rellenar: bool = True
+) -> ExtraccionPreparada:
     """
-    Extrae leads desde los dominios recibidos realizando un scraping ligero y
-    devuelve la estructura esperada por la UI: { payload_export, resultados }.
+    Valida la cuota de búsquedas y normaliza/recorta los dominios a extraer.
+
+    Los dominios que el usuario ya tiene guardados no se scrapean ni se
+    cobran (``/guardar_leads`` los descartaría por ``uix_leads_usuario_dominio``):
+    se devuelven aparte en ``ya_guardados`` y, con ``rellenar``, su hueco lo
+    ocupan los siguientes dominios de ``urls``.
     """
-    if not payload.urls:
+    if not urls:
         raise HTTPException(400, detail="urls vacío")
 
     svc = PlanService(db)
@@ -726,7 +1198,7 @@ def extraer_multiples(payload: ExtraerMultiplesPayload, usuario=Depends(get_curr
 
     raw_domains = []
     seen: set[str] = set()
-    for url in payload.urls:
+    for url in urls:
         dom = normalizar_dominio(url)
         if not dom:
             continue
@@ -735,27 +1207,82 @@ def extraer_multiples(payload: ExtraerMultiplesPayload, usuario=Depends(get_curr
         seen.add(dom)
         raw_domains.append(dom)
 
-    domains_slice = raw_domains[:MAX_LEADS_PER_EXTRACTION]
-    if not domains_slice:
+    if not raw_domains:
         raise HTTPException(400, detail="No se encontraron dominios válidos para extraer")
 
+    candidatos = raw_domains if rellenar else raw_domains[:MAX_LEADS_PER_EXTRACTION]
+    guardados = _dominios_guardados(db, getattr(usuario, "email_lower", None), candidatos)
+    domains_slice = [d for d in candidatos if d not in guardados][:MAX_LEADS_PER_EXTRACTION]
+    ya_guardados = tuple(d for d in raw_domains[:MAX_LEADS_PER_EXTRACTION] if d in guardados)
+    if ya_guardados:
+        logger.info(
+            "[extraer_multiples] user=%s ya_guardados=%d rellenados=%s",
+            getattr(usuario, "email_lower", None),
+            len(ya_guardados),
+            rellenar,
+        )
+
+    return ExtraccionPreparada(
+        plan_name, plan, allowed, remaining_quota, leads_cap, domains_slice, ya_guardados
+    )
+
+
+def _registrar_consumo_extraccion(db: Session, user_id: int, prep: ExtraccionPreparada, nuevos: int) -> None:
     try:
-        resultados = asyncio.run(scrape_domains(domains_slice))
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        try:
-            resultados = loop.run_until_complete(scrape_domains(domains_slice))
-        finally:
-            loop.close()
+        if prep.plan.type == "free":
+            consume_free_search(db, user_id, prep.plan_name)
+        elif prep.plan.lead_credits_month is not None:
+            consume_lead_credits(db, user_id, prep.plan_name, nuevos)
+        else:
+            return
+        db.commit()
+    except Exception as e:
+        logger.warning("[extraer_multiples] no se pudo registrar uso: %s", e)
+
+
+def _payload_export() -> dict[str, str]:
+    return {"filename": f"leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
+
+
+@app.post("/extraer_multiples")
+async def extraer_multiples(payload: ExtraerMultiplesPayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Extrae leads desde los dominios recibidos realizando un scraping ligero y
+    devuelve la estructura esperada por la UI: { payload_export, resultados }.
+    """
+    prep = await _en_db(_preparar_extraccion, payload.urls, usuario, db, rellenar=payload.rellenar)
+    return await _ejecutar_extraccion_async(prep, usuario, db)
+
+
+async def _ejecutar_extraccion_async(prep: ExtraccionPreparada, usuario, db: Session) -> dict[str, Any]:
+    """Scrapea los dominios preparados, aplica el recorte del plan y registra el consumo."""
+    plan_name, plan = prep.plan_name, prep.plan
+    allowed, remaining_quota, leads_cap = prep.allowed, prep.remaining_quota, prep.leads_cap
+    domains_slice = prep.dominios
+    if not domains_slice:
+        # Todo lo pedido ya estaba guardado: no hay nada que scrapear ni cobrar.
+        return {
+            "payload_export": _payload_export(),
+            "resultados": [],
+            "truncated": False,
+            "scrape_stats": ScrapeStats().as_dict(),
+            "ya_guardados": list(prep.ya_guardados),
+        }
+
+    resultados, scrape_stats = await scrape_domains(domains_slice, plan=plan, db=db)
 
     nuevos = len(resultados)
     truncated = False
 
     logger.info(
-        "[extraer_multiples] user=%s dominios_solicitados=%d dominios_utilizados=%d",
+        "[extraer_multiples] user=%s dominios_utilizados=%d "
+        "terminados=%d timeout=%d omitidos=%d elapsed_ms=%d",
         getattr(usuario, "email_lower", None),
-        len(payload.urls),
         nuevos,
+        scrape_stats.finished,
+        scrape_stats.timed_out,
+        scrape_stats.skipped,
+        scrape_stats.elapsed_ms,
     )
 
     if plan.type == "free":
@@ -763,35 +1290,207 @@ def extraer_multiples(payload: ExtraerMultiplesPayload, usuario=Depends(get_curr
             resultados = resultados[:leads_cap]
             nuevos = len(resultados)
             truncated = True
-        try:
-            consume_free_search(db, usuario.id, plan_name)
-            db.commit()
-        except Exception as e:
-            logger.warning("[extraer_multiples] no se pudo registrar uso: %s", e)
-    else:
-        nuevos_unicos = nuevos
-        if plan.lead_credits_month is not None:
-            if not allowed or (remaining_quota is not None and remaining_quota < nuevos_unicos):
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "error": "limit_exceeded",
-                        "resource": "lead_credits",
-                        "plan": plan_name,
-                        "remaining": max(remaining_quota or 0, 0),
-                    },
-                )
-            try:
-                consume_lead_credits(db, usuario.id, plan_name, nuevos_unicos)
-                db.commit()
-            except Exception as e:
-                logger.warning("[extraer_multiples] no se pudo registrar uso: %s", e)
+    elif plan.lead_credits_month is not None:
+        if not allowed or (remaining_quota is not None and remaining_quota < nuevos):
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "error": "limit_exceeded",
+                    "resource": "lead_credits",
+                    "plan": plan_name,
+                    "remaining": max(remaining_quota or 0, 0),
+                },
+            )
+    await _en_db(_registrar_consumo_extraccion, db, usuario.id, prep, nuevos)
 
-    payload_export = {
-        "filename": f"leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return {
+        "payload_export": _payload_export(),
+        "resultados": resultados,
+        "truncated": truncated,
+        "scrape_stats": scrape_stats.as_dict(),
+        "ya_guardados": list(prep.ya_guardados),
     }
 
-    return {"payload_export": payload_export, "resultados": resultados, "truncated": truncated}
+
+# ---------------------------------------------------------------------------
+# Cola de extracciones (procesada por backend/worker.py)
+# ---------------------------------------------------------------------------
+EXTRACTION_JOB_MAX_ATTEMPTS = max(1, int(os.getenv("EXTRACTION_JOB_MAX_ATTEMPTS", "3")))
+
+
+def _job_estado(queue: JobQueue, job: ExtractionJob) -> dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "estado": job.status,
+        "prioridad": job.priority,
+        "posicion": queue.position(job),
+        "intentos": job.attempts,
+        "creado": job.created_at.isoformat() if job.created_at else None,
+        "iniciado": job.started_at.isoformat() if job.started_at else None,
+        "finalizado": job.finished_at.isoformat() if job.finished_at else None,
+        "error": job.error,
+    }
+
+
+@app.post("/extraer_multiples/jobs", status_code=202)
+def encolar_extraccion(payload: ExtraerMultiplesPayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Encola la extracción para que la procese un worker. Los trabajos se
+    reclaman por ``queue_priority`` del plan, de modo que los planes altos
+    adelantan a los gratuitos cuando hay carga.
+    """
+    prep = _preparar_extraccion(payload.urls, usuario, db, rellenar=payload.rellenar)
+    queue = JobQueue(db, max_attempts=EXTRACTION_JOB_MAX_ATTEMPTS)
+    job = queue.enqueue(
+        user_id=usuario.id,
+        user_email_lower=usuario.email_lower,
+        plan_name=prep.plan_name,
+        priority=prep.plan.queue_priority,
+        # Se guardan las URLs originales: el worker vuelve a preparar la
+        # extracción (y a descartar lo ya guardado) cuando procesa el trabajo.
+        payload={"urls": payload.urls, "pais": payload.pais, "rellenar": payload.rellenar},
+    )
+    logger.info(
+        "[extraer_multiples/jobs] user=%s job=%s prioridad=%s dominios=%d",
+        usuario.email_lower,
+        job.id,
+        job.priority,
+        len(prep.dominios),
+    )
+    return _job_estado(queue, job)
+
+
+def _get_job_or_404(queue: JobQueue, job_id: int, usuario) -> ExtractionJob:
+    job = queue.get(job_id, usuario.email_lower)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
+
+@app.get("/extraer_multiples/jobs/{job_id}")
+def estado_extraccion(job_id: int, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+    queue = JobQueue(db)
+    return _job_estado(queue, _get_job_or_404(queue, job_id, usuario))
+
+
+@app.get("/extraer_multiples/jobs/{job_id}/resultado")
+def resultado_extraccion(job_id: int, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+    """Devuelve el mismo cuerpo que /extraer_multiples una vez terminado el trabajo."""
+    queue = JobQueue(db)
+    job = _get_job_or_404(queue, job_id, usuario)
+    if job.status == JOB_FAILED:
+        error = job.error or {}
+        raise HTTPException(
+            status_code=int(error.get("status_code") or 500),
+            detail=error.get("detail") or "Error al extraer los datos",
+        )
+    if job.status != JOB_DONE:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "job_pending", "estado": job.status, "posicion": queue.position(job)},
+        )
+    return job.result
+
+
+def _formatear_evento(evento: dict[str, Any], formato: str) -> str:
+    data = json.dumps(evento, ensure_ascii=False, default=str)
+    if formato == "sse":
+        return f"event: {evento['tipo']}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+
+@app.post("/extraer_multiples/stream")
+async def extraer_multiples_stream(
+    payload: ExtraerMultiplesPayload,
+    formato: Literal["ndjson", "sse"] = Query("ndjson"),
+    usuario=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Variante en streaming de /extraer_multiples: emite un registro
+    ``{"tipo": "resultado"}`` por dominio en cuanto termina y, al final, un
+    ``{"tipo": "resumen"}`` con el recorte aplicado, el consumo registrado y
+    los dominios omitidos por estar ya guardados.
+    Como el recorte se decide sobre la marcha, los planes de pago se limitan
+    a los créditos restantes en lugar de rechazar la extracción completa.
+    """
+    prep = await _en_db(_preparar_extraccion, payload.urls, usuario, db, rellenar=payload.rellenar)
+    plan = prep.plan
+    limite: Optional[int] = None
+    if plan.type == "free":
+        limite = prep.leads_cap
+    elif plan.lead_credits_month is not None:
+        limite = max(prep.remaining_quota or 0, 0)
+        if not prep.allowed or limite <= 0:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "error": "limit_exceeded",
+                    "resource": "lead_credits",
+                    "plan": prep.plan_name,
+                    "remaining": limite,
+                },
+            )
+
+    user_id = usuario.id
+    user_email_lower = getattr(usuario, "email_lower", None)
+
+    async def eventos():
+        started = time.monotonic()
+        stats = ScrapeStats(requested=len(prep.dominios))
+        emitidos = 0
+        truncated = False
+        stream_db = SessionLocal()
+        try:
+            resultados = iter_scrape_domains(prep.dominios, plan=plan, db=stream_db)
+            async with aclosing(resultados):
+                async for resultado, estado in resultados:
+                    if limite is not None and emitidos >= limite:
+                        truncated = True
+                        break
+                    stats.record(estado)
+                    emitidos += 1
+                    yield _formatear_evento(
+                        {"tipo": "resultado", "estado": estado, "resultado": resultado}, formato
+                    )
+            stats.elapsed_ms = int((time.monotonic() - started) * 1000)
+            logger.info(
+                "[extraer_multiples/stream] user=%s emitidos=%d truncated=%s stats=%s",
+                user_email_lower,
+                emitidos,
+                truncated,
+                stats.as_dict(),
+            )
+            yield _formatear_evento(
+                {
+                    "tipo": "resumen",
+                    "total": emitidos,
+                    "truncated": truncated,
+                    "consumo": {
+                        "resource": "searches" if plan.type == "free" else "lead_credits",
+                        "amount": int(emitidos > 0) if plan.type == "free" else emitidos,
+                    },
+                    "payload_export": _payload_export(),
+                    "scrape_stats": stats.as_dict(),
+                    "ya_guardados": list(prep.ya_guardados),
+                },
+                formato,
+            )
+        finally:
+            # También si el cliente corta el stream: se cobra lo ya enviado.
+            try:
+                if emitidos > 0:
+                    with anyio.CancelScope(shield=True):
+                        await _en_db(_registrar_consumo_extraccion, stream_db, user_id, prep, emitidos)
+            finally:
+                stream_db.close()
+
+    media_type = "text/event-stream" if formato == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        eventos(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/guardar_leads")
@@ -898,6 +1597,29 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/cache")
+def health_cache():
+    return {
+        "domain_contacts": DOMAIN_CACHE.stats(),
+        "search_results": SEARCH_CACHE.stats(),
+        "search_variants": VARIANT_CACHE.stats(),
+        "search_prefetch": SEARCH_PREFETCH.stats(),
+        "domain_health": DOMAIN_HEALTH.stats(),
+        "dns": DNS_CACHE.stats(),
+        "contact_pages": CONTACT_PAGES.stats(),
+    }
+
+
+@app.get("/health/llm")
+def health_llm():
+    return LLM_GATEWAY.stats()
+
+
+@app.get("/health/http")
+def health_http():
+    return {**HTTP_POOLS.stats(), "parse_pool": PARSE_POOL.stats()}
+
+
 @app.get("/health/usage")
 def health_usage(db: Session = Depends(get_db)):
     row = (
@@ -2376,6 +3098,66 @@ def ia_endpoint(payload: AIPayload, usuario=Depends(get_current_user), db: Sessi
     return {"ok": True, "remaining_today": remaining_today}
 
 
+# Modelo del asistente virtual; lo fija el backend, no el frontend.
+ASISTENTE_MODELO = "gpt-4o-mini"
+
+
+class AsistentePayload(BaseModel):
+    messages: List[dict]
+    tools: Optional[List[dict]] = None
+    tool_choice: Optional[str] = None
+
+
+def _mensaje_asistente(resultado) -> dict:
+    choices = getattr(resultado.response, "choices", None)
+    if choices:
+        return choices[0].message.model_dump(exclude_none=True)
+    return {"role": "assistant", "content": resultado.text}
+
+
+@app.post("/ia/completar")
+def ia_completar(payload: AsistentePayload, usuario=Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Turno del asistente virtual: recibe la conversación (y las herramientas
+    disponibles) y devuelve el mensaje del modelo con sus ``tool_calls``.
+
+    La llamada pasa por ``LLM_GATEWAY`` y su consumo se anota al usuario en
+    ``llm_usage``, así el frontend no necesita la clave de OpenAI ni acceso a
+    la base de datos. No descuenta mensajes IA (eso lo hace ``/ia``) pero
+    exige que al usuario le quede cuota hoy.
+    """
+    if not LLM_GATEWAY.available:
+        raise HTTPException(status_code=503, detail="Asistente no configurado: falta OPENAI_API_KEY")
+    plan_name, _ = PlanService(db).get_effective_plan(usuario)
+    ok, remaining = can_use_ai(db, usuario.id, plan_name)
+    if not ok:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "limit_exceeded",
+                "resource": "ai",
+                "plan": plan_name,
+                "remaining": max(remaining or 0, 0),
+            },
+        )
+    params = {"tools": payload.tools, "tool_choice": payload.tool_choice}
+    try:
+        resultado = LLM_GATEWAY.complete(
+            payload.messages,
+            model=ASISTENTE_MODELO,
+            tenant=usuario.email_lower,
+            **{k: v for k, v in params.items() if v},
+        )
+    except LLMBusyError:
+        raise HTTPException(status_code=429, detail="El servidor de IA está ocupado")
+    except Exception as exc:
+        logger.warning("Fallo OpenAI en /ia/completar: %s", exc)
+        raise HTTPException(status_code=500, detail="Fallo del proveedor de IA")
+    finally:
+        LLM_GATEWAY.flush_usage(db)
+    return {"message": _mensaje_asistente(resultado)}
+
+
 class LeadsPayload(BaseModel):
     nuevos: int
     duplicados: int = 0
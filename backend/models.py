@@ -16,6 +16,7 @@ from sqlalchemy import (
     Index,
     event,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import validates
 from backend.database import Base
 import enum
@@ -336,3 +337,139 @@ class LeadEstado(Base):
     @validates("user_email_lower")
     def _lower(self, key, value):
         return (value or "").strip().lower()
+
+
+class DomainContact(Base):
+    """Contactos extraídos por dominio, compartidos entre usuarios (caché)."""
+
+    __tablename__ = "domain_contact_cache"
+
+    dominio = Column(String, primary_key=True)
+    email = Column(String, nullable=True)
+    telefono = Column(String, nullable=True)
+    http_status = Column(Integer, nullable=True)
+    fetched_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+    # Página donde apareció el contacto y sus validadores HTTP, para
+    # revalidarla con una petición condicional al caducar la entrada.
+    source_url = Column(String, nullable=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+
+
+class SearchQueryCache(Base):
+    """Resultados de Brave por consulta normalizada (caché opcional)."""
+
+    __tablename__ = "search_query_cache"
+
+    cache_key = Column(String, primary_key=True)
+    query = Column(Text, nullable=False)
+    count = Column(Integer, nullable=False)
+    page = Column(Integer, nullable=False, server_default=text("0"))
+    urls = Column(JSONB, nullable=False)
+    fetched_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+
+
+class SearchVariantCache(Base):
+    """Variantes generadas por /buscar por prompt normalizado (caché opcional)."""
+
+    __tablename__ = "search_variant_cache"
+
+    cache_key = Column(String, primary_key=True)
+    variantes = Column(JSONB, nullable=False)
+    fetched_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+
+
+class LLMUsage(Base):
+    """Consumo de LLM por usuario, día y modelo (lo escribe backend/core/llm_gateway.py)."""
+
+    __tablename__ = "llm_usage"
+
+    id = Column(BigInteger, primary_key=True)
+    # "" para llamadas sin usuario (scraper, scripts).
+    user_email_lower = Column(String, nullable=False)
+    period_yyyymmdd = Column(String(8), nullable=False)
+    model = Column(String, nullable=False)
+    requests = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    errors = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    coalesced = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    prompt_tokens = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    completion_tokens = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    latency_ms = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=func.now(),
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_email_lower", "period_yyyymmdd", "model", name="llm_usage_user_period_model_uk"
+        ),
+        Index("idx_llm_usage_user", "user_email_lower"),
+    )
+
+
+class ExtractionJob(Base):
+    """Extracción encolada; los workers la reclaman por prioridad de plan."""
+
+    __tablename__ = "extraction_jobs"
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(
+        Integer,
+        ForeignKey("usuarios.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    user_email_lower = Column(String, nullable=False, index=True)
+    plan = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    payload = Column(JSONB, nullable=False)
+    result = Column(JSONB, nullable=True)
+    error = Column(JSONB, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    worker_id = Column(String, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_extraction_jobs_claim",
+            "status",
+            priority.desc(),
+            "created_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+    )
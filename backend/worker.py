@@ -0,0 +1,134 @@
+"""Worker de extracciones encoladas en ``extraction_jobs``.
+
+Uso:
+    python -m backend.worker            # bucle continuo
+    python -m backend.worker --once     # procesa como mucho un trabajo y sale
+
+Se pueden lanzar varios workers en paralelo: cada uno reclama los trabajos con
+``FOR UPDATE SKIP LOCKED`` por orden de prioridad del plan.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+
+from backend.core.job_queue import JobQueue
+from backend.database import SessionLocal
+from backend.main import (
+    EXTRACTION_JOB_MAX_ATTEMPTS,
+    _ejecutar_extraccion_async,
+    _preparar_extraccion,
+)
+from backend.models import ExtractionJob, Usuario
+
+logger = logging.getLogger("worker")
+
+POLL_SECONDS = float(os.getenv("EXTRACTION_WORKER_POLL_SECONDS", "2"))
+STALE_MINUTES = float(os.getenv("EXTRACTION_JOB_STALE_MINUTES", "10"))
+
+_stop = False
+
+
+def _handle_stop(signum, frame) -> None:
+    global _stop
+    _stop = True
+    logger.info("[worker] señal %s recibida; terminando tras el trabajo actual", signum)
+
+
+def procesar_job(db, queue: JobQueue, job: ExtractionJob) -> None:
+    """Ejecuta un trabajo reclamado y guarda su resultado o su error."""
+    usuario: Optional[Usuario] = db.get(Usuario, job.user_id)
+    if usuario is None:
+        queue.fail(job, {"status_code": 404, "detail": "Usuario no encontrado"})
+        return
+    try:
+        payload = job.payload or {}
+        prep = _preparar_extraccion(
+            list(payload.get("urls") or []), usuario, db, rellenar=payload.get("rellenar", True)
+        )
+        resultado = asyncio.run(_ejecutar_extraccion_async(prep, usuario, db))
+    except HTTPException as exc:
+        queue.fail(job, {"status_code": exc.status_code, "detail": exc.detail})
+        return
+    except Exception as exc:
+        logger.exception("[worker] job=%s falló", job.id)
+        queue.fail(job, {"status_code": 500, "detail": str(exc)})
+        return
+    queue.complete(job, resultado)
+
+
+def run_once(worker_id: str) -> bool:
+    """Reclama y procesa un trabajo. Devuelve False si la cola estaba vacía."""
+    db = SessionLocal()
+    try:
+        queue = JobQueue(db, max_attempts=EXTRACTION_JOB_MAX_ATTEMPTS)
+        job = queue.claim(worker_id)
+        if job is None:
+            return False
+        started = time.monotonic()
+        procesar_job(db, queue, job)
+        logger.info(
+            "[worker] job=%s prioridad=%s terminado en %d ms",
+            job.id,
+            job.priority,
+            int((time.monotonic() - started) * 1000),
+        )
+        return True
+    finally:
+        db.close()
+
+
+def requeue_stale() -> None:
+    db = SessionLocal()
+    try:
+        JobQueue(db, max_attempts=EXTRACTION_JOB_MAX_ATTEMPTS).requeue_stale(
+            timedelta(minutes=STALE_MINUTES)
+        )
+    except Exception as exc:
+        logger.warning("[worker] no se pudieron recuperar trabajos colgados: %s", exc)
+    finally:
+        db.close()
+
+
+def run_worker(poll_seconds: float = POLL_SECONDS, once: bool = False) -> None:
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+    logger.info("[worker] %s escuchando extraction_jobs", worker_id)
+
+    last_sweep = 0.0
+    while not _stop:
+        if time.monotonic() - last_sweep > 60:
+            requeue_stale()
+            last_sweep = time.monotonic()
+        try:
+            trabajado = run_once(worker_id)
+        except Exception as exc:
+            logger.exception("[worker] error reclamando trabajo: %s", exc)
+            trabajado = False
+        if once:
+            return
+        if not trabajado:
+            time.sleep(poll_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker de extracciones de OpenSells")
+    parser.add_argument("--once", action="store_true", help="procesa un trabajo y sale")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="segundos entre sondeos")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    run_worker(poll_seconds=args.poll, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
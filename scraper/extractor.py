@@ -1,19 +1,77 @@
+import json
+import threading
+from collections import OrderedDict
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString
 import re
-import phonenumbers
 import os
 from dotenv import load_dotenv  # ✅ Carga automática de variables
-from openai import OpenAI
 import logging
 
+from backend.core.html_stream import ChunkScanner
+from backend.core.llm_gateway import LLMGateway
+from backend.core.page_parse import (
+    PHONE_RE as TELEFONO_RE,
+    ParsePool,
+    discard_phone as descartar_telefono,
+    first_contact,
+    parse_phone as _parsear_telefono,
+    shared_pool,
+    valid_phone as _normalizar_telefono,
+)
+
 # Cargar variables desde .env
 load_dotenv()
 
-# Inicializar cliente OpenAI con la clave cargada
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_gateway = None
+# Tenant de ``llm_usage`` cuando la extracción no se hace en nombre de un usuario.
+USUARIO_IA_POR_DEFECTO = "scraper"
+
+
+def _gateway_ia():
+    """Gateway LLM del scraper (creado en el primer uso: el módulo se importa sin clave)."""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway.from_env()
+    return _gateway
+
 logger = logging.getLogger(__name__)
 
+# Tope de bytes descargados por página; el resto del cuerpo no se lee.
+MAX_HTML_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(512 * 1024)))
+TIPOS_HTML = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+def es_html(content_type):
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in TIPOS_HTML
+
+
+def leer_html_limitado(respuesta, max_bytes=MAX_HTML_BYTES, parar=None):
+    """
+    Lee el cuerpo por trozos hasta ``max_bytes`` y lo decodifica.
+
+    Con ``parar`` cada trozo se analiza según llega (con el solape y las
+    palabras cortadas que gestiona ``ChunkScanner``) y la lectura termina en
+    cuanto devuelve True; el texto leído hasta ese punto es el resultado.
+    """
+    lector = ChunkScanner(respuesta.encoding, max_bytes)
+    for trozo in respuesta.iter_content(chunk_size=16384):
+        ventana = lector.feed(trozo)
+        if parar is not None and parar(ventana):
+            break
+        if lector.truncated:
+            break
+    else:
+        lector.finish()
+    return lector.text
+
+
+def hay_contacto(pais="ES"):
+    """Criterio de parada de ``leer_html_limitado``: primer email o teléfono válido."""
+    return lambda texto: any(first_contact(texto, pais))
+
 def validar_emails_por_regla(emails, dominio_base):
     preferidos = [e for e in emails if any(p in e for p in ["info", "contact", "hola", dominio_base])]
     return preferidos if preferidos else emails
@@ -22,95 +80,330 @@ def validar_telefonos_por_regla(telefonos):
     preferidos = [t for t in telefonos if not any(f in t.lower() for f in ["fax", "urgencias", "emergencia"])]
     return preferidos if preferidos else list(telefonos)
 
-def elegir_contactos_por_ia(lista, tipo):
+# --- Elección de contactos con IA (por lotes y con caché) ---
+PREFIJOS_CONTACTO = ("info", "contacto", "contact", "hola")
+IA_CACHE_MAX = int(os.getenv("SCRAPER_IA_CACHE_MAX", "5000"))
+IA_LOTE_MAX = int(os.getenv("SCRAPER_IA_BATCH_SIZE", "20"))
+
+_cache_ia = OrderedDict()
+_cache_ia_lock = threading.Lock()
+_stats_ia = {"reglas": 0, "cache": 0, "ia": 0, "llamadas": 0, "errores": 0}
+
+
+def _clave_cache_ia(lista, tipo):
+    return (tipo, tuple(sorted(set(lista))))
+
+
+def _cache_ia_get(clave):
+    with _cache_ia_lock:
+        valor = _cache_ia.get(clave)
+        if valor is not None:
+            _cache_ia.move_to_end(clave)
+            return list(valor)
+    return None
+
+
+def _cache_ia_put(clave, valor):
+    with _cache_ia_lock:
+        _cache_ia[clave] = list(valor)
+        _cache_ia.move_to_end(clave)
+        while len(_cache_ia) > IA_CACHE_MAX:
+            _cache_ia.popitem(last=False)
+
+
+def estadisticas_ia():
+    with _cache_ia_lock:
+        return {**_stats_ia, "entradas_cache": len(_cache_ia)}
+
+
+def decision_por_reglas(lista, tipo, dominio_base=None):
+    """Elección sin IA cuando las heurísticas son concluyentes; None si no lo son."""
     if len(lista) <= 2:
-        return lista
+        return list(lista)
+    if tipo == "email":
+        sufijo = f"@{dominio_base.lower()}" if dominio_base else None
+        fuertes = [
+            e for e in lista
+            if e.split("@", 1)[0].lower() in PREFIJOS_CONTACTO
+            and (sufijo is None or e.lower().endswith(sufijo))
+        ]
+        if 1 <= len(fuertes) <= 2:
+            return fuertes
+    return None
+
 
-    prompt = f"""
-Tengo esta lista de {tipo}s obtenidos de una página web de un negocio:
+def _prompt_lote(grupos):
+    bloques = []
+    for n, (lista, tipo) in enumerate(grupos, start=1):
+        bloques.append(f"Grupo {n} ({tipo}s):\n" + "\n".join(lista))
+    return f"""
+Tengo varios grupos de contactos obtenidos de páginas web de negocios:
 
-{chr(10).join(lista)}
+{chr(10).join(bloques)}
 
-¿Cuáles parecen más adecuados para contactar con la empresa? Puedes devolver hasta dos si tienen igual importancia. Responde solo con los {tipo}s separados por coma, sin explicar nada más.
+Para cada grupo, ¿cuáles parecen más adecuados para contactar con la empresa? Puedes devolver hasta dos por grupo si tienen igual importancia. Responde solo con un objeto JSON del tipo {{"1": ["..."], "2": ["..."]}}, sin explicar nada más.
 """
 
+
+def _leer_respuesta_lote(texto):
+    texto = (texto or "").strip()
+    inicio, fin = texto.find("{"), texto.rfind("}")
+    if inicio < 0 or fin < inicio:
+        return {}
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
-        )
-        texto = response.choices[0].message.content.strip()
-        return [x.strip() for x in texto.split(",") if x.strip()]
-    except Exception as e:
-        logger.warning(f"Error con OpenAI: {e}")
-        return lista[:2]
+        data = json.loads(texto[inicio:fin + 1])
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _consultar_ia_lote(grupos, usuario=None):
+    """Una única llamada al modelo para todos los ``grupos`` (lista, tipo), imputada a ``usuario``."""
+    _stats_ia["llamadas"] += 1
+    contenido = _gateway_ia().complete(
+        [{"role": "user", "content": _prompt_lote(grupos)}],
+        model="gpt-3.5-turbo",
+        tenant=usuario or USUARIO_IA_POR_DEFECTO,
+        temperature=0.2,
+    ).text
+    data = _leer_respuesta_lote(contenido)
+    elegidos = []
+    for n, (lista, _tipo) in enumerate(grupos, start=1):
+        respuesta = data.get(str(n)) or []
+        if isinstance(respuesta, str):
+            respuesta = [x.strip() for x in respuesta.split(",")]
+        validos = [x for x in respuesta if isinstance(x, str) and x.strip() in lista]
+        elegidos.append([x.strip() for x in validos] or None)
+    return elegidos
+
+
+def elegir_contactos_por_ia_lote(peticiones, usuario=None):
+    """
+    Resuelve muchas elecciones ``(lista, tipo[, dominio_base])`` de golpe: primero
+    reglas y caché, y lo que quede se agrupa en prompts de hasta
+    ``IA_LOTE_MAX`` grupos. Devuelve una lista por petición, en el mismo orden.
+    El uso de IA se imputa a ``usuario`` (email) en ``llm_usage``.
+    """
+    resultados = [None] * len(peticiones)
+    pendientes = {}
+    for i, peticion in enumerate(peticiones):
+        lista, tipo = list(peticion[0]), peticion[1]
+        dominio_base = peticion[2] if len(peticion) > 2 else None
+        por_reglas = decision_por_reglas(lista, tipo, dominio_base)
+        if por_reglas is not None:
+            _stats_ia["reglas"] += 1
+            resultados[i] = por_reglas
+            continue
+        clave = _clave_cache_ia(lista, tipo)
+        cacheado = _cache_ia_get(clave)
+        if cacheado is not None:
+            _stats_ia["cache"] += 1
+            resultados[i] = cacheado
+            continue
+        # Peticiones repetidas dentro del mismo lote comparten una sola consulta.
+        pendientes.setdefault(clave, (lista, tipo, []))[2].append(i)
+
+    grupos = list(pendientes.items())
+    for desde in range(0, len(grupos), max(1, IA_LOTE_MAX)):
+        tramo = grupos[desde:desde + max(1, IA_LOTE_MAX)]
+        try:
+            elegidos = _consultar_ia_lote([(lista, tipo) for _, (lista, tipo, _) in tramo], usuario)
+        except Exception as e:
+            _stats_ia["errores"] += 1
+            logger.warning(f"Error con OpenAI: {e}")
+            elegidos = [None] * len(tramo)
+        for (clave, (lista, _tipo, indices)), eleccion in zip(tramo, elegidos):
+            if eleccion:
+                _stats_ia["ia"] += 1
+                _cache_ia_put(clave, eleccion)
+            for i in indices:
+                resultados[i] = list(eleccion) if eleccion else lista[:2]
+    return resultados
+
 
-def extraer_datos_desde_url(url: str, pais: str = "ES") -> dict:
+def elegir_contactos_por_ia(lista, tipo, dominio_base=None, usuario=None):
+    return elegir_contactos_por_ia_lote([(lista, tipo, dominio_base)], usuario)[0]
+
+
+# Parser de HTML: lxml si está instalado (bastante más rápido), si no el de la
+# librería estándar. Se puede forzar con SCRAPER_HTML_PARSER.
+def _elegir_parser():
+    preferido = os.getenv("SCRAPER_HTML_PARSER")
+    if preferido:
+        return preferido
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return "html.parser"
+    return "lxml"
+
+
+PARSER_HTML = _elegir_parser()
+EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+REDES = ("facebook", "instagram", "linkedin")
+TIPOS_ORGANIZACION = {"organization", "localbusiness", "corporation", "store", "professionalservice"}
+
+
+def _organizaciones_json_ld(texto):
+    """Nodos Organization/LocalBusiness de un bloque JSON-LD (incluye ``@graph``)."""
+    try:
+        data = json.loads(texto)
+    except (TypeError, ValueError):
+        return
+    pendientes = [data]
+    while pendientes:
+        nodo = pendientes.pop()
+        if isinstance(nodo, list):
+            pendientes.extend(nodo)
+            continue
+        if not isinstance(nodo, dict):
+            continue
+        pendientes.extend(nodo.get("@graph") or [])
+        tipos = nodo.get("@type") or []
+        tipos = [tipos] if isinstance(tipos, str) else tipos
+        if any(str(t).lower() in TIPOS_ORGANIZACION for t in tipos):
+            yield nodo
+
+
+def extraer_contactos_html(html: str, url: str, pais: str = "ES") -> dict:
+    """
+    Extrae en una sola pasada sobre el árbol los enlaces ``mailto:``/``tel:``,
+    los datos JSON-LD de la organización, las redes sociales, el nombre del
+    negocio y los emails y teléfonos escritos en los nodos de texto (no se
+    vuelve a recorrer el HTML en bruto). Devuelve los candidatos sin filtrar
+    (sin reglas ni IA).
+    """
+    soup = BeautifulSoup(html, PARSER_HTML)
+    emails, telefonos_raw = [], []
+    redes = {red: [] for red in REDES}
+    titulo = h1 = og_site_name = nombre_ld = None
+
+    for tag in soup.descendants:
+        if isinstance(tag, NavigableString):
+            emails.extend(EMAIL_RE.findall(tag))
+            telefonos_raw.extend(TELEFONO_RE.findall(tag))
+            continue
+        nombre_tag = tag.name
+        if nombre_tag == "a":
+            href = (tag.get("href") or "").strip()
+            bajo = href.lower()
+            if bajo.startswith("mailto:"):
+                emails.append(href[7:].split("?", 1)[0].strip())
+            elif bajo.startswith("tel:"):
+                telefonos_raw.append(href[4:].strip())
+            else:
+                for red in REDES:
+                    if f"{red}.com" in bajo:
+                        redes[red].append(href)
+                        break
+        elif nombre_tag == "title":
+            if titulo is None and tag.string:
+                titulo = tag.string.strip() or None
+        elif nombre_tag == "h1":
+            if h1 is None:
+                h1 = tag.get_text(strip=True) or None
+        elif nombre_tag == "meta":
+            if og_site_name is None and tag.get("property") == "og:site_name":
+                og_site_name = (tag.get("content") or "").strip() or None
+        elif nombre_tag == "script" and (tag.get("type") or "").lower() == "application/ld+json":
+            for org in _organizaciones_json_ld(tag.string):
+                if org.get("email"):
+                    emails.append(str(org["email"]).replace("mailto:", "").strip())
+                if org.get("telephone"):
+                    telefonos_raw.append(str(org["telephone"]))
+                nombre_ld = nombre_ld or org.get("name")
+                same_as = org.get("sameAs") or []
+                for enlace in [same_as] if isinstance(same_as, str) else same_as:
+                    for red in REDES:
+                        if f"{red}.com" in str(enlace).lower():
+                            redes[red].append(str(enlace))
+
+    telefonos = []
+    for raw in dict.fromkeys(telefonos_raw):
+        numero = _normalizar_telefono(raw, pais)
+        if numero:
+            telefonos.append(numero)
+
+    return {
+        "url": url,
+        "nombre_negocio": titulo or h1 or og_site_name or nombre_ld,
+        "emails": list(dict.fromkeys(e for e in emails if e)),
+        "telefonos": list(dict.fromkeys(telefonos)),
+        "redes_sociales": {red: list(dict.fromkeys(v)) for red, v in redes.items()},
+    }
+
+
+def extraer_contactos_lote(documentos, pais: str = "ES", pool: ParsePool = None) -> list:
+    """
+    Aplica ``extraer_contactos_html`` a muchos ``(url, html)`` ya descargados.
+
+    Los documentos grandes se reparten entre los procesos del pool de análisis
+    compartido con el backend (``PARSE_POOL_WORKERS`` y
+    ``PARSE_POOL_THRESHOLD_BYTES``) mientras los pequeños se analizan aquí;
+    el orden del resultado es el de ``documentos``.
+    """
+    pool = shared_pool() if pool is None else pool
+    return pool.map(
+        extraer_contactos_html,
+        [(html or "", url, pais) for url, html in documentos],
+        [len(html or "") for _, html in documentos],
+    )
+
+
+def _dominio_base(url):
+    return re.sub(r"https?://(www\.)?", "", url).split("/")[0]
+
+
+def _elegir_contactos_lote(extraidos, usuario=None):
+    """Filtra por reglas y elige emails y teléfonos de todos los documentos con una sola ronda de IA."""
+    peticiones, destinos = [], []
+    filtrados = []
+    for n, datos in enumerate(extraidos):
+        dominio_base = _dominio_base(datos["url"])
+        emails = validar_emails_por_regla(datos["emails"], dominio_base)
+        telefonos = validar_telefonos_por_regla(datos["telefonos"])
+        filtrados.append({"emails": emails, "telefonos": telefonos})
+        if len(emails) > 1:
+            peticiones.append((emails, "email", dominio_base))
+            destinos.append((n, "emails"))
+        if len(telefonos) > 1:
+            peticiones.append((telefonos, "teléfono", dominio_base))
+            destinos.append((n, "telefonos"))
+
+    for (n, campo), eleccion in zip(destinos, elegir_contactos_por_ia_lote(peticiones, usuario)):
+        filtrados[n][campo] = eleccion
+
+    return [
+        {
+            "url": datos["url"],
+            "nombre_negocio": datos["nombre_negocio"],
+            "emails": elegidos["emails"],
+            "telefonos": elegidos["telefonos"],
+            "redes_sociales": datos["redes_sociales"],
+        }
+        for datos, elegidos in zip(extraidos, filtrados)
+    ]
+
+
+def extraer_datos_lote(documentos, pais: str = "ES", usuario=None) -> list:
+    """Como ``extraer_datos_desde_url`` pero para muchos ``(url, html)`` ya descargados."""
+    return _elegir_contactos_lote(extraer_contactos_lote(documentos, pais), usuario)
+
+
+def extraer_datos_desde_url(url: str, pais: str = "ES", usuario=None) -> dict:
     try:
         headers = {
             "User-Agent": "Mozilla/5.0 (compatible; WrapperBot/1.0)"
         }
-        respuesta = requests.get(url, headers=headers, timeout=15)
-        respuesta.raise_for_status()
-        html = respuesta.text
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # === EMAILS ===
-        emails = list(set(re.findall(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", html)))
-
-        dominio_base = re.sub(r"https?://(www\.)?", "", url).split("/")[0]
-        emails_filtrados = validar_emails_por_regla(emails, dominio_base)
-        emails_finales = elegir_contactos_por_ia(emails_filtrados, "email") if len(emails_filtrados) > 1 else emails_filtrados
-
-        # === TELÉFONOS ===
-        raw_telefonos = re.findall(r"(?:\+?\d{1,3}[\s\-()]*)?(?:\d[\d\s\-()]{7,}\d)", html)
-        telefonos = set()
-
-        for raw in raw_telefonos:
-            try:
-                parsed = phonenumbers.parse(raw, pais)
-                if phonenumbers.is_possible_number(parsed) and phonenumbers.is_valid_number(parsed):
-                    numero_formateado = phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
-                    telefonos.add(numero_formateado)
-            except phonenumbers.NumberParseException:
-                continue
-
-        telefonos_filtrados = validar_telefonos_por_regla(telefonos)
-        telefonos_finales = elegir_contactos_por_ia(telefonos_filtrados, "teléfono") if len(telefonos_filtrados) > 1 else telefonos_filtrados
-
-        # === REDES SOCIALES ===
-        redes = {"facebook": set(), "instagram": set(), "linkedin": set()}
-        for link in soup.find_all("a", href=True):
-            href = link['href']
-            if "facebook.com" in href:
-                redes["facebook"].add(href)
-            elif "instagram.com" in href:
-                redes["instagram"].add(href)
-            elif "linkedin.com" in href:
-                redes["linkedin"].add(href)
-        redes = {k: list(v) for k, v in redes.items()}
-
-        # === NOMBRE ===
-        nombre = None
-        if soup.title and soup.title.string:
-            nombre = soup.title.string.strip()
-        if not nombre:
-            h1 = soup.find("h1")
-            if h1:
-                nombre = h1.get_text(strip=True)
-        if not nombre:
-            og_site_name = soup.find("meta", property="og:site_name")
-            if og_site_name and og_site_name.get("content"):
-                nombre = og_site_name["content"].strip()
+        with requests.get(url, headers=headers, timeout=15, stream=True) as respuesta:
+            respuesta.raise_for_status()
+            if not es_html(respuesta.headers.get("Content-Type")):
+                return {"url": url, "error": "contenido no HTML"}
+            html = leer_html_limitado(respuesta, parar=hay_contacto(pais))
 
-        return {
-            "url": url,
-            "nombre_negocio": nombre,
-            "emails": emails_finales,
-            "telefonos": telefonos_finales,
-            "redes_sociales": redes
-        }
+        datos = shared_pool().call(extraer_contactos_html, html, url, pais, size=len(html))
+
+        return _elegir_contactos_lote([datos], usuario)[0]
 
     except Exception as e:
         return {
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Micro-benchmark de normalización de dominios: implementación anterior
+(lista fija de TLD compuestos y recorrido lineal de patrones bloqueados)
+frente a ``backend.core.domains`` (trie del public-suffix y block-list hash).
+
+Uso:
+    python scripts/bench_domains.py [--n 50000] [--unique 5000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from backend.core import domains  # noqa: E402
+
+LEGACY_MULTI_TLDS = set(domains.FALLBACK_SUFFIXES)
+
+
+def legacy_normalizar(value: str) -> str:
+    v = value.strip()
+    if v.startswith("http://") or v.startswith("https://"):
+        v = urlparse(v).netloc or v
+    v = re.sub(r"^www\.", "", v, flags=re.IGNORECASE).lower()
+    return v.split("/")[0].strip()
+
+
+def legacy_base(domain: str) -> str:
+    parts = domain.split(".")
+    if len(parts) <= 2:
+        return domain
+    if ".".join(parts[-2:]) in LEGACY_MULTI_TLDS:
+        return ".".join(parts[-3:])
+    return ".".join(parts[-2:])
+
+
+def legacy_blocked(domain: str) -> bool:
+    for pat in domains.BLOCKED_PATTERNS:
+        if pat.endswith(".") and domain.startswith(pat):
+            return True
+        if domain == pat or domain.endswith(f".{pat}"):
+            return True
+    return False
+
+
+def legacy_filter(urls):
+    out = []
+    for url in urls:
+        host = legacy_normalizar(url)
+        if not host or legacy_blocked(host):
+            continue
+        base = legacy_base(host)
+        if base and not legacy_blocked(base):
+            out.append(base)
+    return out
+
+
+def sample_urls(n: int, unique: int) -> list[str]:
+    rng = random.Random(42)
+    tlds = ["es", "com", "com.es", "co.uk", "com.mx", "org", "com.au", "net", "cat", "eus"]
+    pool = [
+        f"https://{rng.choice(['www.', '', 'blog.'])}negocio{i}.{rng.choice(tlds)}/contacto"
+        for i in range(unique)
+    ]
+    pool += ["https://www.facebook.com/x", "https://maps.google.es/?q=1"]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def bench(name: str, fn, urls) -> float:
+    start = time.perf_counter()
+    fn(urls)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed * 1000:8.1f} ms  {elapsed / len(urls) * 1e6:6.2f} µs/url")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--unique", type=int, default=5000)
+    args = parser.parse_args()
+
+    urls = sample_urls(args.n, args.unique)
+    start = time.perf_counter()
+    domains._trie()
+    print(f"{'carga del trie':<24} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    bench("anterior", legacy_filter, urls)
+    bench("trie (en frío)", domains.filter_domains, urls)
+    bench("trie (memoizado)", domains.filter_domains, urls)
+
+
+if __name__ == "__main__":
+    main()
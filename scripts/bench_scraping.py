@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""Benchmark offline de ``scrape_domains`` contra una granja web local.
+
+Levanta en un proceso aparte varios servidores HTTP en 127.0.0.1 que sirven
+un corpus sintético (latencia configurable, errores 5xx, dominios lentos o
+inexistentes, redirecciones de la home y tamaño de página) y lanza el
+scraper real contra ellos con distintos tamaños de lote y concurrencias.
+Para cada combinación informa dominios/s, p50/p99 por dominio y el pico de
+memoria.
+
+No sale a internet ni toca la base de datos: el cliente del pool de scraping
+se redirige a la granja y el DNS previo usa un resolvedor falso.
+
+Uso:
+    python scripts/bench_scraping.py
+    python scripts/bench_scraping.py --batch-sizes 100,500 --concurrency 10,50 --json bench.json
+    python scripts/bench_scraping.py --baseline bench.json --tolerance 0.2   # exit 1 si empeora
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+# backend.main exige DATABASE_URL al importarse; el benchmark no llega a conectar.
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://bench@127.0.0.1:1/bench")
+os.environ.setdefault("SCRAPE_REVALIDATE", "false")
+
+import httpx  # noqa: E402
+
+from backend import main  # noqa: E402
+from backend.core.dns_cache import DnsCache, NXDomainError  # noqa: E402
+from backend.core.plan_config import PLANES  # noqa: E402
+from backend.core.scrape_engine import ScrapeLimits  # noqa: E402
+
+
+HTML = {"content-type": "text/html; charset=utf-8"}
+
+
+@dataclass
+class FarmConfig:
+    domains: int = 500
+    servers: int = 4
+    latency_ms: float = 40.0
+    jitter_ms: float = 30.0
+    error_rate: float = 0.05
+    slow_rate: float = 0.02
+    slow_seconds: float = 5.0
+    nxdomain_rate: float = 0.02
+    redirect_rate: float = 0.2
+    page_kb: int = 40
+    email_home_rate: float = 0.5
+    email_contact_rate: float = 0.3
+    seed: int = 42
+
+
+@dataclass
+class Site:
+    domain: str
+    server: int
+    email_en: str  # "home" | "contact" | "none"
+    redirect: bool = False
+    broken: bool = False
+    slow: bool = False
+    nxdomain: bool = False
+
+
+class WebFarm:
+    """Servidores HTTP/1.1 mínimos (keep-alive) que responden según el ``Host``."""
+
+    def __init__(self, config: FarmConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.sites: dict[str, Site] = {}
+        for i in range(config.domains):
+            roll = self.rng.random()
+            if roll < config.email_home_rate:
+                email_en = "home"
+            elif roll < config.email_home_rate + config.email_contact_rate:
+                email_en = "contact"
+            else:
+                email_en = "none"
+            domain = f"negocio{i}.es"
+            self.sites[domain] = Site(
+                domain=domain,
+                server=i % max(1, config.servers),
+                email_en=email_en,
+                redirect=self.rng.random() < config.redirect_rate,
+                broken=self.rng.random() < config.error_rate,
+                slow=self.rng.random() < config.slow_rate,
+                nxdomain=self.rng.random() < config.nxdomain_rate,
+            )
+        self.padding = ("<p>" + "lorem ipsum dolor sit amet " * 20 + "</p>\n") * max(
+            1, config.page_kb * 1024 // 570
+        )
+        self.ports: list[int] = []
+        self._servers: list[asyncio.AbstractServer] = []
+        self._process = None
+        self.requests = 0
+
+    # --- corpus -------------------------------------------------------
+    def page(self, site: Site, path: str) -> tuple[int, dict[str, str], str]:
+        if site.broken:
+            return 500, {}, "error"
+        if path == "/" and site.redirect:
+            return 301, {"location": "/inicio"}, ""
+        email = f"<p>Escríbenos a info@{site.domain}</p>"
+        half = len(self.padding) // 2
+        nav = '<nav><a href="/">Inicio</a> <a href="/contacto">Contacto</a></nav>\n'
+        if path in ("/", "/inicio"):
+            hit = email if site.email_en == "home" else ""
+            body = self.padding[:half] + hit + self.padding[half:]
+            return 200, HTML, f"<html>{nav}{body}</html>"
+        if path == "/contacto":
+            body = email if site.email_en == "contact" else "<p>Formulario</p>"
+            return 200, HTML, f"<html>{nav}{body}{self.padding[:half]}</html>"
+        return 404, {"content-type": "text/html"}, "no existe"
+
+    async def resolve(self, host: str) -> tuple[list[str], float]:
+        site = self.sites.get(host)
+        if site is None or site.nxdomain:
+            raise NXDomainError(host)
+        return ["127.0.0.1"], 300.0
+
+    def port_for(self, host: str) -> int:
+        site = self.sites.get(host)
+        return self.ports[site.server if site is not None else 0]
+
+    # --- servidor -----------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                _, target, _ = line.decode("latin-1").split(" ", 2)
+                headers: dict[str, str] = {}
+                while True:
+                    raw = await reader.readline()
+                    if raw in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = raw.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                host = headers.get("host", "").split(":")[0]
+                site = self.sites.get(host)
+                if site is None:
+                    status, extra, body = 404, {}, ""
+                else:
+                    status, extra, body = self.page(site, target.split("?")[0])
+                jitter = self.rng.gauss(self.config.latency_ms, self.config.jitter_ms)
+                delay = max(0.0, jitter) / 1000
+                if site is not None and site.slow:
+                    delay += self.config.slow_seconds
+                await asyncio.sleep(delay)
+                payload = body.encode("utf-8")
+                head = [f"HTTP/1.1 {status} X", f"content-length: {len(payload)}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, ports) -> None:
+        for _ in range(max(1, self.config.servers)):
+            server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+            self._servers.append(server)
+            self.ports.append(server.sockets[0].getsockname()[1])
+        ports.put(self.ports)
+        await asyncio.Event().wait()
+
+    def start(self) -> None:
+        """Arranca la granja en otro proceso para no compartir loop ni GIL con el scraper."""
+        ports = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve_farm, args=(self.config, ports), daemon=True
+        )
+        self._process.start()
+        self.ports = ports.get(timeout=30)
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=5)
+
+
+def _serve_farm(config: FarmConfig, ports) -> None:
+    asyncio.run(WebFarm(config).serve(ports))
+
+
+class FarmTransport(httpx.AsyncBaseTransport):
+    """Envía ``https://<dominio>/...`` al servidor de la granja conservando el Host."""
+
+    def __init__(self, farm: WebFarm, **kwargs):
+        self.farm = farm
+        self.inner = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.farm.requests += 1
+        url = request.url.copy_with(
+            scheme="http", host="127.0.0.1", port=self.farm.port_for(request.url.host)
+        )
+        proxied = httpx.Request(
+            request.method,
+            url,
+            headers=request.headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+        return await self.inner.handle_async_request(proxied)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _reset_state(farm: WebFarm) -> None:
+    main.DOMAIN_CACHE.clear()
+    main.DOMAIN_HEALTH.clear()
+    main.CONTACT_PAGES.clear()
+    main.DNS_CACHE = DnsCache(resolver=farm.resolve)
+
+
+async def run_case(farm: WebFarm, batch: int, concurrency: int, args) -> dict:
+    _reset_state(farm)
+    domains = list(farm.sites)[:batch]
+    limits = ScrapeLimits(
+        max_concurrency=concurrency,
+        per_host_concurrency=args.per_host,
+        domain_timeout=args.domain_timeout,
+        total_timeout=args.total_timeout,
+    )
+    latencies: list[float] = []
+    original = main._fetch_contact_for_domain
+
+    async def timed(*a, **kw):
+        started = time.perf_counter()
+        try:
+            return await original(*a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    main._fetch_contact_for_domain = timed
+    requests_before = farm.requests
+    if args.tracemalloc:
+        tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    try:
+        results, stats = await main.scrape_domains(domains, limits, PLANES[args.plan])
+    finally:
+        main._fetch_contact_for_domain = original
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    return {
+        "batch": batch,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "domains_per_sec": round(batch / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        # Con --tracemalloc, pico de memoria Python del caso; si no, pico RSS del
+        # proceso (acumulado: solo crece entre casos, pero no ralentiza la medida).
+        "peak_mem_mb": round(
+            (peak - base) / 1024 / 1024
+            if args.tracemalloc
+            else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            2,
+        ),
+        "emails": sum(1 for r in results if r.get("email")),
+        "http_requests": farm.requests - requests_before,
+        "stats": stats.as_dict(),
+    }
+
+
+def _compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    baseline = {
+        (r["batch"], r["concurrency"]): r
+        for r in json.loads(Path(baseline_path).read_text())["results"]
+    }
+    regressions = []
+    for r in results:
+        ref = baseline.get((r["batch"], r["concurrency"]))
+        if ref and r["domains_per_sec"] < ref["domains_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"lote={r['batch']} concurrencia={r['concurrency']}: "
+                f"{r['domains_per_sec']} dom/s frente a {ref['domains_per_sec']}"
+            )
+    return regressions
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+async def _main(args) -> int:
+    config = FarmConfig(
+        domains=max(_ints(args.batch_sizes)),
+        servers=args.servers,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        nxdomain_rate=args.nxdomain_rate,
+        redirect_rate=args.redirect_rate,
+        page_kb=args.page_kb,
+        seed=args.seed,
+    )
+    farm = WebFarm(config)
+    farm.start()
+    pool = main.HTTP_POOLS.scrape
+    pool.build_client = lambda **kw: httpx.AsyncClient(
+        transport=FarmTransport(farm, limits=pool.config.limits()),
+        timeout=pool.config.timeout,
+        follow_redirects=True,
+    )
+    if args.tracemalloc:
+        tracemalloc.start()
+    results = []
+    try:
+        print(
+            f"{'lote':>6} {'conc':>5} {'dom/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'mem MB':>7} {'emails':>7} {'reqs':>6}"
+        )
+        for batch in _ints(args.batch_sizes):
+            for concurrency in _ints(args.concurrency):
+                r = await run_case(farm, batch, concurrency, args)
+                results.append(r)
+                print(
+                    f"{r['batch']:>6} {r['concurrency']:>5} {r['domains_per_sec']:>8} "
+                    f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['peak_mem_mb']:>7} "
+                    f"{r['emails']:>7} {r['http_requests']:>6}"
+                )
+    finally:
+        if args.tracemalloc:
+            tracemalloc.stop()
+        farm.close()
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps({"farm": asdict(config), "plan": args.plan, "results": results}, indent=2)
+        )
+    if args.baseline:
+        regressions = _compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", default="50,200,500")
+    parser.add_argument("--concurrency", default="10,50")
+    parser.add_argument("--per-host", type=int, default=3)
+    parser.add_argument("--plan", default="pro", choices=sorted(PLANES))
+    parser.add_argument("--servers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--nxdomain-rate", type=float, default=0.02)
+    parser.add_argument("--redirect-rate", type=float, default=0.2)
+    parser.add_argument("--page-kb", type=int, default=40)
+    parser.add_argument("--domain-timeout", type=float, default=3.0)
+    parser.add_argument("--total-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="pico de memoria Python por caso (más preciso, pero ralentiza el scraper)",
+    )
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="caída máxima de dom/s admitida")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -5,7 +5,6 @@ import argparse
 import sqlite3
 from pathlib import Path
 import sys
-from urllib.parse import urlparse
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
@@ -13,18 +12,13 @@ sys.path.append(str(ROOT))
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from backend.core.domains import normalize_domain as normalizar_dominio
 from backend.database import SessionLocal, engine
 from backend.models import HistorialExport, LeadEstado
 
 SQLITE_PATH = ROOT / "backend" / "historial.db"
 
 
-def normalizar_dominio(dominio: str) -> str:
-    if dominio.startswith("http://") or dominio.startswith("https://"):
-        dominio = urlparse(dominio).netloc
-    return dominio.replace("www.", "").strip().lower()
-
-
 def migrar(drop: bool = False) -> None:
     if not SQLITE_PATH.exists():
         print(f"No se encontró {SQLITE_PATH}")
@@ -11,6 +11,10 @@ EXTRAER_LEADS_MSG = (
 ASSISTANT_EXTRACTION_ENABLED = os.getenv("ASSISTANT_EXTRACTION_ENABLED", "false").lower() == "true"
 
 
+class AsistenteNoDisponible(Exception):
+    """El backend no pudo completar el turno del asistente."""
+
+
 def _placeholder():
     return {"error": EXTRAER_LEADS_MSG}
 
@@ -32,3 +36,16 @@ def api_buscar_variantes_seleccionadas(variantes: List[str], headers: dict | Non
     if r is not None and getattr(r, "status_code", None) == 200:
         return r.json()
     return _placeholder() if r is None else {"error": getattr(r, "text", "unknown"), "status": getattr(r, "status_code", 500)}
+
+
+def api_completar_ia(messages: List[dict], tools: Optional[List[dict]] = None, tool_choice: Optional[str] = None, headers: dict | None = None) -> dict:
+    """Turno del asistente vía ``/ia/completar``; devuelve el mensaje del modelo.
+
+    La clave de OpenAI y el registro de consumo viven en el backend, así que
+    el frontend no necesita ni una ni la base de datos.
+    """
+    payload = {"messages": messages, "tools": tools, "tool_choice": tool_choice}
+    r = http_client.post("/ia/completar", json=payload, headers=headers, timeout=(3.05, 90))
+    if r is not None and getattr(r, "status_code", None) == 200:
+        return r.json()["message"]
+    raise AsistenteNoDisponible(getattr(r, "text", "sin respuesta"))
@@ -2,9 +2,9 @@ import os
 import streamlit as st
 import requests
 from dotenv import load_dotenv
-from openai import OpenAI
 from urllib.parse import urlencode
 
+
 load_dotenv()
 
 
@@ -25,12 +25,6 @@ BACKEND_URL = _safe_secret("BACKEND_URL", "https://opensells.onrender.com")
 def _build_url(endpoint: str) -> str:
     return f"{BACKEND_URL}{endpoint}" if endpoint.startswith("/") else f"{BACKEND_URL}/{endpoint}"
 
-@st.cache_resource
-def get_openai_client() -> OpenAI | None:
-    """Return a cached OpenAI client or None if API key is missing."""
-    key = os.getenv("OPENAI_API_KEY")
-    return OpenAI(api_key=key) if key else None
-
 @st.cache_data
 def auth_headers(token: str) -> dict:
     """Authorization headers for a given token."""
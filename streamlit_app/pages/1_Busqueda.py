@@ -4,14 +4,13 @@ import re
 import streamlit as st
 import requests
 from dotenv import load_dotenv
-from urllib.parse import urlparse
+import json
 from json import JSONDecodeError
 
 import streamlit_app.utils.http_client as http_client
 
 from streamlit_app.cache_utils import (
     cached_get,
-    get_openai_client,
     auth_headers,
     limpiar_cache,
 )
@@ -71,12 +70,6 @@ def _pretty_variant_label(v: str) -> str:
     return f"{prefix}{cleaned}" if prefix else cleaned
 
 
-def normalizar_dominio(url):
-    if not url:
-        return ""
-    u = url if url.startswith("http") else f"http://{url}"
-    return urlparse(u).netloc.replace("www.", "").split("/")[0]
-
 def safe_json(resp: requests.Response) -> dict:
     try:
         return resp.json()
@@ -138,6 +131,7 @@ for flag, valor in {
     "save_failed_count": 0,
     "save_failed_items": [],
     "save_inserted_count": 0,
+    "ya_guardados": [],
     "show_extract_modal": False,
 }.items():
     st.session_state.setdefault(flag, valor)
@@ -244,22 +238,51 @@ def procesar_extraccion():
             st.session_state.extraccion_realizada = True
             st.rerun()
 
-        r = requests.post(
-            f"{BACKEND_URL}/extraer_multiples",
+        # Los leads se muestran según llegan: el backend emite una línea NDJSON
+        # por dominio y un resumen final con el recorte aplicado.
+        progreso = st.empty()
+        tabla = st.empty()
+        progreso.info("⏳ Extrayendo datos de los dominios encontrados…")
+        filas = []
+        resumen = None
+        error_data = {}
+        total_dominios = len(st.session_state.dominios)
+        with requests.post(
+            f"{BACKEND_URL}/extraer_multiples/stream",
             json={"urls": [f"https://{d}" for d in st.session_state.dominios], "pais": "ES"},
             headers=headers,
-        )
-        if r.status_code == 200:
-            data = safe_json(r)
-            st.session_state.resultados = data.get("resultados", [])
-            st.session_state.truncated_free = bool(data.get("truncated"))
+            stream=True,
+            timeout=120,
+        ) as r:
+            if r.status_code == 200:
+                for linea in r.iter_lines(decode_unicode=True):
+                    if not linea:
+                        continue
+                    try:
+                        evento = json.loads(linea)
+                    except ValueError:
+                        continue
+                    if evento.get("tipo") == "resultado":
+                        filas.append(evento.get("resultado") or {})
+                        progreso.info(
+                            f"⏳ {len(filas)} de {total_dominios} dominios procesados…"
+                        )
+                        tabla.dataframe(filas)
+                    elif evento.get("tipo") == "resumen":
+                        resumen = evento
+            else:
+                error_data = safe_json(r)
+
+        if r.status_code == 200 and resumen is not None:
+            st.session_state.resultados = filas
+            st.session_state.truncated_free = bool(resumen.get("truncated"))
+            st.session_state.ya_guardados = resumen.get("ya_guardados") or []
             st.session_state.limit_error_detail = None
             limpiar_cache()
             st.session_state.fase_extraccion = "guardando"
             st.rerun()
         elif r.status_code == 403:
-            data = safe_json(r)
-            detail = data.get("detail") if isinstance(data, dict) else None
+            detail = error_data.get("detail") if isinstance(error_data, dict) else None
             st.session_state.limit_error_detail = detail
             st.session_state.truncated_free = False
             st.session_state.show_extract_modal = False
@@ -321,7 +344,12 @@ def procesar_extraccion():
 # -------------------- Cuando está cargando --------------------
 if st.session_state.loading:
     modal_placeholder = st.empty()
-    if st.session_state.get("show_extract_modal"):
+    extrayendo = (
+        st.session_state.get("fase_extraccion") == "extrayendo"
+        and st.session_state.get("extraccion_realizada")
+    )
+    # Durante la extracción el popup taparía las filas que se van recibiendo.
+    if st.session_state.get("show_extract_modal") and not extrayendo:
         mostrar_popup(modal_placeholder)
     procesar_extraccion()
     if not st.session_state.get("show_extract_modal"):
@@ -592,6 +620,12 @@ if st.session_state.get("mostrar_resultado"):
     else:
         st.info("No se encontraron leads para esta búsqueda.")
 
+    ya_guardados = st.session_state.get("ya_guardados") or []
+    if ya_guardados:
+        st.caption(
+            f"{len(ya_guardados)} dominios ya estaban en tu cuenta y no se han vuelto a extraer."
+        )
+
     if failed_count:
         st.warning(
             f"⚠️ {failed_count} leads no se pudieron guardar correctamente en tu cuenta."
@@ -7,12 +7,13 @@ from datetime import datetime
 import streamlit as st
 from dotenv import load_dotenv
 
-from streamlit_app.cache_utils import cached_get, get_openai_client, limpiar_cache
+from streamlit_app.cache_utils import cached_get, limpiar_cache
 from streamlit_app.plan_utils import subscription_cta
 import streamlit_app.utils.http_client as http_client
 from streamlit_app.assistant_api import (
     EXTRAER_LEADS_MSG,
     api_buscar,
+    api_completar_ia,
     api_buscar_variantes_seleccionadas,
 )
 from streamlit_app.utils.assistant_guard import violates_policy, sanitize_output
@@ -59,12 +60,6 @@ def _safe_secret(name: str, default=None):
 
 
 BACKEND_URL = _safe_secret("BACKEND_URL", "https://opensells.onrender.com")
-client = get_openai_client()
-
-if client is None:
-    st.error("El asistente no está disponible: falta OPENAI_API_KEY en el entorno.")
-    st.stop()
-
 st.markdown(
     """
     <div style="text-align:center; margin-top: 0.5rem; margin-bottom: 0.5rem;">
@@ -1024,15 +1019,15 @@ if "chat" not in st.session_state:
 elif len(st.session_state.chat) > MAX_TURNS * 2:
     history = st.session_state.chat[:-MAX_TURNS * 2]
     try:
-        resumen = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        resumen = api_completar_ia(
+            [
                 {
                     "role": "user",
                     "content": "Resume brevemente esta conversación: " + json.dumps(history, ensure_ascii=False),
                 }
             ],
-        ).choices[0].message.content
+            headers=_auth_headers(),
+        ).get("content", "")
         st.session_state.chat = (
             [{"role": "system", "content": f"Resumen previo: {resumen}"}] + st.session_state.chat[-MAX_TURNS * 2:]
         )
@@ -1096,37 +1091,30 @@ if pregunta:
 
         with st.spinner("Pensando..."):
             try:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    tools=tool_defs,
-                    tool_choice="auto",
+                msg = api_completar_ia(
+                    messages, tools=tool_defs, tool_choice="auto", headers=_auth_headers()
                 )
-                msg = response.choices[0].message
-                while getattr(msg, "tool_calls", None):
+                while msg.get("tool_calls"):
                     st.session_state.chat.append(
-                        {"role": "assistant", "content": msg.content or "", "tool_calls": msg.tool_calls}
+                        {"role": "assistant", "content": msg.get("content") or "", "tool_calls": msg["tool_calls"]}
                     )
-                    for tc in msg.tool_calls:
-                        func = TOOLS.get(tc.function.name)
-                        args = json.loads(tc.function.arguments or "{}")
-                        resultado = func(**args) if func else {"error": f"Tool {tc.function.name} no disponible"}
+                    for tc in msg["tool_calls"]:
+                        nombre = tc["function"]["name"]
+                        func = TOOLS.get(nombre)
+                        args = json.loads(tc["function"]["arguments"] or "{}")
+                        resultado = func(**args) if func else {"error": f"Tool {nombre} no disponible"}
                         st.session_state.chat.append(
-                            {"role": "tool", "tool_call_id": tc.id, "content": json.dumps(resultado, ensure_ascii=False)}
+                            {"role": "tool", "tool_call_id": tc["id"], "content": json.dumps(resultado, ensure_ascii=False)}
                         )
                     messages = [{"role": "system", "content": contexto}] + st.session_state.chat
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages,
-                        tools=tool_defs,
-                        tool_choice="auto",
+                    msg = api_completar_ia(
+                        messages, tools=tool_defs, tool_choice="auto", headers=_auth_headers()
                     )
-                    msg = response.choices[0].message
             except Exception:
                 st.warning("El servidor de IA está ocupado. Inténtalo de nuevo en unos segundos.")
                 st.stop()
 
-        content = sanitize_output(msg.content or "", context="project")
+        content = sanitize_output(msg.get("content") or "", context="project")
         blocked_out, msg_pol_out = violates_policy(content, context="project")
         if blocked_out:
             content = msg_pol_out
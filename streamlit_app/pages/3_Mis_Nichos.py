@@ -15,9 +15,9 @@ import hashlib
 import streamlit as st
 import streamlit.components.v1 as components
 import requests
-from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from backend.core.domains import normalize_domain as normalizar_dominio
 from streamlit_app.cache_utils import (
     cached_get,
     cached_post,
@@ -209,13 +209,6 @@ def normalizar_nicho(texto: str) -> str:
     texto = re.sub(r"[^a-z0-9]+", "_", texto)
     return texto.strip("_")
 
-def normalizar_dominio(url: str) -> str:
-    if not url:
-        return ""
-    url = url if url.startswith(("http://", "https://")) else f"http://{url}"
-    return urlparse(url).netloc.replace("www.", "").split("/")[0]
-
-
 def _normaliza_dominio_para_orden(lead: dict) -> str:
     d = (lead.get("dominio") or "").strip()
     if not d:
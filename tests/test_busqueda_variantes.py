@@ -47,3 +47,36 @@ def test_normalize_client_variantes_strips_prefix_but_keeps_operators(client):
 
     assert normalizadas == ["clinicas veterinarias -site:yelp.es"]
     assert "-site:" in normalizadas[0]
+
+
+def test_buscar_answers_with_fallback_when_llm_exceeds_budget(client, monkeypatch):
+    import threading
+    import time
+
+    from backend.core.llm_gateway import FakeLLMBackend
+
+    main_module = _main_module()
+    liberar = threading.Event()
+
+    def responder(messages):
+        liberar.wait(5)
+        return "dentista urgente madrid\nclínica dental madrid"
+
+    fake = FakeLLMBackend(reply=responder)
+    monkeypatch.setattr(main_module.LLM_GATEWAY, "backend", fake)
+    monkeypatch.setattr(main_module, "BUSCAR_LLM_BUDGET_SECONDS", 0.05)
+    main_module.VARIANT_CACHE.clear()
+    headers = {"Authorization": f"Bearer {_token(client)}"}
+
+    resp = client.post("/buscar", json={"cliente_ideal": "dentistas en Madrid"}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["variantes"][0] == "dentista Madrid"
+
+    liberar.set()
+    for _ in range(100):
+        if main_module.VARIANT_CACHE.get("dentistas en Madrid"):
+            break
+        time.sleep(0.02)
+    resp = client.post("/buscar", json={"cliente_ideal": "Dentistas en madrid"}, headers=headers)
+    assert resp.json()["variantes"][:2] == ["dentista urgente madrid", "clínica dental madrid"]
+    assert len(fake.calls) == 1
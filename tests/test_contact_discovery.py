@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+
+from backend.core.contact_discovery import (
+    ContactPageCache,
+    discover_contact_links,
+    discover_sitemap_links,
+)
+from tests import helpers
+
+HOME = """
+<nav>
+  <a href="/servicios">Servicios</a>
+  <a href="https://www.clinica.es/politica-de-privacidad">Privacidad</a>
+  <a href="/hablemos"><span>Contacta</span> con nosotros</a>
+  <a href="https://facebook.com/clinica/contact">Facebook</a>
+  <a href="mailto:hola@clinica.es">Contacto</a>
+  <a href="aviso-legal.html">Aviso legal</a>
+</nav>
+"""
+
+
+def test_anchor_discovery_ranks_same_site_contact_links():
+    links = discover_contact_links(HOME, "https://clinica.es", limit=3)
+    assert links == [
+        "https://clinica.es/hablemos",
+        "https://clinica.es/aviso-legal.html",
+        "https://www.clinica.es/politica-de-privacidad",
+    ]
+    assert discover_contact_links(HOME, "https://clinica.es", limit=1) == [
+        "https://clinica.es/hablemos"
+    ]
+
+
+def test_sitemap_discovery_and_page_cache():
+    xml = """<urlset><url><loc>https://clinica.es/blog/post</loc></url>
+    <url><loc> https://clinica.es/contacto/ </loc></url></urlset>"""
+    assert discover_sitemap_links(xml, "https://clinica.es") == ["https://clinica.es/contacto/"]
+
+    cache = ContactPageCache(ttl_seconds=60)
+    assert cache.get("clinica.es") is None
+    cache.put("www.clinica.es", ["https://clinica.es/contacto/"])
+    assert cache.get("clinica.es") == ["https://clinica.es/contacto/"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_contact_page_is_discovered_from_home_links_and_remembered(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.CONTACT_PAGES.clear()
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/":
+            return httpx.Response(200, text='<a href="/hablemos">Contacta</a>')
+        if request.url.path == "/hablemos":
+            return httpx.Response(200, text="escribe a citas@enlaces.es")
+        return httpx.Response(404, text="")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            found = await main_module._fetch_contact_for_domain(
+                http, "enlaces.es", paths=("/contacto", "/contact")
+            )
+            return found["email"]
+
+    assert asyncio.run(run()) == "citas@enlaces.es"
+    assert calls == ["/", "/hablemos"]
+    assert main_module.CONTACT_PAGES.get("enlaces.es") == ["https://enlaces.es/hablemos"]
+
+
+def test_a_blocked_home_stops_the_probe_and_reports_the_failure(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.CONTACT_PAGES.clear()
+
+    def run(status, parallel):
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.path)
+            if request.url.path == "/":
+                return httpx.Response(status, text="")
+            return httpx.Response(200, text="sin email")
+
+        async def fetch():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                return await main_module._fetch_contact_for_domain(
+                    http, "bloqueo.es", paths=("/contacto", "/contact"), parallel=parallel
+                )
+
+        return asyncio.run(fetch()), calls
+
+    contact, calls = run(429, parallel=1)
+    assert calls == ["/"]
+    assert contact["error_kind"] == "blocked"
+
+    # En paralelo la primera ruta compite con la home, pero no se sigue probando.
+    contact, calls = run(403, parallel=3)
+    assert sorted(calls) == ["/", "/contacto"]
+    assert contact["error_kind"] == "blocked"
+    assert not main_module._is_cacheable_contact(contact)
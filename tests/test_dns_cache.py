@@ -0,0 +1,157 @@
+import asyncio
+import socket
+
+import httpcore
+
+from backend.core.dns_cache import CachedDnsBackend, DnsCache, NXDomainError, getaddrinfo_resolver
+from tests import helpers
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _StubResolver:
+    """Local stand-in for a DNS server: fixed zone, counts queries."""
+
+    def __init__(self, zone, delay=0.0):
+        self.zone = zone
+        self.delay = delay
+        self.queries = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, host):
+        self.queries.append(host)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            answer = self.zone.get(host)
+            if answer is None:
+                raise NXDomainError(host)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        finally:
+            self.in_flight -= 1
+
+
+def test_answers_are_cached_for_their_ttl():
+    clock = _Clock()
+    stub = _StubResolver({"vivo.es": (["10.0.0.1"], 120)})
+    cache = DnsCache(resolver=stub, min_ttl=10, max_ttl=3600, clock=clock)
+
+    async def run():
+        first = await cache.resolve("vivo.es")
+        second = await cache.resolve("VIVO.es.")
+        clock.now += 121
+        third = await cache.resolve("vivo.es")
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first.addresses == ("10.0.0.1",) and not first.nxdomain
+    assert second is first
+    assert third.addresses == ("10.0.0.1",)
+    assert stub.queries == ["vivo.es", "vivo.es"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_batch_is_resolved_concurrently_and_nxdomain_is_negative_cached():
+    clock = _Clock()
+    stub = _StubResolver(
+        {
+            "uno.es": (["10.0.0.1"], 300),
+            "dos.es": (["10.0.0.2"], 300),
+            "lento.es": TimeoutError("servfail"),
+        },
+        delay=0.01,
+    )
+    cache = DnsCache(resolver=stub, negative_ttl=60, concurrency=2, clock=clock)
+
+    async def run():
+        answers = await cache.resolve_many(["uno.es", "dos.es", "fantasma.es", "lento.es", "uno.es"])
+        again = await cache.resolve_many(["fantasma.es", "lento.es"])
+        return answers, again
+
+    answers, again = asyncio.run(run())
+    assert list(answers) == ["uno.es", "dos.es", "fantasma.es", "lento.es"]
+    assert answers["fantasma.es"].nxdomain
+    # Resolver failures are neither cached nor treated as a missing domain.
+    assert answers["lento.es"].error and not answers["lento.es"].nxdomain
+    assert again["fantasma.es"].nxdomain
+    assert stub.queries.count("fantasma.es") == 1
+    assert stub.queries.count("lento.es") == 2
+    assert stub.max_in_flight == 2
+
+    clock.now += 61
+    asyncio.run(cache.resolve("fantasma.es"))
+    assert stub.queries.count("fantasma.es") == 2
+
+
+def test_system_resolver_noname_is_not_taken_as_nxdomain(monkeypatch):
+    def broken(*args, **kwargs):
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+    monkeypatch.setattr(socket, "getaddrinfo", broken)
+    cache = DnsCache(resolver=getaddrinfo_resolver)
+    answer = asyncio.run(cache.resolve("vivo.es"))
+    assert not answer.nxdomain and answer.error
+    assert cache.stats()["entries"] == 0
+
+
+class _RecordingBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, refuse=()):
+        self.targets = []
+        self.refuse = set(refuse)
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.targets.append(host)
+        if host in self.refuse:
+            raise httpcore.ConnectError(host)
+        return object()
+
+
+def test_backend_connects_to_cached_addresses():
+    stub = _StubResolver({"vivo.es": (["10.0.0.1", "10.0.0.2"], 300)})
+    cache = DnsCache(resolver=stub)
+    inner = _RecordingBackend(refuse={"10.0.0.1"})
+    backend = CachedDnsBackend(cache, inner)
+
+    async def run():
+        await cache.resolve("vivo.es")
+        await backend.connect_tcp("vivo.es", 443)
+        await backend.connect_tcp("www.vivo.es", 443)
+
+    asyncio.run(run())
+    # The first address refuses, the second is used; uncached names resolve normally.
+    assert inner.targets == ["10.0.0.1", "10.0.0.2", "www.vivo.es"]
+    assert stub.queries == ["vivo.es"]
+    assert cache.stats()["pinned_connections"] == 1
+
+
+def test_nxdomain_domains_are_dropped_before_any_request(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.DOMAIN_CACHE.clear()
+    main_module.DOMAIN_HEALTH.clear()
+
+    async def stub(host):
+        raise NXDomainError(host)
+
+    monkeypatch.setattr(main_module, "SCRAPE_DNS_PRERESOLVE", True)
+    monkeypatch.setattr(main_module, "DNS_CACHE", DnsCache(resolver=stub))
+
+    async def fail_fetch(*args, **kwargs):
+        raise AssertionError("no HTTP request expected")
+
+    monkeypatch.setattr(main_module, "_fetch_contact_for_domain", fail_fetch)
+
+    async def run():
+        return [estado async for _, estado in main_module.iter_scrape_domains(["noexiste.es"])]
+
+    assert asyncio.run(run()) == ["nxdomain"]
+    assert main_module.DOMAIN_HEALTH.state("noexiste.es") == "open"
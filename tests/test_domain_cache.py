@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from backend.core.domain_cache import DomainContactCache
+
+
+def test_memory_hit_and_key_normalization():
+    cache = DomainContactCache(max_entries=10)
+    cache.put_many(None, {"Ejemplo.es": {"email": "info@ejemplo.es", "http_status": 200}})
+
+    found = cache.get_many(None, ["www.ejemplo.es", "otro.es"])
+
+    assert found["ejemplo.es"]["email"] == "info@ejemplo.es"
+    assert found["ejemplo.es"]["http_status"] == 200
+    assert "otro.es" not in found
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_stale_entries_are_misses():
+    cache = DomainContactCache(ttl_seconds=3600)
+    old = datetime.now(timezone.utc) - timedelta(hours=2)
+    cache.put_many(None, {"viejo.es": {"email": "a@viejo.es", "fetched_at": old}})
+
+    assert cache.get_many(None, ["viejo.es"]) == {}
+    assert cache.stats()["stale"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = DomainContactCache(max_entries=2)
+    cache.put_many(None, {"a.es": {"email": None, "http_status": 200}})
+    cache.put_many(None, {"b.es": {"email": None, "http_status": 200}})
+    cache.get_many(None, ["a.es"])
+    cache.put_many(None, {"c.es": {"email": None, "http_status": 200}})
+
+    found = cache.get_many(None, ["a.es", "b.es", "c.es"])
+    assert set(found) == {"a.es", "c.es"}
+
+
+def test_expired_entries_with_validators_can_be_revalidated():
+    cache = DomainContactCache(ttl_seconds=3600)
+    old = datetime.now(timezone.utc) - timedelta(hours=2)
+    cache.put_many(
+        None,
+        {
+            "viejo.es": {
+                "email": "a@viejo.es",
+                "fetched_at": old,
+                "source_url": "https://viejo.es/contacto",
+                "etag": '"abc"',
+            },
+            "sin-validadores.es": {"email": "b@sin-validadores.es", "fetched_at": old},
+        },
+    )
+
+    assert cache.get_many(None, ["viejo.es", "sin-validadores.es"]) == {}
+    candidates = cache.revalidation_candidates(None, ["viejo.es", "sin-validadores.es"])
+    assert set(candidates) == {"viejo.es"}
+    assert candidates["viejo.es"]["etag"] == '"abc"'
+
+    cache.put_many(None, {"viejo.es": {**candidates["viejo.es"], "fetched_at": None, "revalidated": True}})
+    assert cache.get_many(None, ["viejo.es"])["viejo.es"]["email"] == "a@viejo.es"
+    assert cache.revalidation_candidates(None, ["viejo.es"]) == {}
+    assert cache.stats()["not_modified"] == 1
@@ -0,0 +1,122 @@
+import asyncio
+import socket
+
+import httpx
+
+from backend.core.dns_cache import NXDomainError
+from backend.core.domain_health import DomainHealth, classify_failure
+from tests import helpers
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_recovers_after_backoff():
+    clock = _Clock()
+    health = DomainHealth(failure_threshold=2, backoff=60, clock=clock)
+
+    health.record_failure("www.lento.es", "timeout")
+    assert health.state("lento.es") == "degraded"
+    assert health.allow("lento.es")
+    health.record_failure("lento.es", "timeout")
+    assert health.state("lento.es") == "open"
+    assert not health.allow("lento.es")
+
+    clock.now += 61
+    assert health.state("lento.es") == "half_open"
+    health.record_failure("lento.es", "timeout")
+    clock.now += 61
+    assert health.state("lento.es") == "open"  # backoff doubled to 120 s
+
+    clock.now += 60
+    health.record_success("lento.es")
+    assert health.state("lento.es") == "closed"
+    assert health.stats()["skipped"] == 1
+
+
+def test_dns_failures_open_immediately_and_failing_domains_go_last():
+    health = DomainHealth(failure_threshold=3, backoff=60, clock=_Clock())
+    health.record_failure("noexiste.es", "dns")
+    health.record_failure("lento.es", "timeout")
+    assert health.state("noexiste.es") == "open"
+    assert health.order(["lento.es", "sano.es", "otro.es"]) == ["sano.es", "otro.es", "lento.es"]
+    assert health.stats()["by_kind"] == {"dns": 1, "timeout": 1}
+
+
+def test_classify_failure_kinds():
+    request = httpx.Request("GET", "https://x.es")
+    dns = httpx.ConnectError("boom", request=request)
+    dns.__cause__ = socket.gaierror(-2, "Name or service not known")
+    assert classify_failure(dns) == "dns"
+    assert classify_failure(httpx.ReadTimeout("t", request=request)) == "timeout"
+    assert classify_failure(httpx.ConnectError("refused", request=request)) == "connect"
+    assert classify_failure(status=429) == "blocked"
+    assert classify_failure(status=404) is None
+
+
+def _connect_error(cause):
+    error = httpx.ConnectError(str(cause), request=httpx.Request("GET", "https://x.es"))
+    error.__cause__ = cause
+    return error
+
+
+def test_only_missing_names_are_hard_dns_failures():
+    noname = socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+    again = socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+    fail = socket.gaierror(socket.EAI_FAIL, "Non-recoverable failure in name resolution")
+    assert classify_failure(_connect_error(noname)) == "dns"
+    assert classify_failure(_connect_error(NXDomainError("x.es"))) == "dns"
+    assert classify_failure(_connect_error(again)) == "timeout"
+    assert classify_failure(_connect_error(fail)) == "timeout"
+
+
+def test_resolver_messages_without_the_gaierror_are_classified_too():
+    request = httpx.Request("GET", "https://x.es")
+    noname = httpx.ConnectError("[Errno -2] Name or service not known", request=request)
+    again = httpx.ConnectError("[Errno -3] Temporary failure in name resolution", request=request)
+    assert classify_failure(noname) == "dns"
+    assert classify_failure(again) == "timeout"
+    assert classify_failure(httpx.ConnectError("getaddrinfo failed", request=request)) == "timeout"
+
+
+def test_a_temporary_resolver_failure_does_not_open_the_breaker():
+    health = DomainHealth(failure_threshold=3, backoff=60, clock=_Clock())
+    again = socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+    health.record_failure("lento.es", classify_failure(_connect_error(again)))
+    assert health.state("lento.es") == "degraded"
+    assert health.allow("lento.es")
+
+
+def test_a_domain_that_failed_in_one_batch_is_skipped_in_the_next(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.DOMAIN_CACHE.clear()
+    main_module.DOMAIN_HEALTH.clear()
+    monkeypatch.setattr(main_module, "SCRAPE_DNS_PRERESOLVE", False)
+    hosts = []
+
+    async def handler(request):
+        hosts.append(request.url.host)
+        if len(hosts) == 1:
+            raise _connect_error(socket.gaierror(socket.EAI_NONAME, "Name or service not known"))
+        return httpx.Response(200, text="info@sano.es")
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        main_module.HTTP_POOLS.scrape, "build_client", lambda **kw: httpx.AsyncClient(transport=transport)
+    )
+
+    async def batch(domains):
+        return [(r["dominio"], estado) async for r, estado in main_module.iter_scrape_domains(domains)]
+
+    assert asyncio.run(batch(["caido.es"])) == [("caido.es", "ok")]
+    assert hosts == ["caido.es"]
+
+    hosts.clear()
+    second = asyncio.run(batch(["caido.es", "sano.es"]))
+    assert ("caido.es", "circuit_open") in second
+    assert hosts == ["sano.es"]
@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+
+from tests import helpers
+
+
+def test_expired_contact_is_revalidated_with_a_conditional_request(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.CONTACT_PAGES.clear()
+    calls = []
+
+    async def handler(request):
+        calls.append((request.url.path, request.headers.get("if-none-match")))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(200, headers={"etag": '"v2"'}, text="nuevo@cambiado.es")
+
+    previous = {
+        "email": "info@cambiado.es",
+        "telefono": None,
+        "http_status": 200,
+        "source_url": "https://cambiado.es/contacto",
+        "etag": '"v1"',
+        "last_modified": None,
+    }
+
+    async def run(prev):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            return await main_module._fetch_contact_for_domain(http, "cambiado.es", previous=prev)
+
+    reused = asyncio.run(run(previous))
+    assert reused["revalidated"] is True and reused["email"] == "info@cambiado.es"
+    assert calls == [("/contacto", '"v1"')]
+
+    calls.clear()
+    changed = asyncio.run(run({**previous, "etag": '"v0"'}))
+    assert changed["email"] == "nuevo@cambiado.es"
+    assert changed["etag"] == '"v2"' and changed["source_url"] == "https://cambiado.es/contacto"
+    assert "revalidated" not in changed
+    assert calls == [("/contacto", '"v0"')]
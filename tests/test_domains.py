@@ -0,0 +1,58 @@
+from backend.core.domains import (
+    DomainBlockList,
+    compile_suffix_trie,
+    filter_domains,
+    is_blocked,
+    normalize_domain,
+    public_suffix,
+    registrable_domain,
+    _suffix_labels,
+)
+
+
+def test_normalize_domain_accepts_urls_and_bare_hosts():
+    assert normalize_domain("https://WWW.Clinica.es/contacto?x=1") == "clinica.es"
+    assert normalize_domain("www.tienda.com.es/") == "tienda.com.es"
+    assert normalize_domain("http://ejemplo.org:8080") == "ejemplo.org"
+    assert normalize_domain("ejemplo.org.") == "ejemplo.org"
+    assert normalize_domain("") == ""
+
+
+def test_registrable_domain_uses_the_public_suffix_list():
+    assert registrable_domain("blog.tienda.com.es") == "tienda.com.es"
+    assert registrable_domain("shop.example.co.uk") == "example.co.uk"
+    assert registrable_domain("a.b.example.com.au") == "example.com.au"
+    assert registrable_domain("clinica.es") == "clinica.es"
+    assert registrable_domain("co.uk") == "co.uk"
+    assert public_suffix("tienda.com.es") == "com.es"
+
+
+def test_wildcard_and_exception_rules():
+    trie = compile_suffix_trie(["*.ck", "!www.ck", "jp", "*.kawasaki.jp", "!city.kawasaki.jp"])
+    assert _suffix_labels("foo.bar.ck".split("."), trie) == 2
+    assert _suffix_labels("www.ck".split("."), trie) == 1
+    assert _suffix_labels("a.b.kawasaki.jp".split("."), trie) == 3
+    assert _suffix_labels("city.kawasaki.jp".split("."), trie) == 2
+    assert _suffix_labels("desconocido.zz".split("."), trie) == 1
+
+
+def test_block_list_matches_subdomains_and_prefixes():
+    blocklist = DomainBlockList(["facebook.com", "maps.google."])
+    assert "facebook.com" in blocklist
+    assert "m.facebook.com" in blocklist
+    assert "notfacebook.com" not in blocklist
+    assert "maps.google.es" in blocklist
+    assert "google.es" not in blocklist
+    assert is_blocked("es-es.facebook.com")
+
+
+def test_filter_domains_batch():
+    urls = [
+        "https://www.facebook.com/clinica",
+        "https://blog.clinica.com.es/post",
+        "https://clinica.com.es/",
+        "https://maps.google.com/?q=x",
+        "",
+    ]
+    assert filter_domains(urls) == ["clinica.com.es", "clinica.com.es"]
+    assert filter_domains(urls, dedupe=True) == ["clinica.com.es"]
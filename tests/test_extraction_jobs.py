@@ -0,0 +1,64 @@
+import importlib
+
+from tests.helpers import auth, set_plan
+
+
+def test_jobs_are_claimed_by_plan_priority(client, db_session):
+    from backend.core.job_queue import JobQueue
+
+    free_headers = auth(client, "jobs-free@example.com")
+    biz_headers = auth(client, "jobs-business@example.com")
+    set_plan(db_session, "jobs-business@example.com", "business")
+
+    free_job = client.post(
+        "/extraer_multiples/jobs", json={"urls": ["https://uno.es"]}, headers=free_headers
+    )
+    biz_job = client.post(
+        "/extraer_multiples/jobs", json={"urls": ["https://dos.es"]}, headers=biz_headers
+    )
+    assert free_job.status_code == 202
+    assert biz_job.status_code == 202
+    assert biz_job.json()["prioridad"] > free_job.json()["prioridad"]
+    assert biz_job.json()["posicion"] == 0
+
+    queue = JobQueue(db_session)
+    assert queue.claim("test").id == biz_job.json()["job_id"]
+    assert queue.claim("test").id == free_job.json()["job_id"]
+    assert queue.claim("test") is None
+
+    other = client.get(f"/extraer_multiples/jobs/{free_job.json()['job_id']}", headers=biz_headers)
+    assert other.status_code == 404
+
+
+def test_worker_runs_job_and_exposes_result(client, db_session, monkeypatch):
+    from backend import worker
+    from backend.core.job_queue import JobQueue
+    from backend.core.scrape_engine import ScrapeStats
+
+    main_module = importlib.import_module("backend.main")
+
+    async def fake_scrape(domains, **kwargs):
+        resultados = [main_module._scrape_result(d, {"email": f"info@{d}"}) for d in domains]
+        return resultados, ScrapeStats(requested=len(domains), finished=len(domains))
+
+    monkeypatch.setattr(main_module, "scrape_domains", fake_scrape)
+    headers = auth(client, "jobs-worker@example.com")
+
+    job_id = client.post(
+        "/extraer_multiples/jobs",
+        json={"urls": ["https://tres.es", "https://cuatro.es"]},
+        headers=headers,
+    ).json()["job_id"]
+    pending = client.get(f"/extraer_multiples/jobs/{job_id}/resultado", headers=headers)
+    assert pending.status_code == 409
+
+    queue = JobQueue(db_session)
+    job = queue.claim("test")
+    assert job.id == job_id
+    worker.procesar_job(db_session, queue, job)
+
+    estado = client.get(f"/extraer_multiples/jobs/{job_id}", headers=headers).json()
+    assert estado["estado"] == "done"
+    resultado = client.get(f"/extraer_multiples/jobs/{job_id}/resultado", headers=headers)
+    assert resultado.status_code == 200
+    assert [r["dominio"] for r in resultado.json()["resultados"]] == ["tres.es", "cuatro.es"]
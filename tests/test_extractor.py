@@ -0,0 +1,151 @@
+from scraper.extractor import extraer_contactos_html, extraer_contactos_lote
+
+HTML = """
+<html><head>
+<title>Clínica Ejemplo</title>
+<meta property="og:site_name" content="Ejemplo">
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "LocalBusiness", "name": "Clínica Ejemplo SL",
+   "email": "mailto:recepcion@ejemplo.es", "telephone": "+34 912 345 678",
+   "sameAs": ["https://www.instagram.com/ejemplo"]}
+]}
+</script>
+</head><body>
+<h1>Bienvenidos</h1>
+<a href="mailto:info@ejemplo.es?subject=hola">Escríbenos</a>
+<a href="tel:+34911222333">Llámanos</a>
+<a href="https://facebook.com/ejemplo">Facebook</a>
+<p>También en info@ejemplo.es</p>
+</body></html>
+"""
+
+
+def test_single_pass_collects_links_json_ld_and_name():
+    datos = extraer_contactos_html(HTML, "https://ejemplo.es")
+    assert datos["nombre_negocio"] == "Clínica Ejemplo"
+    assert set(datos["emails"]) == {"info@ejemplo.es", "recepcion@ejemplo.es"}
+    assert "+34 911 22 23 33" in datos["telefonos"]
+    assert "+34 912 34 56 78" in datos["telefonos"]
+    assert datos["redes_sociales"]["facebook"] == ["https://facebook.com/ejemplo"]
+    assert datos["redes_sociales"]["instagram"] == ["https://www.instagram.com/ejemplo"]
+
+
+def test_batch_falls_back_to_h1_and_og_name():
+    resultados = extraer_contactos_lote(
+        [
+            ("https://a.es", "<h1>Taller A</h1>"),
+            ("https://b.es", '<meta property="og:site_name" content="Tienda B">'),
+            ("https://c.es", None),
+        ]
+    )
+    assert [r["nombre_negocio"] for r in resultados] == ["Taller A", "Tienda B", None]
+    assert resultados[2]["emails"] == []
+
+
+def _responder(messages):
+    grupos = messages[0]["content"].count("Grupo ")
+    return "{" + ", ".join(f'"{n}": ["ventas@{n}.es"]' for n in range(1, grupos + 1)) + "}"
+
+
+def test_llm_ranking_is_batched_cached_and_skipped_by_rules(monkeypatch):
+    from backend.core.llm_gateway import FakeLLMBackend, LLMGateway
+    from scraper import extractor
+
+    fake = FakeLLMBackend(reply=_responder)
+    gateway = LLMGateway(fake)
+    monkeypatch.setattr(extractor, "_gateway", gateway)
+    extractor._cache_ia.clear()
+
+    dudosos = [
+        ["ventas@1.es", "rrhh@1.es", "prensa@1.es"],
+        ["ventas@2.es", "rrhh@2.es", "prensa@2.es"],
+    ]
+    peticiones = [(lista, "email") for lista in dudosos]
+    peticiones.append((["info@3.es", "rrhh@3.es", "prensa@3.es"], "email", "3.es"))
+
+    primera = extractor.elegir_contactos_por_ia_lote(peticiones, usuario="Ana@X.es")
+    assert primera == [["ventas@1.es"], ["ventas@2.es"], ["info@3.es"]]
+    assert len(fake.calls) == 1
+    assert "info@3.es" not in fake.calls[0]["messages"][0]["content"]
+    assert [key[0] for key in gateway.meter.pending()] == ["ana@x.es"]
+
+    segunda = extractor.elegir_contactos_por_ia_lote([(list(reversed(dudosos[0])), "email")])
+    assert segunda == [["ventas@1.es"]]
+    assert len(fake.calls) == 1
+
+
+def test_phone_pipeline_prefilters_and_memoizes(monkeypatch):
+    import phonenumbers
+
+    from scraper import extractor
+
+    extractor._parsear_telefono.cache_clear()
+    llamadas = []
+    original = phonenumbers.parse
+
+    def contar(raw, pais):
+        llamadas.append(raw)
+        return original(raw, pais)
+
+    monkeypatch.setattr(phonenumbers, "parse", contar)
+    ruido = "<p>2024-01-31 00000000 1234567890123456 Ref 31-12-2023</p>"
+    pagina = ruido + "<p>Tel: 912 345 678 o 912  345 678</p>"
+
+    for url in ("https://a.es", "https://b.es"):
+        datos = extractor.extraer_contactos_html(pagina, url)
+        assert datos["telefonos"] == ["+34 912 34 56 78"]
+    assert llamadas == ["912 345 678"]
+    assert extractor.descartar_telefono("2024-01-31")
+
+
+def test_large_documents_are_parsed_in_worker_processes():
+    from backend.core.page_parse import ParsePool
+
+    pool = ParsePool(workers=1, threshold=1000)
+    grande = HTML.replace("<p>", "<p>" + "texto " * 500, 1)
+    try:
+        resultados = extraer_contactos_lote(
+            [("https://a.es", "<h1>Taller A</h1>"), ("https://ejemplo.es", grande)], pool=pool
+        )
+        assert pool.stats()["inline"] == 1 and pool.stats()["offloaded"] == 1
+    finally:
+        pool.shutdown()
+    assert resultados[0]["nombre_negocio"] == "Taller A"
+    assert set(resultados[1]["emails"]) == {"info@ejemplo.es", "recepcion@ejemplo.es"}
+
+
+class _Respuesta:
+    encoding = "utf-8"
+
+    def __init__(self, cuerpo, trozo=64):
+        self.trozos = [cuerpo[i:i + trozo] for i in range(0, len(cuerpo), trozo)]
+        self.leidos = 0
+
+    def iter_content(self, chunk_size):
+        for trozo in self.trozos:
+            self.leidos += 1
+            yield trozo
+
+
+def test_reading_stops_at_the_first_phone():
+    from scraper.extractor import hay_contacto, leer_html_limitado
+
+    respuesta = _Respuesta(b"<p>Tel: 912 345 678</p>" + b"<p>relleno</p>" * 500)
+    html = leer_html_limitado(respuesta, parar=hay_contacto("ES"))
+    assert respuesta.leidos < 5
+    assert "912 345 678" in html
+
+    completa = _Respuesta(b"<p>sin contacto</p>" * 50)
+    assert leer_html_limitado(completa, parar=hay_contacto("ES")) == "<p>sin contacto</p>" * 50
+    assert completa.leidos == len(completa.trozos)
+
+
+def test_free_text_is_read_from_text_nodes_not_raw_markup():
+    html = (
+        '<div data-tracking="pixel@tracker.io"><p>Escríbenos a ventas@taller.es</p></div>'
+        "<footer>Tel. 913 456 789</footer>"
+    )
+    datos = extraer_contactos_html(html, "https://taller.es")
+    assert datos["emails"] == ["ventas@taller.es"]
+    assert datos["telefonos"] == ["+34 913 45 67 89"]
@@ -0,0 +1,154 @@
+import importlib
+import json
+
+from tests import helpers
+from tests.helpers import auth
+
+
+def _fake_iter(main_module, estado="ok"):
+    async def fake_iter(domains, limits=None, plan=None, db=None):
+        for domain in domains:
+            yield main_module._scrape_result(domain, {"email": f"info@{domain}"}), estado
+
+    return fake_iter
+
+
+def test_stream_emits_rows_then_summary_and_truncates_free_plan(client, monkeypatch):
+    headers = auth(client, "stream-free@example.com")
+    main_module = importlib.import_module("backend.main")
+    monkeypatch.setattr(main_module, "iter_scrape_domains", _fake_iter(main_module))
+
+    urls = [f"https://stream{idx}.com" for idx in range(12)]
+    resp = client.post(
+        "/extraer_multiples/stream", json={"urls": urls, "pais": "ES"}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    eventos = [json.loads(line) for line in resp.text.splitlines() if line.strip()]
+    filas = [e for e in eventos if e["tipo"] == "resultado"]
+    resumen = eventos[-1]
+    assert len(filas) == 10
+    assert filas[0]["resultado"]["dominio"] == "stream0.com"
+    assert resumen["tipo"] == "resumen"
+    assert resumen["total"] == 10
+    assert resumen["truncated"] is True
+    assert resumen["consumo"] == {"resource": "searches", "amount": 1}
+
+
+def test_stream_supports_server_sent_events(client, monkeypatch):
+    headers = auth(client, "stream-sse@example.com")
+    main_module = importlib.import_module("backend.main")
+    monkeypatch.setattr(main_module, "iter_scrape_domains", _fake_iter(main_module, "cached"))
+
+    resp = client.post(
+        "/extraer_multiples/stream?formato=sse",
+        json={"urls": ["https://uno.es", "https://dos.es"], "pais": "ES"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    bloques = [b for b in resp.text.split("\n\n") if b.strip()]
+    assert [b.splitlines()[0] for b in bloques] == [
+        "event: resultado",
+        "event: resultado",
+        "event: resumen",
+    ]
+    resumen = json.loads(bloques[-1].splitlines()[1][len("data: "):])
+    assert resumen["truncated"] is False
+    assert resumen["scrape_stats"]["cached"] == 2
+
+
+def test_owned_domains_are_skipped_and_backfilled(client, monkeypatch):
+    headers = auth(client, "ya-guardados@example.com")
+    main_module = importlib.import_module("backend.main")
+    monkeypatch.setattr(main_module, "MAX_LEADS_PER_EXTRACTION", 2)
+    scrapeados = []
+
+    async def fake_scrape(domains, **kwargs):
+        from backend.core.scrape_engine import ScrapeStats
+
+        scrapeados.extend(domains)
+        resultados = [main_module._scrape_result(d, {"email": f"info@{d}"}) for d in domains]
+        return resultados, ScrapeStats(requested=len(domains), finished=len(domains))
+
+    monkeypatch.setattr(main_module, "scrape_domains", fake_scrape)
+    resp = client.post(
+        "/guardar_leads",
+        json={"nicho": "dentistas", "items": [{"dominio": "guardado.es"}]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+
+    urls = ["https://guardado.es", "https://nuevo.es", "https://relleno.es"]
+    data = client.post("/extraer_multiples", json={"urls": urls}, headers=headers).json()
+    assert scrapeados == ["nuevo.es", "relleno.es"]
+    assert [r["dominio"] for r in data["resultados"]] == ["nuevo.es", "relleno.es"]
+    assert data["ya_guardados"] == ["guardado.es"]
+
+    scrapeados.clear()
+    data = client.post(
+        "/extraer_multiples", json={"urls": urls, "rellenar": False}, headers=headers
+    ).json()
+    assert scrapeados == ["nuevo.es"]
+    assert data["ya_guardados"] == ["guardado.es"]
+
+
+def test_extraction_scrapes_on_loop_and_runs_db_work_in_executor(client, monkeypatch):
+    import threading
+
+    headers = auth(client, "async-extraccion@example.com")
+    main_module = importlib.import_module("backend.main")
+    hilos = {}
+    preparar = main_module._preparar_extraccion
+
+    def spy_preparar(*args, **kwargs):
+        hilos["preparar"] = threading.current_thread().name
+        return preparar(*args, **kwargs)
+
+    async def fake_scrape(domains, **kwargs):
+        from backend.core.scrape_engine import ScrapeStats
+
+        hilos["scrape"] = threading.current_thread().name
+        return [], ScrapeStats(requested=len(domains), finished=len(domains))
+
+    monkeypatch.setattr(main_module, "_preparar_extraccion", spy_preparar)
+    monkeypatch.setattr(main_module, "scrape_domains", fake_scrape)
+    resp = client.post("/extraer_multiples", json={"urls": ["https://hilos.es"]}, headers=headers)
+    assert resp.status_code == 200
+    assert hilos["preparar"].startswith("db")
+    assert not hilos["scrape"].startswith("db")
+
+
+def test_stream_cut_by_the_client_charges_rows_already_sent(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    main_module = helpers.main_module(monkeypatch)
+    plan = SimpleNamespace(type="pro", lead_credits_month=100)
+    prep = main_module.ExtraccionPreparada("pro", plan, True, 100, None, ["a.es", "b.es", "c.es"])
+    cobros = []
+
+    def fake_preparar(urls, usuario, db, rellenar=True):
+        return prep
+
+    monkeypatch.setattr(main_module, "_preparar_extraccion", fake_preparar)
+    monkeypatch.setattr(main_module, "iter_scrape_domains", _fake_iter(main_module))
+    monkeypatch.setattr(
+        main_module, "_registrar_consumo_extraccion", lambda db, user_id, p, nuevos: cobros.append(nuevos)
+    )
+
+    async def run():
+        resp = await main_module.extraer_multiples_stream(
+            main_module.ExtraerMultiplesPayload(urls=["https://a.es"]),
+            formato="ndjson",
+            usuario=SimpleNamespace(id=1, email_lower="corte@example.com"),
+            db=None,
+        )
+        eventos = resp.body_iterator
+        primeros = [await eventos.__anext__() for _ in range(2)]
+        await eventos.aclose()
+        return primeros
+
+    assert len(asyncio.run(run())) == 2
+    assert cobros == [2]
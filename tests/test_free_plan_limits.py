@@ -24,7 +24,9 @@ def test_free_plan_truncates_to_10_leads_per_search(client, monkeypatch):
     headers = auth(client, "free-truncate@example.com")
     main_module = importlib.import_module("backend.main")
 
-    async def fake_scrape(domains):
+    async def fake_scrape(domains, **kwargs):
+        from backend.core.scrape_engine import ScrapeStats
+
         resultados = []
         for idx, domain in enumerate(domains):
             resultados.append(
@@ -37,7 +39,7 @@ def test_free_plan_truncates_to_10_leads_per_search(client, monkeypatch):
                     "idx": idx,
                 }
             )
-        return resultados
+        return resultados, ScrapeStats(requested=len(domains), finished=len(domains))
 
     monkeypatch.setattr(main_module, "scrape_domains", fake_scrape)
 
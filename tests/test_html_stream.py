@@ -0,0 +1,117 @@
+import asyncio
+
+import httpx
+
+from backend.core.html_stream import is_html_content_type, read_html
+from backend.core.page_parse import first_contact, first_valid_email
+
+
+class _Chunks(httpx.AsyncByteStream):
+    def __init__(self, body: bytes, size: int = 10):
+        self.body = body
+        self.size = size
+        self.sent = 0
+
+    async def __aiter__(self):
+        for i in range(0, len(self.body), self.size):
+            self.sent += 1
+            yield self.body[i:i + self.size]
+
+
+def _client(body: bytes, content_type="text/html; charset=utf-8", status=200, size=10):
+    def handler(request):
+        return httpx.Response(status, headers={"content-type": content_type}, stream=_Chunks(body, size))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _read(client, **kwargs):
+    async def run():
+        async with client:
+            return await read_html(client, "https://ejemplo.es/", **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_read_stops_at_byte_budget():
+    page = _read(_client(b"<p>" + b"x" * 5000 + b"</p>"), max_bytes=100)
+    assert page.truncated is True
+    assert page.bytes_read == 100
+    assert len(page.text) == 100
+
+
+def test_read_stops_when_callback_matches():
+    body = b"<p>hola@ejemplo.es</p>" + b"x" * 5000
+    page = _read(_client(body), stop=lambda text: "hola@ejemplo.es" in text)
+    assert page.stopped_early is True
+    assert page.bytes_read < 40
+    assert "hola@ejemplo.es" in page.text
+
+
+def test_non_html_and_error_bodies_are_not_read():
+    pdf = _read(_client(b"%PDF-1.4" * 100, content_type="application/pdf"))
+    assert pdf.skipped is True and pdf.bytes_read == 0
+    missing = _read(_client(b"no existe", status=404))
+    assert missing.status_code == 404 and missing.text == ""
+    assert is_html_content_type(None)
+
+
+def test_conditional_request_reports_validators_and_not_modified():
+    seen = {}
+
+    def handler(request):
+        seen.update(request.headers)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        headers = {"etag": '"v1"', "last-modified": "Wed, 01 Oct 2026 10:00:00 GMT"}
+        return httpx.Response(200, headers=headers, text="<p>hola</p>")
+
+    fresh = _read(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    assert fresh.etag == '"v1"' and fresh.last_modified.startswith("Wed")
+    again = _read(
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        headers={"If-None-Match": fresh.etag},
+    )
+    assert again.not_modified and again.text == "" and again.bytes_read == 0
+    assert seen["if-none-match"] == '"v1"'
+
+
+def test_stop_waits_for_a_token_cut_at_a_chunk_boundary():
+    body = b"<p>ventas@empresa.com.mx</p>" + b"x" * 5000
+    seen = []
+
+    def stop(text):
+        email = first_valid_email(text)
+        seen.append(email)
+        return email is not None
+
+    page = _read(_client(body, size=20), stop=stop)
+    assert page.stopped_early is True
+    assert [email for email in seen if email] == ["ventas@empresa.com.mx"]
+    assert "ventas@empresa.com.mx" in page.text
+
+
+def test_async_stop_sees_the_held_back_end_of_the_body():
+    seen = []
+
+    async def stop(text):
+        seen.append(first_valid_email(text))
+        return False
+
+    page = _read(_client(b"<p>hola</p> escribe a fin@ejemplo.es", size=16), stop=stop)
+    assert page.stopped_early is False
+    assert [email for email in seen if email] == ["fin@ejemplo.es"]
+
+
+def test_phone_only_pages_stop_at_the_first_phone():
+    body = b"<p>Llamanos al 912 345 678</p>" + b"<p>relleno</p>" * 500
+    stream = _Chunks(body, size=64)
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, stream=stream)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    page = _read(client, stop=lambda text: any(first_contact(text)))
+    assert page.stopped_early is True
+    assert stream.sent < 5
+    assert first_contact(page.text) == (None, "+34 912 34 56 78")
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpcore
+import httpx
+
+from backend.core.http_pool import HttpPool, HttpPools, PoolConfig
+
+
+def test_pool_config_reads_prefixed_env(monkeypatch):
+    monkeypatch.setenv("SCRAPE_HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("SCRAPE_HTTP_HTTP2", "true")
+    config = PoolConfig.from_env("SCRAPE_HTTP", max_keepalive_connections=3)
+    assert config.max_connections == 7
+    assert config.max_keepalive_connections == 3
+    assert config.http2 is True
+
+
+def test_client_is_shared_on_its_loop_and_counts_requests():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+    pool = HttpPool("test", PoolConfig(), transport=transport)
+
+    async def run():
+        await pool.start()
+        try:
+            first = pool.client()
+            assert first is pool.client()
+            await first.get("https://example.com/")
+            await first.get("https://example.com/contacto")
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+    stats = pool.stats()
+    assert stats["requests"] == 2
+    assert stats["borrowed"] == 2
+    assert stats["started"] is False
+
+
+def test_other_loops_fall_back_to_their_own_client():
+    pool = HttpPool("test", PoolConfig())
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(pool.start())
+
+        async def borrow():
+            return pool.client()
+
+        assert asyncio.run(borrow()) is None
+        assert loop.run_until_complete(borrow()) is not None
+        loop.run_until_complete(pool.close())
+    finally:
+        loop.close()
+    assert pool.stats()["fallbacks"] == 1
+
+
+def test_pools_keep_search_and_scrape_separate():
+    pools = HttpPools.from_env()
+    assert pools.scrape.client_kwargs.get("follow_redirects") is True
+    assert set(pools.stats()) == {"search", "scrape"}
+
+
+class _LoopbackBackend(httpcore.AsyncNetworkBackend):
+    """Sends every host to 127.0.0.1 and records the names asked for."""
+
+    def __init__(self):
+        self.inner = httpcore.AnyIOBackend()
+        self.hosts = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.hosts.append(host)
+        return await self.inner.connect_tcp("127.0.0.1", port, timeout=timeout)
+
+    async def sleep(self, seconds):
+        await self.inner.sleep(seconds)
+
+
+def test_network_backend_carries_the_scrape_connections():
+    backend = _LoopbackBackend()
+    pool = HttpPool("test", PoolConfig(timeout=2.0), network_backend=backend)
+
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with pool.build_client() as http:
+                response = await http.get(f"http://ejemplo.test:{port}/")
+                server.close()
+                await server.wait_closed()
+                try:
+                    await http.get(f"http://ejemplo.test:{port}/otra", headers={"Connection": "close"})
+                except httpx.ConnectError:
+                    return response.text, "connect_error"
+                return response.text, None
+
+    assert asyncio.run(run()) == ("ok", "connect_error")
+    assert backend.hosts == ["ejemplo.test", "ejemplo.test"]
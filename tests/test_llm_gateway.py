@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.core.llm_gateway import (
+    FakeLLMBackend,
+    LLMBusyError,
+    LLMGateway,
+    LLMUsageMeter,
+    ModelLimits,
+    parse_model_limits,
+)
+
+MENSAJES = [{"role": "user", "content": "dame cinco variantes"}]
+
+
+def test_complete_returns_text_and_meters_tokens_per_tenant():
+    meter = LLMUsageMeter(clock=lambda: datetime(2026, 10, 17, tzinfo=timezone.utc))
+    gateway = LLMGateway(FakeLLMBackend(reply="uno dos"), meter=meter)
+
+    result = gateway.complete(MENSAJES, model="m", tenant="Ana@X.es", temperature=0.4)
+    assert result.text == "uno dos"
+    assert result.coalesced is False
+
+    usage = meter.pending()[("ana@x.es", "20261017", "m")]
+    assert usage["requests"] == 1
+    assert usage["prompt_tokens"] == 3
+    assert usage["completion_tokens"] == 2
+    assert gateway.backend.calls[0]["temperature"] == 0.4
+
+
+def test_identical_concurrent_prompts_share_one_call():
+    liberar = threading.Event()
+
+    def responder(messages):
+        liberar.wait(5)
+        return "ok"
+
+    backend = FakeLLMBackend(reply=responder)
+    gateway = LLMGateway(backend)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futuros = [pool.submit(gateway.complete, MENSAJES, "m", f"u{i}@x.es") for i in range(4)]
+        while gateway.stats()["coalesced"] < 3:
+            time.sleep(0.01)
+        liberar.set()
+        resultados = [f.result() for f in futuros]
+
+    assert len(backend.calls) == 1
+    assert [r.text for r in resultados] == ["ok"] * 4
+    assert sum(r.coalesced for r in resultados) == 3
+    assert gateway.complete(MENSAJES, "m").coalesced is False
+    assert len(backend.calls) == 2
+
+
+def test_errors_reach_every_waiter_and_are_metered():
+    class Roto(FakeLLMBackend):
+        def complete(self, model, messages, **params):
+            raise RuntimeError("openai caído")
+
+    gateway = LLMGateway(Roto())
+    with pytest.raises(RuntimeError):
+        gateway.complete(MENSAJES, "m", "a@x.es")
+    (usage,) = gateway.meter.pending().values()
+    assert usage["errors"] == 1
+    assert gateway.stats()["errors"] == 1
+
+
+def test_model_concurrency_limit_rejects_after_queue_timeout():
+    liberar = threading.Event()
+
+    def responder(messages):
+        if messages[0]["content"] == "a":
+            liberar.wait(5)
+        return "ok"
+
+    gateway = LLMGateway(
+        FakeLLMBackend(reply=responder), limits={"lento": ModelLimits(concurrency=1)}, queue_timeout=0.05
+    )
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        primero = pool.submit(gateway.complete, [{"role": "user", "content": "a"}], "lento")
+        while gateway.stats()["models"].get("lento", {}).get("inflight") != 1:
+            time.sleep(0.01)
+        with pytest.raises(LLMBusyError):
+            gateway.complete([{"role": "user", "content": "b"}], "lento")
+        # Otro modelo no comparte el límite.
+        assert gateway.complete([{"role": "user", "content": "c"}], "rapido").text == "ok"
+        liberar.set()
+        assert primero.result().text == "ok"
+    assert gateway.stats()["rejected"] == 1
+
+
+def test_parse_model_limits():
+    limits = parse_model_limits("gpt-4o-mini=4:60, gpt-3.5-turbo=8,roto=x")
+    assert limits["gpt-4o-mini"] == ModelLimits(4, 60.0)
+    assert limits["gpt-3.5-turbo"] == ModelLimits(8, 0.0)
+    assert "roto" not in limits
+
+
+def test_flush_without_db_keeps_counters():
+    gateway = LLMGateway(FakeLLMBackend(reply="x"))
+    gateway.complete(MENSAJES, "m", "a@x.es")
+    gateway.flush_usage(None)
+    assert len(gateway.meter.pending()) == 1
+
+
+def test_rate_limit_allows_a_burst_then_rejects():
+    gateway = LLMGateway(
+        FakeLLMBackend(reply="ok"),
+        default_limits=ModelLimits(concurrency=10, requests_per_minute=60),
+        queue_timeout=0.05,
+    )
+    for n in range(6):
+        gateway.complete([{"role": "user", "content": str(n)}], "m")
+    with pytest.raises(LLMBusyError):
+        gateway.complete([{"role": "user", "content": "otra"}], "m")
+
+
+def test_flush_adds_counters_to_llm_usage(db_session):
+    from backend.models import LLMUsage
+
+    meter = LLMUsageMeter(clock=lambda: datetime(2026, 10, 17, tzinfo=timezone.utc))
+    gateway = LLMGateway(FakeLLMBackend(reply="uno dos"), meter=meter)
+    for _ in range(2):
+        gateway.complete([{"role": "user", "content": "hola"}], "m", "flush@x.es")
+        gateway.flush_usage(db_session)
+
+    row = db_session.query(LLMUsage).filter_by(user_email_lower="flush@x.es").one()
+    assert (row.period_yyyymmdd, row.model) == ("20261017", "m")
+    assert row.requests == 2
+    assert row.prompt_tokens == 2
+    assert row.completion_tokens == 4
+    assert meter.pending() == {}
+
+
+class _Session:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_meter_flushes_on_its_own_and_bounds_pending(monkeypatch):
+    now = [0.0]
+    sessions = []
+
+    def factory():
+        sessions.append(_Session())
+        return sessions[-1]
+
+    meter = LLMUsageMeter(session_factory=factory, flush_seconds=60, max_pending=2, monotonic=lambda: now[0])
+    flushed = []
+    monkeypatch.setattr(meter, "flush", lambda db: flushed.append(db))
+    meter.record("a@x.es", "m", requests=1)
+    assert flushed == []
+    now[0] = 61
+    meter.record("a@x.es", "m", requests=1)
+    assert flushed == sessions and sessions[0].closed
+
+    unbacked = LLMUsageMeter(max_pending=2)
+    for tenant in ("a", "b", "c"):
+        unbacked.record(tenant, "m", requests=1)
+    assert len(unbacked.pending()) == 2 and unbacked.dropped == 1
+
+
+def test_asistente_endpoint_completes_through_the_gateway(client, db_session, monkeypatch):
+    import importlib
+
+    from backend.models import LLMUsage
+    from tests.helpers import auth
+
+    main_module = importlib.import_module("backend.main")
+    gateway = LLMGateway(FakeLLMBackend(reply="hola"))
+    monkeypatch.setattr(main_module, "LLM_GATEWAY", gateway)
+    headers = auth(client, "asistente@example.com")
+
+    resp = client.post(
+        "/ia/completar",
+        json={"messages": MENSAJES, "tools": [{"type": "function"}], "tool_choice": "auto"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["message"] == {"role": "assistant", "content": "hola"}
+    assert gateway.backend.calls[0]["model"] == main_module.ASISTENTE_MODELO
+    assert gateway.backend.calls[0]["tool_choice"] == "auto"
+
+    usage = db_session.query(LLMUsage).filter_by(user_email_lower="asistente@example.com").one()
+    assert usage.requests == 1
@@ -0,0 +1,30 @@
+import asyncio
+
+from backend.core.page_parse import ParsePool, first_valid_email
+
+
+def test_first_valid_email_skips_assets():
+    assert first_valid_email('<img src="logo@2x.png"> escribe a hola@tienda.es.') == "hola@tienda.es"
+    assert first_valid_email("") is None
+
+
+def test_small_pages_stay_inline_and_large_ones_use_the_pool():
+    pool = ParsePool(workers=1, threshold=1000)
+    grande = "x" * 5000 + " ventas@grande.es"
+
+    async def run():
+        pequeno = await pool.run(first_valid_email, "info@corto.es", size=13)
+        return pequeno, await pool.run(first_valid_email, grande, size=len(grande))
+
+    try:
+        assert asyncio.run(run()) == ("info@corto.es", "ventas@grande.es")
+        stats = pool.stats()
+        assert stats["inline"] == 1 and stats["offloaded"] == 1 and stats["started"]
+    finally:
+        pool.shutdown()
+
+
+def test_disabled_pool_parses_everything_inline():
+    pool = ParsePool(workers=0, threshold=0)
+    assert asyncio.run(pool.run(first_valid_email, "a@b.es", size=10**9)) == "a@b.es"
+    assert pool.stats()["offloaded"] == 0 and not pool.stats()["started"]
@@ -0,0 +1,82 @@
+import asyncio
+
+from backend.core.scrape_engine import ScrapeEngine, ScrapeLimits
+
+
+def test_engine_respects_global_concurrency_cap():
+    engine = ScrapeEngine(ScrapeLimits(max_concurrency=3, domain_timeout=5, total_timeout=5))
+    in_flight = 0
+    peak = 0
+
+    async def worker(domain):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return domain.upper()
+
+    domains = [f"d{i}.com" for i in range(10)]
+    outcomes, stats = asyncio.run(engine.run(domains, worker))
+
+    assert peak <= 3
+    assert [o.domain for o in outcomes] == domains
+    assert [o.value for o in outcomes] == [d.upper() for d in domains]
+    assert stats.finished == 10
+    assert stats.timed_out == stats.skipped == stats.failed == 0
+
+
+def test_engine_per_domain_timeout_and_errors():
+    engine = ScrapeEngine(ScrapeLimits(max_concurrency=5, domain_timeout=0.05, total_timeout=5))
+
+    async def worker(domain):
+        if domain == "lento.com":
+            await asyncio.sleep(1)
+        if domain == "roto.com":
+            raise RuntimeError("boom")
+        return "ok"
+
+    outcomes, stats = asyncio.run(engine.run(["rapido.com", "lento.com", "roto.com"], worker))
+
+    assert [o.status for o in outcomes] == ["ok", "timeout", "error"]
+    assert stats.finished == 1
+    assert stats.timed_out == 1
+    assert stats.failed == 1
+
+
+def test_engine_overall_deadline_returns_partial_results():
+    engine = ScrapeEngine(ScrapeLimits(max_concurrency=1, domain_timeout=5, total_timeout=0.15))
+
+    async def worker(domain):
+        await asyncio.sleep(0.1)
+        return domain
+
+    domains = ["a.com", "b.com", "c.com", "d.com"]
+    outcomes, stats = asyncio.run(engine.run(domains, worker))
+
+    assert outcomes[0].status == "ok"
+    assert outcomes[1].status == "timeout"
+    assert outcomes[-1].status == "skipped"
+    assert stats.requested == 4
+    assert stats.finished + stats.timed_out + stats.skipped == 4
+    assert stats.elapsed_ms < 1000
+
+
+def test_host_limiter_caps_requests_per_host():
+    engine = ScrapeEngine(ScrapeLimits(max_concurrency=10, per_host_concurrency=2))
+    in_flight = 0
+    peak = 0
+
+    async def fetch():
+        nonlocal in_flight, peak
+        async with engine.hosts.slot("example.com"):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def main():
+        await asyncio.gather(*(fetch() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+
+from tests import helpers
+
+
+def _transport(delays, pages):
+    async def handler(request):
+        path = request.url.path or "/"
+        await asyncio.sleep(delays.get(path, 0))
+        if path in pages:
+            return httpx.Response(200, text=pages[path])
+        return httpx.Response(404, text="")
+
+    return httpx.MockTransport(handler)
+
+
+def test_race_returns_first_hit_and_cancels_slow_pages(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    transport = _transport(
+        delays={"/": 0.5, "/contact": 0.5},
+        pages={"/": "sin email", "/contacto": "escribe a hola@ejemplo.es", "/contact": "x"},
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            started = time.monotonic()
+            found = await main_module._fetch_contact_for_domain(
+                http, "ejemplo.es", paths=("/contacto", "/contact"), parallel=3
+            )
+            return found["email"], time.monotonic() - started
+
+    email, elapsed = asyncio.run(run())
+    assert email == "hola@ejemplo.es"
+    assert elapsed < 0.4
+
+
+def test_sequential_mode_keeps_homepage_priority(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    transport = _transport(
+        delays={"/": 0.05},
+        pages={"/": "info@home.es", "/contacto": "otro@home.es"},
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            found = await main_module._fetch_contact_for_domain(
+                http, "home.es", paths=("/contacto",), parallel=1
+            )
+            return found["email"]
+
+    assert asyncio.run(run()) == "info@home.es"
+
+
+def test_first_valid_email_skips_asset_names(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    html = '<img src="logo@2x.png"> contacto: ventas@tienda.com'
+    assert main_module._first_valid_email(html) == "ventas@tienda.com"
+
+
+def test_phone_on_the_home_is_kept_with_the_contact_page_email(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.CONTACT_PAGES.clear()
+    transport = _transport(
+        delays={},
+        pages={"/": "<p>Tel: 912 345 678</p>", "/contacto": "escribe a hola@tel.es"},
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            return await main_module._fetch_contact_for_domain(
+                http, "tel.es", paths=("/contacto",), parallel=1
+            )
+
+    found = asyncio.run(run())
+    assert found["email"] == "hola@tel.es"
+    assert found["telefono"] == "+34 912 34 56 78"
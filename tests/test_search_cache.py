@@ -0,0 +1,73 @@
+import time
+
+from backend.core.search_cache import SearchResultCache, cache_key
+from tests import helpers
+
+
+def test_key_normalizes_query_and_includes_count():
+    assert cache_key("  Dentistas   MADRID ", 20) == cache_key("dentistas madrid", 20)
+    assert cache_key("dentistas madrid", 20) != cache_key("dentistas madrid", 10)
+    assert cache_key("dentistas madrid", 20, page=1) != cache_key("dentistas madrid", 20)
+
+
+def test_hit_miss_counters_and_ttl():
+    cache = SearchResultCache(ttl_seconds=0.05)
+    assert cache.get("abogados", 20) is None
+    cache.put("abogados", 20, 0, ["https://a.es"])
+    assert cache.get("Abogados", 20) == ["https://a.es"]
+    time.sleep(0.06)
+    assert cache.get("abogados", 20) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_lru_eviction():
+    cache = SearchResultCache(max_entries=2)
+    cache.put("a", 20, 0, ["https://a.es"])
+    cache.put("b", 20, 0, ["https://b.es"])
+    cache.get("a", 20)
+    cache.put("c", 20, 0, ["https://c.es"])
+
+    assert cache.get("b", 20) is None
+    assert cache.get("a", 20) == ["https://a.es"]
+    assert cache.get("c", 20) == ["https://c.es"]
+
+
+def test_persistence_is_noop_without_db_or_flag():
+    cache = SearchResultCache(persist=False)
+    cache.put("a", 20, 0, ["https://a.es"])
+    cache.warm(None, ["a"], 20)
+    cache.flush(None)
+    assert cache.get("a", 20) == ["https://a.es"]
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, stmt):
+        self.executed.append(stmt)
+
+    def commit(self):
+        pass
+
+
+def test_prefetched_entries_expire_early_unless_confirmed(monkeypatch):
+    helpers.database_url(monkeypatch)
+    cache = SearchResultCache(ttl_seconds=3600, persist=True)
+    db = _RecordingSession()
+    cache.put("sin confirmar", 20, 0, ["https://a.es"], ttl_seconds=0.05)
+    cache.put("confirmada", 20, 0, ["https://b.es"], ttl_seconds=0.05)
+    assert cache.get("sin confirmar", 20, confirm=False) == ["https://a.es"]
+    cache.flush(db)
+    assert db.executed == []
+
+    assert cache.get("confirmada", 20) == ["https://b.es"]
+    cache.flush(db)
+    assert len(db.executed) == 1
+
+    time.sleep(0.06)
+    assert cache.get("sin confirmar", 20) is None
+    assert cache.get("confirmada", 20) == ["https://b.es"]
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+
+from tests import helpers
+
+
+def _brave_transport(results_by_query, delays=None, calls=None):
+    delays = delays or {}
+
+    async def handler(request):
+        q = request.url.params["q"]
+        if calls is not None:
+            calls.append(q)
+        await asyncio.sleep(delays.get(q, 0))
+        results = [{"url": url} for url in results_by_query.get(q, [])]
+        return httpx.Response(200, json={"web": {"results": results}})
+
+    return httpx.MockTransport(handler)
+
+
+def test_fanout_keeps_variant_order_and_filters(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.SEARCH_CACHE.clear()
+    monkeypatch.setenv("BRAVE_API_KEY", "test")
+    transport = _brave_transport(
+        {
+            "lenta": ["https://www.primero.es/a", "https://facebook.com/x", "https://comun.es"],
+            "rapida": ["https://comun.es/otra", "https://segundo.es"],
+        },
+        delays={"lenta": 0.05},
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            return await main_module.search_domains_async(["lenta", "rapida"], client=http)
+
+    assert asyncio.run(run()) == ["primero.es", "comun.es", "segundo.es"]
+
+
+def test_fanout_stops_at_max_results(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.SEARCH_CACHE.clear()
+    monkeypatch.setenv("BRAVE_API_KEY", "test")
+    monkeypatch.setattr(main_module, "MAX_SEARCH_RESULTS", 2)
+    calls = []
+    transport = _brave_transport(
+        {"uno": ["https://a.es", "https://b.es", "https://c.es"], "dos": ["https://d.es"]},
+        delays={"dos": 0.5},
+        calls=calls,
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as http:
+            return await main_module.search_domains_async(
+                ["uno", "dos"], client=http, max_concurrency=2
+            )
+
+    assert asyncio.run(run()) == ["a.es", "b.es"]
+
+
+def test_repeated_queries_are_served_from_cache(monkeypatch):
+    main_module = helpers.main_module(monkeypatch)
+    main_module.SEARCH_CACHE.clear()
+    monkeypatch.setenv("BRAVE_API_KEY", "test")
+    calls = []
+    transport = _brave_transport({"Dentistas  Madrid": ["https://dental.es"]}, calls=calls)
+
+    async def run(query):
+        async with httpx.AsyncClient(transport=transport) as http:
+            return await main_module.search_domains_async([query], client=http)
+
+    assert asyncio.run(run("Dentistas  Madrid")) == ["dental.es"]
+    assert asyncio.run(run("dentistas madrid")) == ["dental.es"]
+    assert calls == ["Dentistas  Madrid"]
+    assert main_module.SEARCH_CACHE.stats()["hits"] == 1
+
+
+def test_buscar_prefetches_variants_for_the_confirm_step(client, monkeypatch):
+    from tests.helpers import auth
+
+    main_module = helpers.main_module(monkeypatch)
+    main_module.SEARCH_CACHE.clear()
+    main_module.VARIANT_CACHE.clear()
+    monkeypatch.setenv("BRAVE_API_KEY", "test")
+    monkeypatch.setattr(main_module.SEARCH_PREFETCH, "enabled", True)
+    main_module.SEARCH_PREFETCH.clear()
+    calls = []
+    transport = _brave_transport({"dentista Madrid": ["https://dental.es"]}, calls=calls)
+    monkeypatch.setattr(
+        main_module.HTTP_POOLS.search,
+        "build_client",
+        lambda **kw: httpx.AsyncClient(transport=transport),
+    )
+    headers = auth(client, "prefetch@example.com")
+
+    variantes = client.post(
+        "/buscar", json={"cliente_ideal": "dentistas en Madrid"}, headers=headers
+    ).json()["variantes"]
+    assert sorted(calls) == sorted(variantes)
+
+    calls.clear()
+    resp = client.post(
+        "/buscar_variantes_seleccionadas", json={"variantes": variantes[:2]}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert resp.json()["dominios"] == ["dental.es"]
+    assert calls == []
+    assert main_module.SEARCH_PREFETCH.stats()["hits"] == 2
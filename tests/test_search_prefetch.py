@@ -0,0 +1,97 @@
+import asyncio
+
+from backend.core.search_prefetch import SearchPrefetcher
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_disabled_prefetcher_does_nothing():
+    prefetcher = SearchPrefetcher(enabled=False)
+    calls = []
+
+    async def fetch(query):
+        calls.append(query)
+
+    assert asyncio.run(prefetcher.prefetch("a@x.es", ["dentista madrid"], fetch)) == 0
+    assert calls == []
+
+
+def test_budget_is_per_user_and_window():
+    clock = _Clock()
+    prefetcher = SearchPrefetcher(enabled=True, budget=2, window_seconds=60, ttl_seconds=1, clock=clock)
+    calls = []
+
+    async def fetch(query):
+        calls.append(query)
+
+    async def run(user, queries):
+        return await prefetcher.prefetch(user, queries, fetch)
+
+    assert asyncio.run(run("a@x.es", ["uno", "dos", "tres"])) == 2
+    assert asyncio.run(run("b@x.es", ["tres"])) == 1
+    clock.now = 30
+    assert asyncio.run(run("a@x.es", ["cuatro"])) == 0
+    clock.now = 61
+    assert asyncio.run(run("a@x.es", ["cuatro"])) == 1
+    assert calls == ["uno", "dos", "tres", "cuatro"]
+    assert prefetcher.stats()["over_budget"] == 2
+
+
+def test_recent_queries_are_not_prefetched_again_until_ttl():
+    clock = _Clock()
+    prefetcher = SearchPrefetcher(enabled=True, budget=10, ttl_seconds=60, clock=clock)
+    calls = []
+
+    async def fetch(query):
+        calls.append(query)
+
+    asyncio.run(prefetcher.prefetch("a@x.es", ["Dentista  Madrid"], fetch))
+    asyncio.run(prefetcher.prefetch("b@x.es", ["dentista madrid"], fetch))
+    clock.now = 61
+    asyncio.run(prefetcher.prefetch("b@x.es", ["dentista madrid"], fetch))
+    assert calls == ["Dentista  Madrid", "dentista madrid"]
+
+
+def test_failed_prefetch_can_be_retried():
+    prefetcher = SearchPrefetcher(enabled=True, budget=10)
+    attempts = []
+
+    async def fetch(query):
+        attempts.append(query)
+        if len(attempts) == 1:
+            raise RuntimeError("brave down")
+
+    asyncio.run(prefetcher.prefetch("a@x.es", ["uno"], fetch))
+    asyncio.run(prefetcher.prefetch("a@x.es", ["uno"], fetch))
+    assert attempts == ["uno", "uno"]
+    assert prefetcher.stats()["failed"] == 1
+
+
+def test_join_waits_for_inflight_prefetch():
+    prefetcher = SearchPrefetcher(enabled=True, budget=10)
+    done = []
+
+    async def fetch(query):
+        await asyncio.sleep(0.05)
+        done.append(query)
+
+    async def run():
+        task = asyncio.create_task(prefetcher.prefetch("a@x.es", ["uno", "dos"], fetch))
+        await asyncio.sleep(0)
+        joined = await prefetcher.join(["uno"])
+        finished = list(done)
+        await task
+        return joined, finished
+
+    joined, finished = asyncio.run(run())
+    assert joined == 1
+    assert "uno" in finished
+    stats = prefetcher.stats()
+    assert stats["hits"] == 1
+    assert stats["inflight"] == 0
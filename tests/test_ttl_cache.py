@@ -0,0 +1,18 @@
+import pytest
+
+from backend.core.ttl_cache import PersistentTTLCache
+
+
+def test_a_cache_missing_a_row_mapping_fails_at_construction():
+    class NoEntry(PersistentTTLCache):
+        @staticmethod
+        def _model():
+            return None
+
+        def _row(self, key, value, stored_at):
+            return {}
+
+    with pytest.raises(TypeError):
+        NoEntry()
+    with pytest.raises(TypeError):
+        PersistentTTLCache()
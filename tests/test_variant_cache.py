@@ -0,0 +1,57 @@
+import time
+
+from backend.core.variant_cache import VariantCache, split_cat_geo, variant_key
+
+
+def test_key_folds_accents_case_order_and_plurals():
+    base = variant_key("clínicas dentales en Madrid")
+    assert variant_key("  Clinica   dental en MADRID ") == base
+    assert variant_key("dentales clínicas en madrid") == base
+    assert variant_key("clínicas dentales", "Madrid") == base
+    assert variant_key("clínicas dentales en Madrid", "madrid") == base
+
+
+def test_key_keeps_category_place_and_context_apart():
+    assert variant_key("dentistas en Madrid") != variant_key("dentistas en Madrid centro")
+    assert variant_key("dentistas en Madrid") != variant_key("madrid en dentistas")
+    assert variant_key("dentistas en Madrid") != variant_key("dentistas en Madrid", "implantes")
+
+
+def test_split_cat_geo_uses_last_en_and_context_fallback():
+    assert split_cat_geo("tiendas en línea en Sevilla", None) == ("tiendas en línea", "Sevilla")
+    assert split_cat_geo("abogados", " Valencia ") == ("abogados", "Valencia")
+
+
+def test_hit_miss_counters_and_ttl():
+    cache = VariantCache(ttl_seconds=0.05)
+    assert cache.get("abogados en Bilbao") is None
+    cache.put("abogados en Bilbao", None, ["abogado Bilbao", "bufete Bilbao"])
+    assert cache.get("Abogado en bilbao") == ["abogado Bilbao", "bufete Bilbao"]
+    time.sleep(0.06)
+    assert cache.get("abogados en Bilbao") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_lru_eviction_and_empty_results_are_not_cached():
+    cache = VariantCache(max_entries=2)
+    cache.put("a en x", None, ["a x"])
+    cache.put("b en x", None, ["b x"])
+    cache.get("a en x")
+    cache.put("c en x", None, ["c x"])
+    cache.put("d en x", None, [])
+
+    assert cache.get("b en x") is None
+    assert cache.get("a en x") == ["a x"]
+    assert cache.get("c en x") == ["c x"]
+    assert cache.get("d en x") is None
+
+
+def test_persistence_is_noop_without_db_or_flag():
+    cache = VariantCache(persist=False)
+    cache.put("a en x", None, ["a x"])
+    cache.warm(None, "a en x")
+    cache.flush(None)
+    assert cache.get("a en x") == ["a x"]